@@ -0,0 +1,174 @@
+# AssetLoader.py
+# Carregamento concorrente de assets (malhas e texturas) na inicialização
+#
+# O contexto OpenGL pertence à thread principal: glBufferData, glTexImage2D etc. só podem
+# ser chamados nela. Já o trabalho pesado de CPU — ler o OBJ, decodificar o JPEG/PNG,
+# inverter a imagem e converter para RGBA — não depende do OpenGL. Dividimos cada asset em:
+#
+#   • trabalho de CPU  : roda em um pool de threads. A decodificação de imagens (PIL) e a
+#                        leitura de arquivos liberam o GIL nas partes pesadas; já a geração
+#                        de LODs (MeshLOD: QEM) e o Tipsify (MeshOptimizer) são laços em
+#                        Python puro que seguram o GIL. Esses vão para um pool de processos
+#                        (em_processo() / agenda(..., processo=True)): o resultado é só
+#                        alguns arrays NumPy, baratos de serializar com pickle;
+#   • envio para a GPU : uma função chamada na thread principal quando o trabalho termina.
+#
+# O render loop chama processa() a cada quadro: os envios dos assets que ficaram prontos
+# são feitos ali, dentro de um orçamento de tempo, e o objeto passa a ser desenhado a partir
+# do quadro seguinte. Assim o primeiro quadro aparece imediatamente, sem esperar nada.
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class AssetLoader:
+    """
+    Pools de trabalho de CPU (threads e processos) + fila de envios para a GPU executados
+    na thread principal.
+
+    Uso:
+        loader = AssetLoader()
+        loader.agenda("chibi", carrega_cpu, envia_gpu, "meshes/chibi.obj")
+        loader.agenda("gato", MeshLOD.load_obj_lod, envia_gpu, "meshes/Cat/Cat.obj", processo=True)
+        while ...:
+            loader.processa()        # uma vez por quadro, na thread do contexto OpenGL
+    """
+
+    def __init__(self, workers=None, processos=None):
+        """
+        - workers: nº de threads do pool (padrão: nº de CPUs, no mínimo 2).
+        - processos: nº de processos do pool (padrão: nº de CPUs). O pool só é criado no
+          primeiro uso, com 'spawn': o processo pai pode já ter threads e um contexto OpenGL,
+          que não devem ser copiados por fork.
+        """
+        self.workers = workers or max(2, os.cpu_count() or 1)
+        self.processos = processos or os.cpu_count() or 1
+        self.pool = ThreadPoolExecutor(max_workers=self.workers)
+        self._pool_processos = None
+        self._trava = threading.Lock()
+        self.pendentes = []          # (nome, future, envia_gpu)
+        self.inicio = time.perf_counter()
+        self.tempos = {}             # nome → segundos desde o início até o envio para a GPU
+
+    def _processos(self):
+        with self._trava:
+            if self._pool_processos is None:
+                self._pool_processos = ProcessPoolExecutor(max_workers=self.processos,
+                                                           mp_context=multiprocessing.get_context('spawn'))
+            return self._pool_processos
+
+    def agenda(self, nome, carrega_cpu, envia_gpu, *args, processo=False):
+        """
+        Agenda carrega_cpu(*args) no pool; quando terminar, envia_gpu(resultado) será chamado
+        pela thread principal em processa(). envia_gpu pode agendar novos assets
+        (ex.: as texturas que só são conhecidas depois de ler o .mtl).
+        - processo: roda no pool de processos (trabalho em Python puro, que seguraria o GIL);
+          carrega_cpu precisa ser uma função de módulo e args/resultado serializáveis (pickle).
+        """
+        pool = self._processos() if processo else self.pool
+        self.pendentes.append((nome, pool.submit(carrega_cpu, *args), envia_gpu))
+
+    def em_processo(self, funcao, *args):
+        """
+        Executa funcao(*args) no pool de processos e espera o resultado. Para a parte pesada
+        de um trabalho que roda nas threads: a thread fica bloqueada sem segurar o GIL.
+        """
+        return self._processos().submit(funcao, *args).result()
+
+    def processa(self, orcamento=0.004):
+        """
+        Faz os envios para a GPU dos assets prontos, até gastar 'orcamento' segundos
+        (pelo menos um envio por chamada, para sempre progredir). Deve ser chamado na
+        thread que possui o contexto OpenGL. Exceções do trabalho de CPU são relançadas aqui.
+        Retorna o número de assets enviados.
+        """
+        limite = time.perf_counter() + orcamento
+        enviados = 0
+        for item in list(self.pendentes):
+            nome, futuro, envia_gpu = item
+            if not futuro.done():
+                continue
+            self.pendentes.remove(item)
+            envia_gpu(futuro.result())
+            self.tempos[nome] = time.perf_counter() - self.inicio
+            enviados += 1
+            if time.perf_counter() >= limite:
+                break
+        return enviados
+
+    def concluido(self):
+        """True quando não há mais assets agendados nem envios pendentes."""
+        return not self.pendentes
+
+    def espera(self):
+        """Bloqueia até tudo ser carregado e enviado (carregamento síncrono)."""
+        while self.pendentes:
+            self.pendentes[0][1].result()
+            self.processa(orcamento=float('inf'))
+
+    def encerra(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        if self._pool_processos is not None:
+            self._pool_processos.shutdown(wait=False, cancel_futures=True)
+
+
+# ----------------------------------------
+# Benchmark: inicialização serial x concorrente
+# ----------------------------------------
+# Uso: python AssetLoader.py
+# Só o trabalho de CPU (sem contexto OpenGL); o "envio" apenas toca nos dados.
+# Mede o tempo até o primeiro quadro e até todos os assets estarem carregados, com os
+# caches frios (MeshCache apagado e texturas decodificadas sem o TextureCache).
+
+if __name__ == "__main__":
+    from TextureLoader import decode_texture
+    import MeshLOD
+
+    malhas = ["meshes/chibi.obj"]
+    texturas = ["textures/chibi.png", "textures/Cat_diffuse.jpg", "meshes/Cat/Cat_bump.jpg"]
+
+    def limpa_caches():
+        for m in malhas:
+            pasta = os.path.dirname(m) or "."
+            for arquivo in os.listdir(pasta):
+                if arquivo.startswith(os.path.basename(m) + ".") and arquivo.endswith(".meshcache"):
+                    os.remove(os.path.join(pasta, arquivo))
+
+    def envia(resultado):
+        # no Ex7 aqui ficariam glBufferData / glTexImage2D
+        return len(resultado)
+
+    # serial: como o main() original — o primeiro quadro só depois de tudo
+    limpa_caches()
+    t0 = time.perf_counter()
+    for m in malhas:
+        envia(MeshLOD.load_obj_lod(m))
+    for t in texturas:
+        envia(decode_texture(t, usa_cache=False))
+    serial = time.perf_counter() - t0
+
+    # concorrente: o render loop começa logo e recebe os assets à medida que ficam prontos
+    limpa_caches()
+    loader = AssetLoader()
+    for m in malhas:
+        loader.agenda(m, MeshLOD.load_obj_lod, envia, m, processo=True)
+    for t in texturas:
+        loader.agenda(t, decode_texture, envia, t, False)
+    primeiro_quadro = time.perf_counter() - loader.inicio
+    quadros = 0
+    while not loader.concluido():
+        loader.processa()
+        quadros += 1
+        time.sleep(1 / 240)           # "desenha" um quadro
+    total = time.perf_counter() - loader.inicio
+    loader.encerra()
+    limpa_caches()
+
+    print(f"serial      : primeiro quadro {serial * 1e3:8.1f} ms | tudo carregado {serial * 1e3:8.1f} ms")
+    print(f"concorrente : primeiro quadro {primeiro_quadro * 1e3:8.1f} ms | tudo carregado {total * 1e3:8.1f} ms "
+          f"({loader.workers} threads, {loader.processos} processos, {quadros} quadros durante o carregamento)")
+    for nome, t in sorted(loader.tempos.items(), key=lambda x: x[1]):
+        print(f"    {t * 1e3:8.1f} ms  {nome}")
@@ -0,0 +1,406 @@
+# BlockCompression.py
+# Compressão de texturas em blocos (BC1, BC3, BC5) em NumPy e contêiner DDS
+#
+# Uma textura RGBA8 ocupa 4 bytes por texel na memória de vídeo e na banda de leitura.
+# Os formatos BCn (S3TC/RGTC) dividem a imagem em blocos de 4x4 texels, comprimidos de forma
+# independente, que a GPU descomprime na hora da amostragem:
+#
+#   • BC1 (DXT1) : 8 bytes/bloco (0,5 byte/texel, 8:1). Duas cores RGB565 de ponta e, para
+#                  cada texel, um índice de 2 bits em uma paleta de 4 cores interpoladas.
+#                  Para texturas de cor opacas (Cat_diffuse.jpg).
+#   • BC3 (DXT5) : 16 bytes/bloco (1 byte/texel, 4:1). Bloco BC1 para a cor + bloco BC4 para o
+#                  alfa (dois valores de ponta de 8 bits e índices de 3 bits em 8 níveis).
+#                  Para texturas com transparência.
+#   • BC5 (RGTC2): 16 bytes/bloco. Dois blocos BC4 independentes, para os canais R e G.
+#                  Para mapas de normais/relevo (Cat_bump.jpg), que não toleram a mistura
+#                  de canais do BC1.
+#
+# O codificador é vetorizado: todos os blocos da imagem são processados de uma vez.
+# Pontas da cor (BC1): eixo principal das cores do bloco (iteração de potência na covariância),
+# seguido de um ajuste por mínimos quadrados das duas pontas com os índices escolhidos.
+#
+# Os resultados são gravados em um arquivo .dds (FourCC DXT1/DXT5/ATI2) com todos os níveis
+# de mipmap. Os níveis são gravados já invertidos verticalmente, na orientação que o OpenGL
+# espera (a mesma de TextureLoader.decode_texture), prontos para glCompressedTexImage2D.
+
+import collections
+import struct
+
+import numpy as np
+
+# Formatos internos OpenGL (EXT_texture_compression_s3tc / ARB_texture_compression_rgtc)
+GL_COMPRESSED_RGBA_S3TC_DXT1_EXT = 0x83F1
+GL_COMPRESSED_RGBA_S3TC_DXT5_EXT = 0x83F3
+GL_COMPRESSED_RG_RGTC2 = 0x8DBD
+
+# formato → (FourCC no DDS, bytes por bloco, formato interno GL)
+FORMATOS = {
+    'bc1': (b'DXT1', 8, GL_COMPRESSED_RGBA_S3TC_DXT1_EXT),
+    'bc3': (b'DXT5', 16, GL_COMPRESSED_RGBA_S3TC_DXT5_EXT),
+    'bc5': (b'ATI2', 16, GL_COMPRESSED_RG_RGTC2),
+}
+
+# Textura lida de um .dds: formato ('bc1', 'bc3', 'bc5'), dimensões do nível 0 e bytes de cada nível
+TexturaComprimida = collections.namedtuple('TexturaComprimida', 'formato largura altura niveis')
+
+
+# ----------------------------------------
+# Blocos 4x4
+# ----------------------------------------
+
+def _em_blocos(img):
+    """(h, w, c) → (nº de blocos, 16, c) float32, completando as bordas até múltiplos de 4."""
+    h, w, c = img.shape
+    H, W = -(-h // 4) * 4, -(-w // 4) * 4
+    img = np.pad(img, ((0, H - h), (0, W - w), (0, 0)), mode='edge')
+    blocos = img.reshape(H // 4, 4, W // 4, 4, c).transpose(0, 2, 1, 3, 4)
+    return blocos.reshape(-1, 16, c).astype(np.float32)
+
+
+def _de_blocos(blocos, h, w):
+    """Inverso de _em_blocos: (nº de blocos, 16, c) → (h, w, c)."""
+    H, W = -(-h // 4) * 4, -(-w // 4) * 4
+    c = blocos.shape[-1]
+    img = blocos.reshape(H // 4, W // 4, 4, 4, c).transpose(0, 2, 1, 3, 4).reshape(H, W, c)
+    return img[:h, :w]
+
+
+def _empacota_indices(indices, bits):
+    """Índices (n, 16) de 'bits' bits → inteiros little-endian, texel 0 nos bits menos significativos."""
+    deslocamento = (np.arange(16, dtype=np.uint64) * np.uint64(bits))
+    return (indices.astype(np.uint64) << deslocamento).sum(axis=1, dtype=np.uint64)
+
+
+def _desempacota_indices(valores, bits):
+    deslocamento = (np.arange(16, dtype=np.uint64) * np.uint64(bits))
+    return ((valores[:, None] >> deslocamento) & np.uint64((1 << bits) - 1)).astype(np.int64)
+
+
+# ----------------------------------------
+# BC1 (cor)
+# ----------------------------------------
+
+def _para_565(rgb):
+    """RGB float [0, 255] (n, 3) → uint16 RGB565."""
+    r = np.clip(np.rint(rgb[:, 0] * 31 / 255), 0, 31).astype(np.uint16)
+    g = np.clip(np.rint(rgb[:, 1] * 63 / 255), 0, 63).astype(np.uint16)
+    b = np.clip(np.rint(rgb[:, 2] * 31 / 255), 0, 31).astype(np.uint16)
+    return (r << 11) | (g << 5) | b
+
+
+def _de_565(c):
+    """uint16 RGB565 (n,) → RGB int32 [0, 255] (n, 3), replicando os bits altos."""
+    c = c.astype(np.int32)
+    r, g, b = (c >> 11) & 31, (c >> 5) & 63, c & 31
+    return np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)], axis=1)
+
+
+def _paleta_bc1(c0, c1):
+    """Paleta de 4 cores (modo de 4 cores, c0 > c1): c0, c1, (2c0+c1)/3, (c0+2c1)/3."""
+    a, b = _de_565(c0), _de_565(c1)
+    return np.stack([a, b, (2 * a + b) // 3, (a + 2 * b) // 3], axis=1)         # (n, 4, 3)
+
+
+def _indices_mais_proximos(pixels, paleta):
+    """Índice da cor da paleta (n, k, c) mais próxima de cada pixel (n, 16, c)."""
+    d = ((pixels[:, :, None, :] - paleta[:, None, :, :].astype(np.float32)) ** 2).sum(axis=3)
+    return np.argmin(d, axis=2)
+
+
+def codifica_bc1_blocos(rgb):
+    """Blocos (n, 16, 3) float [0, 255] → (c0, c1, índices) do BC1."""
+    media = rgb.mean(axis=1, keepdims=True)
+    centrado = rgb - media
+    cov = np.einsum('nki,nkj->nij', centrado, centrado)
+
+    # eixo principal: iteração de potência começando pela diagonal de maior variância
+    eixo = np.ones((len(rgb), 3), np.float32)
+    for _ in range(8):
+        eixo = np.einsum('nij,nj->ni', cov, eixo)
+        eixo /= np.maximum(np.linalg.norm(eixo, axis=1, keepdims=True), 1e-12)
+    proj = np.einsum('nki,ni->nk', centrado, eixo)
+    ponta0 = media[:, 0] + proj.max(axis=1, keepdims=True) * eixo
+    ponta1 = media[:, 0] + proj.min(axis=1, keepdims=True) * eixo
+
+    c0, c1, indices = _bc1_de_pontas(rgb, ponta0, ponta1)
+
+    # ajuste por mínimos quadrados: com os índices fixos, cada texel é α·p0 + (1−α)·p1
+    alfa = np.array([1.0, 0.0, 2.0 / 3.0, 1.0 / 3.0], np.float32)[indices]     # (n, 16)
+    beta = 1.0 - alfa
+    aa, bb, ab = (alfa * alfa).sum(1), (beta * beta).sum(1), (alfa * beta).sum(1)
+    ax = (alfa[:, :, None] * rgb).sum(1)
+    bx = (beta[:, :, None] * rgb).sum(1)
+    det = aa * bb - ab * ab
+    ok = np.abs(det) > 1e-6
+    det = np.where(ok, det, 1.0)[:, None]
+    p0 = (ax * bb[:, None] - bx * ab[:, None]) / det
+    p1 = (bx * aa[:, None] - ax * ab[:, None]) / det
+    r0, r1, ri = _bc1_de_pontas(rgb, np.clip(p0, 0, 255), np.clip(p1, 0, 255))
+
+    # fica com o ajuste só onde ele reduz o erro
+    erro = lambda a, b, i: ((rgb - _paleta_bc1(a, b)[np.arange(len(rgb))[:, None], i]) ** 2).sum(axis=(1, 2))
+    melhor = ok & (erro(r0, r1, ri) < erro(c0, c1, indices))
+    return (np.where(melhor, r0, c0), np.where(melhor, r1, c1),
+            np.where(melhor[:, None], ri, indices))
+
+
+def _bc1_de_pontas(rgb, ponta0, ponta1):
+    """Quantiza as pontas em RGB565 (garantindo c0 ≥ c1) e escolhe o índice de cada texel."""
+    c0, c1 = _para_565(ponta0), _para_565(ponta1)
+    troca = c0 < c1
+    c0, c1 = np.where(troca, c1, c0), np.where(troca, c0, c1)
+    indices = _indices_mais_proximos(rgb, _paleta_bc1(c0, c1))
+    # c0 == c1 seria o modo de 3 cores: com todos os índices em 0 a cor é exatamente c0
+    indices[c0 == c1] = 0
+    return c0, c1, indices
+
+
+def _bytes_bc1(c0, c1, indices):
+    saida = np.zeros(len(c0), dtype=[('c0', '<u2'), ('c1', '<u2'), ('i', '<u4')])
+    saida['c0'], saida['c1'] = c0, c1
+    saida['i'] = _empacota_indices(indices, 2).astype(np.uint32)
+    return saida
+
+
+def _decodifica_bc1(dados):
+    blocos = np.frombuffer(dados, dtype=[('c0', '<u2'), ('c1', '<u2'), ('i', '<u4')])
+    c0, c1 = blocos['c0'], blocos['c1']
+    paleta = _paleta_bc1(c0, c1)
+    # modo de 3 cores (c0 ≤ c1): cor 2 = média, cor 3 = preto transparente
+    tres = c0 <= c1
+    a, b = _de_565(c0), _de_565(c1)
+    paleta[tres, 2] = ((a + b) // 2)[tres]
+    paleta[tres, 3] = 0
+    indices = _desempacota_indices(blocos['i'].astype(np.uint64), 2)
+    rgb = paleta[np.arange(len(blocos))[:, None], indices]
+    alfa = np.where(tres[:, None] & (indices == 3), 0, 255)
+    return np.concatenate([rgb, alfa[:, :, None]], axis=2)
+
+
+# ----------------------------------------
+# BC4 (um canal), usado no alfa do BC3 e nos dois canais do BC5
+# ----------------------------------------
+
+def _paleta_bc4(a0, a1):
+    """Paleta de 8 níveis (a0 > a1): a0, a1 e 6 interpolados; (a0 ≤ a1): 4 interpolados + 0 e 255."""
+    a0, a1 = a0.astype(np.int32), a1.astype(np.int32)
+    k = np.arange(1, 7)
+    oito = np.concatenate([a0[:, None], a1[:, None],
+                           ((7 - k) * a0[:, None] + k * a1[:, None]) // 7], axis=1)
+    k = np.arange(1, 5)
+    seis = np.concatenate([a0[:, None], a1[:, None],
+                           ((5 - k) * a0[:, None] + k * a1[:, None]) // 5,
+                           np.zeros((len(a0), 1), np.int32), np.full((len(a0), 1), 255, np.int32)], axis=1)
+    return np.where((a0 > a1)[:, None], oito, seis)
+
+
+def codifica_bc4_blocos(canal):
+    """Blocos (n, 16) float [0, 255] → bytes estruturados BC4 (a0, a1, índices de 3 bits)."""
+    a0 = np.clip(np.rint(canal.max(axis=1)), 0, 255).astype(np.uint8)
+    a1 = np.clip(np.rint(canal.min(axis=1)), 0, 255).astype(np.uint8)
+    indices = _indices_mais_proximos(canal[:, :, None], _paleta_bc4(a0, a1)[:, :, None])
+    indices[a0 == a1] = 0
+    bits = _empacota_indices(indices, 3)
+    saida = np.zeros(len(canal), dtype=[('a0', 'u1'), ('a1', 'u1'), ('i', 'u1', 6)])
+    saida['a0'], saida['a1'] = a0, a1
+    saida['i'] = bits.astype('<u8').view(np.uint8).reshape(-1, 8)[:, :6]
+    return saida
+
+
+def _decodifica_bc4(blocos):
+    bits = np.zeros((len(blocos), 8), np.uint8)
+    bits[:, :6] = blocos['i']
+    indices = _desempacota_indices(bits.view('<u8')[:, 0], 3)
+    paleta = _paleta_bc4(blocos['a0'], blocos['a1'])
+    return paleta[np.arange(len(blocos))[:, None], indices]
+
+
+# ----------------------------------------
+# Imagens inteiras
+# ----------------------------------------
+
+def codifica(rgba, formato):
+    """
+    Comprime uma imagem RGBA uint8 (h, w, 4) no formato 'bc1', 'bc3' ou 'bc5'.
+    Retorna bytes, na ordem dos blocos (linha a linha de blocos), como o OpenGL espera.
+    """
+    blocos = _em_blocos(np.asarray(rgba)[..., :4])
+    if formato == 'bc1':
+        return _bytes_bc1(*codifica_bc1_blocos(blocos[..., :3])).tobytes()
+    if formato == 'bc3':
+        alfa = codifica_bc4_blocos(blocos[..., 3])
+        cor = _bytes_bc1(*codifica_bc1_blocos(blocos[..., :3]))
+        saida = np.zeros(len(blocos), dtype=[('alfa', alfa.dtype), ('cor', cor.dtype)])
+        saida['alfa'], saida['cor'] = alfa, cor
+        return saida.tobytes()
+    if formato == 'bc5':
+        r, g = codifica_bc4_blocos(blocos[..., 0]), codifica_bc4_blocos(blocos[..., 1])
+        saida = np.zeros(len(blocos), dtype=[('r', r.dtype), ('g', g.dtype)])
+        saida['r'], saida['g'] = r, g
+        return saida.tobytes()
+    raise ValueError(f"Formato de compressão desconhecido: {formato}")
+
+
+def decodifica(dados, formato, largura, altura):
+    """Descomprime um nível: bytes → RGBA uint8 (altura, largura, 4). BC5 volta com B = 0 e A = 255."""
+    if formato == 'bc1':
+        blocos = _decodifica_bc1(dados)
+    elif formato == 'bc3':
+        bc4 = np.dtype([('a0', 'u1'), ('a1', 'u1'), ('i', 'u1', 6)])
+        estrutura = np.frombuffer(dados, dtype=[('alfa', bc4), ('cor', 'V8')])
+        blocos = _decodifica_bc1(estrutura['cor'].tobytes())
+        blocos[:, :, 3] = _decodifica_bc4(estrutura['alfa'])
+    elif formato == 'bc5':
+        bc4 = np.dtype([('a0', 'u1'), ('a1', 'u1'), ('i', 'u1', 6)])
+        estrutura = np.frombuffer(dados, dtype=[('r', bc4), ('g', bc4)])
+        blocos = np.zeros((len(estrutura), 16, 4), np.int32)
+        blocos[:, :, 0] = _decodifica_bc4(estrutura['r'])
+        blocos[:, :, 1] = _decodifica_bc4(estrutura['g'])
+        blocos[:, :, 3] = 255
+    else:
+        raise ValueError(f"Formato de compressão desconhecido: {formato}")
+    return _de_blocos(blocos, altura, largura).astype(np.uint8)
+
+
+def psnr(original, reconstruida, canais=slice(None)):
+    """PSNR (dB) entre duas imagens uint8, nos canais escolhidos."""
+    erro = (np.asarray(original, np.float64)[..., canais] - np.asarray(reconstruida, np.float64)[..., canais]) ** 2
+    mse = erro.mean()
+    return float('inf') if mse == 0 else 10.0 * np.log10(255.0 ** 2 / mse)
+
+
+def escolhe_formato(rgba, path=""):
+    """BC5 para mapas de relevo/normais (pelo nome), BC3 se houver transparência, senão BC1."""
+    nome = path.lower()
+    if 'bump' in nome or 'normal' in nome:
+        return 'bc5'
+    return 'bc3' if np.any(np.asarray(rgba)[..., 3] < 255) else 'bc1'
+
+
+# ----------------------------------------
+# Contêiner DDS
+# ----------------------------------------
+
+_DDSD_FLAGS = 0x1 | 0x2 | 0x4 | 0x1000 | 0x20000 | 0x80000   # CAPS|HEIGHT|WIDTH|PIXELFORMAT|MIPMAPCOUNT|LINEARSIZE
+_DDPF_FOURCC = 0x4
+_DDSCAPS = 0x1000 | 0x8 | 0x400000                         # TEXTURE|COMPLEX|MIPMAP
+_CABECALHO_DDS = struct.Struct('<4s7I44x2I4s5I5I')          # 128 bytes
+
+
+def tamanho_nivel(formato, largura, altura):
+    """Bytes de um nível: nº de blocos 4x4 × bytes por bloco."""
+    return max(1, -(-largura // 4)) * max(1, -(-altura // 4)) * FORMATOS[formato][1]
+
+
+def grava_dds(path, formato, niveis):
+    """
+    Comprime os níveis RGBA uint8 (lista, do maior para o menor, como Mipmap.gera_piramide)
+    e grava o .dds.
+    """
+    fourcc = FORMATOS[formato][0]
+    altura, largura = niveis[0].shape[:2]
+    cabecalho = _CABECALHO_DDS.pack(b'DDS ', 124, _DDSD_FLAGS, altura, largura,
+                                    tamanho_nivel(formato, largura, altura), 0, len(niveis),
+                                    32, _DDPF_FOURCC, fourcc, 0, 0, 0, 0, 0,
+                                    _DDSCAPS, 0, 0, 0, 0)
+    with open(path, 'wb') as f:
+        f.write(cabecalho)
+        for nivel in niveis:
+            f.write(codifica(nivel, formato))
+
+
+def le_dds(path):
+    """
+    Lê um .dds BC1/BC3/BC5. Os níveis são fatias de um np.memmap do arquivo (sem cópia).
+    Retorna TexturaComprimida(formato, largura, altura, [bytes de cada nível]).
+    """
+    dados = np.memmap(path, dtype=np.uint8, mode='r')
+    campos = _CABECALHO_DDS.unpack(bytes(dados[:_CABECALHO_DDS.size]))
+    magica, _, _, altura, largura, _, _, n_niveis = campos[:8]
+    fourcc = campos[10]
+    if magica != b'DDS ':
+        raise RuntimeError(f"{path} não é um arquivo DDS")
+    formato = next((f for f, (cc, _, _) in FORMATOS.items() if cc == fourcc), None)
+    if formato is None:
+        raise RuntimeError(f"{path}: formato {fourcc!r} não suportado")
+
+    niveis, offset = [], _CABECALHO_DDS.size
+    for k in range(max(1, n_niveis)):
+        n = tamanho_nivel(formato, max(1, largura >> k), max(1, altura >> k))
+        niveis.append(dados[offset:offset + n])
+        offset += n
+    return TexturaComprimida(formato, largura, altura, niveis)
+
+
+# ----------------------------------------
+# Linha de comando: compressão offline e teste de qualidade (PSNR)
+# ----------------------------------------
+# Uso:
+#   python BlockCompression.py imagem.jpg [bc1|bc3|bc5]   → grava imagem.dds ao lado da imagem
+#   python BlockCompression.py                            → teste: codifica e decodifica, confere o PSNR
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import time
+    from PIL import Image
+    import Mipmap
+
+    def carrega(path):
+        # mesma conversão de TextureLoader.decode_texture (sem OpenGL)
+        return np.asarray(Image.open(path).transpose(Image.FLIP_TOP_BOTTOM).convert("RGBA"))
+
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+        rgba = carrega(path)
+        formato = sys.argv[2] if len(sys.argv) > 2 else escolhe_formato(rgba, path)
+        niveis = Mipmap.gera_piramide(rgba, srgb=(formato != 'bc5'))
+        destino = os.path.splitext(path)[0] + ".dds"
+        t0 = time.perf_counter()
+        grava_dds(destino, formato, niveis)
+        print(f"{destino}: {formato.upper()}, {len(niveis)} níveis, "
+              f"{os.path.getsize(destino) / 1e3:.0f} KB (RGBA8: {sum(n.nbytes for n in niveis) / 1e3:.0f} KB) "
+              f"em {time.perf_counter() - t0:.2f}s")
+        sys.exit(0)
+
+    # Teste: limites mínimos de PSNR para cada formato
+    casos = [("textures/Cat_diffuse.jpg", 'bc1', slice(0, 3), 30.0),
+             ("textures/chibi.png", 'bc1', slice(0, 3), 30.0),
+             ("meshes/Cat/Cat_bump.jpg", 'bc5', slice(0, 2), 38.0)]
+    for path, formato, canais, minimo in casos:
+        rgba = carrega(path)
+        t0 = time.perf_counter()
+        dados = codifica(rgba, formato)
+        t1 = time.perf_counter()
+        volta = decodifica(dados, formato, rgba.shape[1], rgba.shape[0])
+        p = psnr(rgba, volta, canais)
+        print(f"{path:28s} {formato.upper()}: PSNR {p:5.1f} dB (mín. {minimo}) | "
+              f"{len(dados) / rgba.nbytes * 100:.1f}% do RGBA8 | {(t1 - t0) * 1e3:.0f} ms")
+        assert p >= minimo, path
+
+    # BC3: cor da chibi com um gradiente de alfa; o alfa é testado separadamente
+    rgba = carrega("textures/chibi.png").copy()
+    rgba[..., 3] = np.linspace(0, 255, rgba.shape[1]).astype(np.uint8)[None, :]
+    volta = decodifica(codifica(rgba, 'bc3'), 'bc3', rgba.shape[1], rgba.shape[0])
+    print(f"gradiente de alfa           BC3: PSNR alfa {psnr(rgba, volta, 3):5.1f} dB, "
+          f"cor {psnr(rgba, volta, slice(0, 3)):5.1f} dB")
+    assert psnr(rgba, volta, 3) >= 40.0 and psnr(rgba, volta, slice(0, 3)) >= 30.0
+
+    # casos de borda: tamanhos não múltiplos de 4 e blocos de uma cor só (sem perda)
+    for formato in FORMATOS:
+        for h, w in ((1, 1), (2, 3), (5, 7)):
+            cor = np.full((h, w, 4), (255, 0, 255, 255) if formato != 'bc5' else (90, 200, 0, 255), np.uint8)
+            volta = decodifica(codifica(cor, formato), formato, w, h)
+            assert volta.shape == cor.shape and np.array_equal(volta, cor), (formato, h, w)
+
+    # DDS: ida e volta com todos os níveis
+    import tempfile
+    with tempfile.TemporaryDirectory() as pasta:
+        niveis = Mipmap.gera_piramide(carrega("textures/chibi.png"))
+        destino = os.path.join(pasta, "chibi.dds")
+        grava_dds(destino, 'bc1', niveis)
+        lida = le_dds(destino)
+        assert (lida.formato, lida.largura, lida.altura, len(lida.niveis)) == ('bc1', 512, 512, len(niveis))
+        assert all(bytes(n) == codifica(m, 'bc1') for n, m in zip(lida.niveis, niveis))
+        del lida
+    print("OK")
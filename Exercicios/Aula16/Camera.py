@@ -2,22 +2,33 @@
 # Gerencia a câmera 3D usando yaw (rotação horizontal) e pitch (rotação vertical)
 #
 # Atributos principais:
-#   camera_pos         : Vector3 – posição da câmera no mundo
-#   camera_front       : Vector3 – direção que a câmera está apontando
-#   camera_up          : Vector3 – vetor “para cima” da câmera
-#   camera_right       : Vector3 – vetor “para a direita” da câmera
+#   camera_pos         : float32 (3,) – posição da câmera no mundo
+#   camera_front       : float32 (3,) – direção que a câmera está apontando
+#   camera_up          : float32 (3,) – vetor “para cima” da câmera
+#   camera_right       : float32 (3,) – vetor “para a direita” da câmera
 #   yaw                : float   – ângulo de rotação horizontal em graus (em torno do eixo Y)
 #   pitch              : float   – ângulo de rotação vertical em graus (em torno do eixo X)
 #   mouse_sensitivity  : float   – quanto o movimento do mouse afeta yaw/pitch
+#   versao             : int     – incrementada a cada mudança de view ou projection
 #
 # Métodos:
 #   get_view_matrix()
 #       → Retorna a matriz look-at com base em camera_pos, camera_front e camera_up.
 #
+#   set_projection(fov, aspecto, perto, longe) / get_projection_matrix()
+#       → Projeção em perspectiva guardada na câmera.
+#
+#   get_view_projection_matrix()
+#       → view × projection (pyrr, vetores-linha).
+#
+#   frustum_planes(projection=None)
+#       → 6 planos (6, 4) do frustum de get_view_matrix() × projection, para o culling (Frustum.py).
+#
 #   process_mouse_movement(xoffset, yoffset, constrain_pitch=True)
 #       xoffset, yoffset : deslocamento do mouse em pixels.
 #       constrain_pitch   : limita pitch a [-45°, +45°] para evitar inversão de câmera.
-#       Atualiza yaw e pitch e recalcula os vetores da câmera.
+#       Acumula o deslocamento; yaw, pitch e os vetores são atualizados uma vez só, no
+#       próximo uso da câmera (o GLFW chama o callback do mouse várias vezes por quadro).
 #
 #   process_keyboard(direction, velocity)
 #       direction : "FORWARD" | "BACKWARD" | "LEFT" | "RIGHT"
@@ -25,20 +36,35 @@
 #
 #   update_camera_vectors()
 #       Interno: converte yaw/pitch em vetores normais de direção da câmera.
+#
+#   get_state() / set_state(position, yaw, pitch)
+#       → Estado completo da câmera, para gravar e reproduzir trajetórias (CameraPath.py).
+#
+# CameraBatch: N câmeras de uma vez (cascatas de sombra, sondas de reflexo, capturas de
+# vários pontos de vista), guardadas como estrutura de arrays — yaw (N,), pitch (N,),
+# posicao (N, 3) — e calculadas em poucas operações NumPy: vetores (N, 3), view e
+# projection (N, 4, 4) e planos do frustum (N, 6, 4), iguais aos da Camera.
+#
+# Cache: view, view × projection e planos do frustum só são recalculados quando a câmera
+# muda (flag "sujo"); um quadro com a câmera parada não faz nenhuma conta. Os vetores e as
+# matrizes são arrays float32 alocados uma vez e atualizados no lugar — as matrizes
+# devolvidas são essas mesmas arrays, então não devem ser modificadas por quem as usa.
 
-from pyrr import Vector3, vector, vector3, matrix44
-from math import sin, cos, radians
+import numpy as np
+from pyrr import matrix44
+from math import sin, cos, radians, sqrt
+import Frustum
 
 class Camera:
     def __init__(self):
         # posição inicial da câmera (x, y, z)
-        self.camera_pos    = Vector3([0.0, 4.0, 30.0])
+        self.camera_pos    = np.array([0.0, 4.0, 30.0], dtype=np.float32)
         # direção inicial (front) apontando para -Z
-        self.camera_front  = Vector3([0.0, 0.0, -1.0])
+        self.camera_front  = np.array([0.0, 0.0, -1.0], dtype=np.float32)
         # vetor "para cima" global
-        self.camera_up     = Vector3([0.0, 1.0, 0.0])
+        self.camera_up     = np.array([0.0, 1.0, 0.0], dtype=np.float32)
         # vetor "para a direita" inicial (usado no movimento lateral)
-        self.camera_right  = Vector3([1.0, 0.0, 0.0])
+        self.camera_right  = np.array([1.0, 0.0, 0.0], dtype=np.float32)
 
         # sensibilidade do mouse (quanto xoffset e yoffset afetam yaw/pitch)
         self.mouse_sensitivity = 0.01
@@ -47,43 +73,130 @@ class Camera:
         # ângulo pitch (vertical), 0° inicialmente (nível)
         self.pitch = 0.0
 
+        # deslocamento do mouse ainda não aplicado (acumulado entre quadros)
+        self._mouse = [0.0, 0.0, True]      # xoffset, yoffset, constrain_pitch
+        self._mouse_pendente = False
+
+        # matrizes em cache e flags de validade
+        self._view = np.identity(4, dtype=np.float32)
+        self._projection = matrix44.create_perspective_projection_matrix(45.0, 800 / 600, 0.1, 100.0,
+                                                                         dtype=np.float32)
+        self._view_projection = np.identity(4, dtype=np.float32)
+        self._planos = None
+        self._view_suja = True
+        self._vp_suja = True
+        self._temp = np.empty(3, dtype=np.float32)
+        self.versao = 0
+
+    def _sujou(self):
+        """View mudou: invalida view, view × projection e planos."""
+        self._view_suja = self._vp_suja = True
+        self._planos = None
+        self.versao += 1
+
+    def _aplica_mouse(self):
+        """Aplica de uma vez todo o movimento do mouse acumulado desde o último uso."""
+        if not self._mouse_pendente:
+            return
+        xoffset, yoffset, constrain_pitch = self._mouse
+        self._mouse[0] = self._mouse[1] = 0.0
+        self._mouse_pendente = False
+
+        # aplica sensibilidade e atualiza ângulos
+        self.yaw   += xoffset * self.mouse_sensitivity
+        self.pitch += yoffset * self.mouse_sensitivity
+
+        # limita pitch se necessário
+        if constrain_pitch:
+            max_angle = 45.0
+            if self.pitch > max_angle:
+                self.pitch = max_angle
+            if self.pitch < -max_angle:
+                self.pitch = -max_angle
+
+        # recalcula vetores front, right e up
+        self.update_camera_vectors()
+
     def get_view_matrix(self):
         """
         Gera a matriz de visualização (LookAt).
         → camera_pos é o olho da câmera.
         → camera_pos + camera_front é o ponto para onde a câmera olha.
         → camera_up define a orientação "para cima".
+        Mesmo resultado de matrix44.create_look_at, escrito direto na matriz em cache
+        (front, right e up já são ortonormais).
+        """
+        self._aplica_mouse()
+        if self._view_suja:
+            v, f, r, u, p = self._view, self.camera_front, self.camera_right, self.camera_up, self.camera_pos
+            v[:3, 0] = r
+            v[:3, 1] = u
+            v[:3, 2] = f
+            v[:3, 2] *= -1.0
+            v[3, 0] = -r.dot(p)
+            v[3, 1] = -u.dot(p)
+            v[3, 2] = f.dot(p)
+            self._view_suja = False
+        return self._view
+
+    def set_projection(self, fov, aspecto, perto, longe):
+        """Define a projeção em perspectiva (fov em graus); chamar quando a janela mudar de tamanho."""
+        self._projection[:] = matrix44.create_perspective_projection_matrix(fov, aspecto, perto, longe,
+                                                                            dtype=np.float32)
+        self._vp_suja = True
+        self._planos = None
+        self.versao += 1
+
+    def get_projection_matrix(self):
+        return self._projection
+
+    def get_view_projection_matrix(self):
+        """view × projection (leva do mundo ao clip space), recalculada só quando algo mudou."""
+        view = self.get_view_matrix()
+        if self._vp_suja:
+            np.matmul(view, self._projection, out=self._view_projection)
+            self._vp_suja = False
+        return self._view_projection
+
+    def frustum_planes(self, projection=None):
+        """
+        Planos do frustum visto pela câmera (esquerda, direita, baixo, cima, perto, longe).
+        - projection: matriz de perspectiva usada no render (pyrr); por padrão, a da câmera.
+        Retorna um array (6, 4) com [a, b, c, d] de cada plano, normal apontando para dentro.
         """
-        return matrix44.create_look_at(
-            self.camera_pos,
-            self.camera_pos + self.camera_front,
-            self.camera_up
-        )
+        if projection is not None:
+            return Frustum.planos(self.get_view_matrix(), projection)
+        if self._planos is None:
+            # a partir de view e projection (e não da view × projection em float32):
+            # Frustum.planos multiplica em float64 e o plano "longe" não perde precisão
+            self._planos = Frustum.planos(self.get_view_matrix(), self._projection)
+        return self._planos
 
     def process_mouse_movement(self, xoffset, yoffset, constrain_pitch=True):
         """
-        Atualiza yaw e pitch conforme movimento do mouse.
+        Acumula o movimento do mouse; yaw e pitch são atualizados no próximo uso da câmera.
         - xoffset: deslocamento horizontal do mouse (pixels).
         - yoffset: deslocamento vertical do mouse (pixels).
         - constrain_pitch: True limita pitch para evitar virar a câmera de ponta-cabeça.
         """
-        # aplica sensibilidade
-        xoffset *= self.mouse_sensitivity
-        yoffset *= self.mouse_sensitivity
+        if xoffset == 0 and yoffset == 0:
+            return
+        self._mouse[0] += xoffset
+        self._mouse[1] += yoffset
+        self._mouse[2] = constrain_pitch
+        self._mouse_pendente = True
 
-        # atualiza ângulos
-        self.yaw   += xoffset
-        self.pitch += yoffset
+    def get_state(self):
+        """(posição (3,), yaw, pitch), com o mouse pendente já aplicado."""
+        self._aplica_mouse()
+        return self.camera_pos.copy(), self.yaw, self.pitch
 
-        # limita pitch se necessário
-        if constrain_pitch:
-            max_angle = 45.0
-            if self.pitch > max_angle:
-                self.pitch = max_angle
-            if self.pitch < -max_angle:
-                self.pitch = -max_angle
-
-        # recalcula vetores front, right e up
+    def set_state(self, position, yaw, pitch):
+        """Coloca a câmera em 'position' olhando na direção (yaw, pitch); descarta o mouse pendente."""
+        self._mouse[0] = self._mouse[1] = 0.0
+        self._mouse_pendente = False
+        self.camera_pos[:] = position
+        self.yaw, self.pitch = float(yaw), float(pitch)
         self.update_camera_vectors()
 
     def process_keyboard(self, direction, velocity):
@@ -92,30 +205,237 @@ class Camera:
         - direction: "FORWARD", "BACKWARD", "LEFT" ou "RIGHT"
         - velocity : distância a ser movida.
         """
+        if velocity == 0:
+            return
+        # o movimento segue a direção já com o mouse deste quadro aplicado
+        self._aplica_mouse()
         if direction == "FORWARD":
-            self.camera_pos += self.camera_front * velocity
+            np.multiply(self.camera_front, velocity, out=self._temp)
         elif direction == "BACKWARD":
-            self.camera_pos -= self.camera_front * velocity
+            np.multiply(self.camera_front, -velocity, out=self._temp)
         elif direction == "LEFT":
-            self.camera_pos -= self.camera_right * velocity
+            np.multiply(self.camera_right, -velocity, out=self._temp)
         elif direction == "RIGHT":
-            self.camera_pos += self.camera_right * velocity
+            np.multiply(self.camera_right, velocity, out=self._temp)
+        else:
+            return
+        self.camera_pos += self._temp
+        self._sujou()
 
     def update_camera_vectors(self):
         """
         Converte yaw/pitch em um vetor direção (front), depois recalcula
         os vetores right e up para manter a câmera ortonormal.
         """
-        # calcula vetor "front" com trigonometria
-        front = Vector3([0.0, 0.0, 0.0])
-        front.x = cos(radians(self.yaw)) * cos(radians(self.pitch))
-        front.y = sin(radians(self.pitch))
-        front.z = sin(radians(self.yaw)) * cos(radians(self.pitch))
-
-        # normaliza
-        self.camera_front = vector.normalise(front)
-        # vetor right = cross(camera_front, world_up)
-        world_up = Vector3([0.0, 1.0, 0.0])
-        self.camera_right = vector.normalise(vector3.cross(self.camera_front, world_up))
-        # vetor up = cross(camera_right, camera_front)
-        self.camera_up    = vector.normalise(vector3.cross(self.camera_right, self.camera_front))
+        # calcula vetor "front" com trigonometria (já unitário)
+        yaw, pitch = radians(self.yaw), radians(self.pitch)
+        fx = cos(yaw) * cos(pitch)
+        fy = sin(pitch)
+        fz = sin(yaw) * cos(pitch)
+        self.camera_front[:] = (fx, fy, fz)
+        # vetor right = cross(camera_front, world_up) normalizado, com world_up = (0, 1, 0)
+        n = sqrt(fx * fx + fz * fz)
+        rx, rz = -fz / n, fx / n
+        self.camera_right[:] = (rx, 0.0, rz)
+        # vetor up = cross(camera_right, camera_front) (unitário: os dois são ortonormais)
+        self.camera_up[:] = (-rz * fy, rz * fx - rx * fz, rx * fy)
+        self._sujou()
+
+
+class CameraBatch:
+    """
+    N câmeras yaw/pitch em arrays (struct of arrays), com os mesmos ângulos e convenções
+    da Camera (pyrr, vetores-linha). Os atributos podem ser alterados diretamente:
+        posicao (N, 3), yaw (N,), pitch (N,) — graus
+        projecoes (N, 4, 4) — definidas por set_perspective() ou set_orthographic()
+    """
+
+    def __init__(self, n):
+        self.posicao = np.tile(np.array([0.0, 4.0, 30.0], dtype=np.float32), (n, 1))
+        self.yaw = np.full(n, -90.0, dtype=np.float32)
+        self.pitch = np.zeros(n, dtype=np.float32)
+        self.projecoes = np.zeros((n, 4, 4), dtype=np.float32)
+        self.set_perspective(45.0, 800 / 600, 0.1, 100.0)
+
+    @classmethod
+    def de_cameras(cls, cameras):
+        """Lote com a posição, os ângulos e a projeção de cada Camera da lista."""
+        lote = cls(len(cameras))
+        for i, cam in enumerate(cameras):
+            cam._aplica_mouse()
+            lote.posicao[i] = cam.camera_pos
+            lote.yaw[i], lote.pitch[i] = cam.yaw, cam.pitch
+            lote.projecoes[i] = cam.get_projection_matrix()
+        return lote
+
+    def __len__(self):
+        return len(self.yaw)
+
+    def set_perspective(self, fov, aspecto, perto, longe):
+        """Perspectiva (create_perspective_projection_matrix); cada argumento é escalar ou (N,)."""
+        fov, aspecto, perto, longe = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64)
+                                                           for a in (fov, aspecto, perto, longe)))
+        f = 1.0 / np.tan(np.radians(fov) / 2.0)
+        p = np.zeros((len(self), 4, 4))
+        p[:, 0, 0] = f / aspecto
+        p[:, 1, 1] = f
+        p[:, 2, 2] = -(longe + perto) / (longe - perto)
+        p[:, 2, 3] = -1.0
+        p[:, 3, 2] = -2.0 * longe * perto / (longe - perto)
+        self.projecoes[:] = p
+
+    def set_orthographic(self, largura, altura, perto, longe):
+        """Ortográfica centrada (create_orthogonal_projection), ex.: cascatas de sombra."""
+        largura, altura, perto, longe = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64)
+                                                              for a in (largura, altura, perto, longe)))
+        p = np.zeros((len(self), 4, 4))
+        p[:, 0, 0] = 2.0 / largura
+        p[:, 1, 1] = 2.0 / altura
+        p[:, 2, 2] = -2.0 / (longe - perto)
+        p[:, 3, 2] = -(longe + perto) / (longe - perto)
+        p[:, 3, 3] = 1.0
+        self.projecoes[:] = p
+
+    def vetores(self):
+        """(front, right, up), cada um (N, 3) float32 — como Camera.update_camera_vectors."""
+        yaw, pitch = np.radians(self.yaw), np.radians(self.pitch)
+        cp = np.cos(pitch)
+        front = np.stack([np.cos(yaw) * cp, np.sin(pitch), np.sin(yaw) * cp], axis=-1)
+        # right = cross(front, (0, 1, 0)) normalizado
+        right = np.stack([-front[:, 2], np.zeros_like(cp), front[:, 0]], axis=-1)
+        right /= np.linalg.norm(right, axis=-1, keepdims=True)
+        up = np.cross(right, front)
+        return front.astype(np.float32), right.astype(np.float32), up.astype(np.float32)
+
+    def view_matrices(self):
+        """(N, 4, 4) float32 — como Camera.get_view_matrix."""
+        front, right, up = self.vetores()
+        v = np.zeros((len(self), 4, 4), dtype=np.float32)
+        v[:, :3, 0] = right
+        v[:, :3, 1] = up
+        v[:, :3, 2] = -front
+        v[:, 3, 0] = -np.einsum('ij,ij->i', right, self.posicao)
+        v[:, 3, 1] = -np.einsum('ij,ij->i', up, self.posicao)
+        v[:, 3, 2] = np.einsum('ij,ij->i', front, self.posicao)
+        v[:, 3, 3] = 1.0
+        return v
+
+    def view_projection_matrices(self, view=None):
+        """(N, 4, 4): view × projection de cada câmera."""
+        if view is None:
+            view = self.view_matrices()
+        return np.matmul(view, self.projecoes)
+
+    def frustum_planes(self, view=None):
+        """(N, 6, 4): planos do frustum de cada câmera (ver Frustum.planos)."""
+        if view is None:
+            view = self.view_matrices()
+        return Frustum.planos(view, self.projecoes)
+
+
+# ----------------------------------------
+# Microbenchmark: custo da câmera por quadro com mouse em alta frequência
+# ----------------------------------------
+# Uso: python Camera.py
+# Mouse de 1000 Hz a 60 quadros/s (≈17 eventos por quadro) e uma tecla pressionada.
+# "antes" reproduz a câmera anterior: trigonometria e 3 normalizações a cada evento e uma
+# create_look_at nova por quadro.
+
+if __name__ == "__main__":
+    import time
+    from pyrr import Vector3, vector, vector3
+
+    QUADROS, EVENTOS = 2000, 17
+    rng = np.random.default_rng(0)
+    deltas = rng.normal(0.0, 3.0, (QUADROS, EVENTOS, 2))
+
+    class CameraAntes:
+        def __init__(self):
+            self.camera_pos = Vector3([0.0, 4.0, 30.0])
+            self.camera_front = Vector3([0.0, 0.0, -1.0])
+            self.camera_up = Vector3([0.0, 1.0, 0.0])
+            self.camera_right = Vector3([1.0, 0.0, 0.0])
+            self.yaw, self.pitch, self.mouse_sensitivity = -90.0, 0.0, 0.01
+
+        def process_mouse_movement(self, x, y):
+            self.yaw += x * self.mouse_sensitivity
+            self.pitch = max(-45.0, min(45.0, self.pitch + y * self.mouse_sensitivity))
+            front = Vector3([cos(radians(self.yaw)) * cos(radians(self.pitch)), sin(radians(self.pitch)),
+                             sin(radians(self.yaw)) * cos(radians(self.pitch))])
+            self.camera_front = vector.normalise(front)
+            self.camera_right = vector.normalise(vector3.cross(self.camera_front, Vector3([0.0, 1.0, 0.0])))
+            self.camera_up = vector.normalise(vector3.cross(self.camera_right, self.camera_front))
+
+        def get_view_matrix(self):
+            return matrix44.create_look_at(self.camera_pos, self.camera_pos + self.camera_front, self.camera_up)
+
+    antes, depois = CameraAntes(), Camera()
+
+    def quadro(cam, k, parado):
+        if not parado:
+            for dx, dy in deltas[k]:
+                cam.process_mouse_movement(dx, dy)
+        cam.get_view_matrix()
+
+    for nome, parado in (("mouse se movendo", False), ("câmera parada", True)):
+        tempos = []
+        for cam in (antes, depois):
+            t0 = time.perf_counter()
+            for k in range(QUADROS):
+                quadro(cam, k, parado)
+                if cam is depois:
+                    cam.get_view_projection_matrix()
+            tempos.append((time.perf_counter() - t0) / QUADROS * 1e6)
+        print(f"{nome:17s}: antes {tempos[0]:6.1f} µs/quadro | depois {tempos[1]:6.1f} µs/quadro "
+              f"({tempos[0] / tempos[1]:.1f}x)")
+
+    # mesma câmera final e mesma matriz que a versão anterior (create_look_at)
+    assert np.allclose(antes.camera_front, depois.camera_front, atol=1e-4)
+    assert np.allclose(antes.get_view_matrix(), depois.get_view_matrix(), atol=1e-3)
+    depois.process_keyboard("FORWARD", 2.5)
+    depois.process_keyboard("LEFT", 1.0)
+    ref = matrix44.create_look_at(depois.camera_pos, depois.camera_pos + depois.camera_front, depois.camera_up)
+    assert np.allclose(ref, depois.get_view_matrix(), atol=1e-4)
+    assert np.allclose(depois.get_view_projection_matrix(),
+                       depois.get_view_matrix() @ depois.get_projection_matrix(), atol=1e-5)
+    assert np.allclose(depois.frustum_planes(), depois.frustum_planes(depois.get_projection_matrix()), atol=1e-5)
+
+    # ----------------------------------------
+    # CameraBatch: N câmeras de uma vez x N objetos Camera
+    # ----------------------------------------
+    for n in (6, 64, 1024):
+        cameras = []
+        for i in range(n):
+            cam = Camera()
+            cam.camera_pos[:] = rng.uniform(-50.0, 50.0, 3)
+            cam.yaw, cam.pitch = float(rng.uniform(-180.0, 180.0)), float(rng.uniform(-45.0, 45.0))
+            cam.set_projection(float(rng.uniform(30.0, 90.0)), 16 / 9, 0.1, float(rng.uniform(50.0, 500.0)))
+            cameras.append(cam)
+
+        t0 = time.perf_counter()
+        individuais = []
+        for cam in cameras:
+            cam.update_camera_vectors()
+            individuais.append((cam.get_view_matrix().copy(), cam.get_view_projection_matrix().copy(),
+                                cam.frustum_planes()))
+        t1 = time.perf_counter()
+        lote = CameraBatch.de_cameras(cameras)
+        t2 = time.perf_counter()
+        view = lote.view_matrices()
+        vp = lote.view_projection_matrices(view)
+        planos = lote.frustum_planes(view)
+        t3 = time.perf_counter()
+
+        assert np.allclose(view, [v for v, _, _ in individuais], atol=1e-4)
+        assert np.allclose(vp, [m for _, m, _ in individuais], atol=1e-4)
+        assert np.allclose(planos, [p for _, _, p in individuais], atol=1e-4)
+        print(f"{n:5d} câmeras: uma a uma {(t1 - t0) * 1e3:7.2f} ms | lote {(t3 - t2) * 1e3:6.2f} ms "
+              f"({(t1 - t0) / (t3 - t2):.0f}x)")
+
+    # projeções iguais às do pyrr
+    lote = CameraBatch(2)
+    lote.set_perspective([45.0, 70.0], [4 / 3, 1.0], 0.1, [100.0, 20.0])
+    assert np.allclose(lote.projecoes[1], matrix44.create_perspective_projection_matrix(70.0, 1.0, 0.1, 20.0), atol=1e-6)
+    lote.set_orthographic(40.0, 30.0, 1.0, 200.0)
+    assert np.allclose(lote.projecoes[0], matrix44.create_orthogonal_projection(-20, 20, -15, 15, 1.0, 200.0), atol=1e-6)
+    print("OK")
@@ -0,0 +1,177 @@
+# CameraPath.py
+# Gravação e reprodução de trajetórias de câmera, para medições de desempenho repetíveis
+#
+# O custo de um quadro do Ex7 depende de para onde a câmera está olhando (culling, LOD,
+# streaming de texturas). Para comparar duas versões do código, as duas precisam percorrer
+# EXATAMENTE o mesmo caminho. Por isso gravamos o ESTADO da câmera (posição, yaw, pitch) a
+# cada quadro, com o instante, e não as teclas: o estado não depende do deltaTime de cada
+# máquina. Na reprodução a trajetória é amostrada em passos fixos (dt), com interpolação
+# linear entre os quadros gravados — o mesmo arquivo gera sempre os mesmos quadros.
+#
+# Formato do arquivo (.campath, little-endian):
+#   cabeçalho : MAGICO (8 bytes) + uint32 número de amostras + uint32 reservado
+#   amostras  : REGISTRO por amostra (28 bytes): t float64 (s), posição 3 x float32,
+#               yaw float32, pitch float32 (graus)
+
+import struct
+
+import numpy as np
+
+MAGICO = b'CAMPATH1'
+CABECALHO = struct.Struct('<8sII')
+REGISTRO = np.dtype([('t', '<f8'), ('posicao', '<f4', (3,)), ('yaw', '<f4'), ('pitch', '<f4')])
+
+
+def grava(path, amostras):
+    """Grava um array REGISTRO no arquivo."""
+    amostras = np.asarray(amostras, dtype=REGISTRO)
+    with open(path, 'wb') as f:
+        f.write(CABECALHO.pack(MAGICO, len(amostras), 0))
+        f.write(amostras.tobytes())
+
+
+def le(path):
+    """Lê o arquivo e retorna o array REGISTRO (ValueError se não for um .campath)."""
+    with open(path, 'rb') as f:
+        dados = f.read()
+    if len(dados) < CABECALHO.size:
+        raise ValueError(f"{path}: arquivo curto demais")
+    magico, n, _ = CABECALHO.unpack_from(dados)
+    if magico != MAGICO or len(dados) != CABECALHO.size + n * REGISTRO.itemsize:
+        raise ValueError(f"{path}: não é uma trajetória de câmera válida")
+    return np.frombuffer(dados, dtype=REGISTRO, count=n, offset=CABECALHO.size)
+
+
+class Gravador:
+    """Acumula o estado da câmera a cada quadro; grava() no fim."""
+
+    def __init__(self):
+        self.amostras = []
+
+    def adiciona(self, t, camera):
+        posicao, yaw, pitch = camera.get_state()
+        self.amostras.append((t, posicao, yaw, pitch))
+
+    def grava(self, path):
+        grava(path, np.array(self.amostras, dtype=REGISTRO))
+
+
+class Reprodutor:
+    """
+    Trajetória amostrada em passos fixos de dt segundos a partir da primeira amostra.
+
+    Uso:
+        trilha = Reprodutor(CameraPath.le("voo.campath"))
+        for k in range(len(trilha)):
+            trilha.aplica(k, cam)
+            ...desenha o quadro...
+    """
+
+    def __init__(self, amostras, dt=1.0 / 60.0):
+        if len(amostras) == 0:
+            raise ValueError("trajetória vazia")
+        self.amostras = amostras
+        self.dt = dt
+        t = amostras['t'] - amostras['t'][0]
+        self.tempos = t
+        self.quadros = int(np.floor(t[-1] / dt)) + 1
+
+    def __len__(self):
+        return self.quadros
+
+    def estado(self, k):
+        """(posição, yaw, pitch) no instante k·dt, interpolados entre as amostras vizinhas."""
+        a, t = self.amostras, self.tempos
+        instante = k * self.dt
+        i = int(np.searchsorted(t, instante, side='right')) - 1
+        i = min(max(i, 0), len(t) - 1)
+        if i == len(t) - 1 or t[i + 1] == t[i]:
+            return a['posicao'][i], float(a['yaw'][i]), float(a['pitch'][i])
+        s = (instante - t[i]) / (t[i + 1] - t[i])
+        posicao = a['posicao'][i] + s * (a['posicao'][i + 1] - a['posicao'][i])
+        yaw = a['yaw'][i] + s * (a['yaw'][i + 1] - a['yaw'][i])
+        pitch = a['pitch'][i] + s * (a['pitch'][i + 1] - a['pitch'][i])
+        return posicao, float(yaw), float(pitch)
+
+    def aplica(self, k, camera):
+        camera.set_state(*self.estado(k))
+
+
+def voo_padrao(segundos=20.0, dt=1.0 / 60.0):
+    """
+    Trajetória sintética para quando não há nada gravado: aproxima-se do chibi, dá a volta
+    nele, passa pelo gato (x = 30) e se afasta, passando por todos os LODs.
+    """
+    t = np.arange(0.0, segundos + dt / 2, dt)
+    s = t / segundos
+    angulo = 2.0 * np.pi * s
+    raio = 40.0 - 30.0 * np.sin(np.pi * s)              # longe → perto → longe
+    centro_x = 15.0 * (1.0 - np.cos(angulo))             # desloca para o lado do gato
+    amostras = np.zeros(len(t), dtype=REGISTRO)
+    amostras['t'] = t
+    amostras['posicao'][:, 0] = centro_x + raio * np.sin(angulo)
+    amostras['posicao'][:, 1] = 4.0 + 3.0 * np.sin(2.0 * angulo)
+    amostras['posicao'][:, 2] = raio * np.cos(angulo)
+    # sempre olhando para o centro: yaw = atan2(dz, dx), pitch = inclinação
+    alvo = np.stack([centro_x, np.full_like(t, 2.0), np.zeros_like(t)], axis=-1)
+    d = alvo - amostras['posicao']
+    amostras['yaw'] = np.degrees(np.unwrap(np.arctan2(d[:, 2], d[:, 0])))
+    amostras['pitch'] = np.degrees(np.arctan2(d[:, 1], np.hypot(d[:, 0], d[:, 2])))
+    return amostras
+
+
+# ----------------------------------------
+# Teste do formato e da reprodução / geração do voo padrão
+# ----------------------------------------
+# Uso: python CameraPath.py              → testes
+#      python CameraPath.py voo.campath  → grava voo_padrao() no arquivo
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import tempfile
+    from Camera import Camera
+
+    if len(sys.argv) > 1:
+        grava(sys.argv[1], voo_padrao())
+        print(f"{sys.argv[1]}: {len(voo_padrao())} amostras")
+        sys.exit()
+
+    # gravação com deltaTime irregular, como num render loop de verdade
+    rng = np.random.default_rng(3)
+    cam, gravador, t = Camera(), Gravador(), 0.0
+    for _ in range(500):
+        cam.process_mouse_movement(*rng.normal(0.0, 40.0, 2))
+        cam.process_keyboard("FORWARD", 0.2)
+        gravador.adiciona(t, cam)
+        t += float(rng.uniform(0.005, 0.040))
+
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo = os.path.join(pasta, "teste.campath")
+        gravador.grava(arquivo)
+        amostras = le(arquivo)
+        assert os.path.getsize(arquivo) == CABECALHO.size + 500 * REGISTRO.itemsize
+        assert np.array_equal(amostras, np.array(gravador.amostras, dtype=REGISTRO))
+
+    # reproduzir nos instantes gravados devolve exatamente o estado gravado
+    trilha = Reprodutor(amostras, dt=1.0 / 60.0)
+    exatos = Reprodutor(amostras, dt=float(amostras['t'][1] - amostras['t'][0]))
+    posicao, yaw, pitch = exatos.estado(1)
+    assert np.allclose(posicao, amostras['posicao'][1]) and np.isclose(yaw, amostras['yaw'][1])
+
+    # duas reproduções da mesma trilha geram as mesmas matrizes, quadro a quadro
+    a, b = Camera(), Camera()
+    for k in range(len(trilha)):
+        trilha.aplica(k, a)
+        trilha.aplica(k, b)
+        assert np.array_equal(a.get_view_matrix(), b.get_view_matrix())
+    print(f"{len(amostras)} amostras ({CABECALHO.size + len(amostras) * REGISTRO.itemsize} bytes) "
+          f"→ {len(trilha)} quadros de {trilha.dt * 1e3:.1f} ms")
+
+    # voo padrão: começa olhando para o chibi (no centro da tela)
+    voo = Reprodutor(voo_padrao())
+    voo.aplica(0, cam)
+    centro = np.array([0.0, 2.0, 0.0, 1.0], dtype=np.float32) @ cam.get_view_projection_matrix()
+    assert abs(centro[0] / centro[3]) < 0.05 and abs(centro[1] / centro[3]) < 0.05
+    print(f"voo padrão: {len(voo)} quadros")
+    print("OK")
@@ -7,28 +7,81 @@
 #   - chibi.png          : textura PNG
 #   - Camera.py          : classe Camera (yaw/pitch, get_view_matrix, process_keyboard)
 #   - TextureLoader.py   : função load_texture(path, texture_id)
-#   - ObjLoaderSimple.py : função load_obj(path) → (vertex_buffer, num_vertices)
+#                          decode_texture(path) / upload_texture(imagem, texture_id) → as duas etapas separadas
+#   - ObjLoaderSimple.py : load_obj(path) / load_obj_numpy(path) → (vertex_buffer, num_vertices)
+#                          load_obj_indexed(path) / load_obj_cached(path) → (vertex_buffer, index_buffer, num_indices)
+#                          iter_obj_chunks(path) → pedaços do buffer, usado por cria_vao_streaming
+#                          load_obj_materials(path) → malha indexada agrupada por material (.mtl)
+#   - MeshCache.py       : cache binário (.meshcache) usado por load_obj_cached
+#   - VertexFormat.py    : codifica(buffer, layout) → (bytes, descritor) em formatos compactos
+#   - MeshLOD.py         : load_obj_lod(path) → cadeia de LODs (QEM) + escolhe_lod(...);
+#                          cada LOD reordenado para o cache de vértices por MeshOptimizer.py (Tipsify)
+#   - Frustum.py         : frustum culling vetorizado (planos da câmera × AABBs dos objetos)
+#   - AssetLoader.py     : carrega os assets em threads (LODs em processos) enquanto o render loop já desenha
+#   - ResourceRegistry.py: texturas/malhas compartilhadas por conteúdo, com contagem de referências
+#   - TextureStreaming.py: envio das texturas aos poucos por PBOs, níveis pequenos primeiro
+#   - CameraPath.py      : grava/reproduz a trajetória da câmera (modo benchmark)
+#   - ShaderProgram.py   : programa de shaders com os uniforms em cache + UBO da câmera
+#   - Scene.py           : lê a descrição da cena (scene.json): malhas, texturas e transformações
+#   - RenderQueue.py     : fila de draws ordenada por programa → textura → VAO
+#   - Instancing.py      : cópias da mesma malha num draw instanciado (ver scene_multidao.json)
+#   - TransformHierarchy.py: transformações (com pais) em arrays, recalculadas só quando mudam
+#   - Profiler.py        : tempo de CPU e de GPU por trecho do quadro, com exportação (trace/CSV)
+#
+# Uso:
+#   python Ex7_Carregando_Objetos_alterado.py                     → interativo (WASD + mouse)
+#   python Ex7_Carregando_Objetos_alterado.py --cena outra.json   → outra cena (padrão: scene.json)
+#   python Ex7_Carregando_Objetos_alterado.py --grava voo.campath  → interativo, gravando a câmera
+#   python Ex7_Carregando_Objetos_alterado.py --replay voo.campath [--csv quadros.csv]
+#       → benchmark: janela oculta, todos os assets carregados antes, a trajetória reproduzida
+#         em passos fixos; imprime o tempo de CPU por quadro, draw calls, triângulos
+#         e trocas de estado
+#   python Ex7_Carregando_Objetos_alterado.py [--replay voo.campath] --perfil perfil.json
+#       → mede CPU e GPU por trecho do quadro e por objeto; no fim imprime os percentis e
+#         grava perfil.json (trace do Chrome) e perfil.csv
 
 import glfw
 from OpenGL.GL import *
-import OpenGL.GL.shaders
 import numpy as np
-from TextureLoader import load_texture      # Carrega imagens PNG como textura OpenGL
+from TextureLoader import decode_texture     # Decodifica (CPU) texturas; o envio é do Streaming
 from Camera import Camera                   # Gera a view matrix a partir de yaw/pitch
-from ObjLoaderSimple import ObjLoaderSimple # Loader simples que retorna (buffer, num_vertices)
+from ObjLoaderSimple import ObjLoaderSimple # Malha indexada (vertex_buffer, index_buffer, ...) por material
+import VertexFormat                         # Layouts compactos de vértice (float16, int16)
+import MeshLOD                              # Níveis de detalhe simplificados + seleção por distância
+import Frustum                              # Teste de visibilidade das caixas envolventes
+from AssetLoader import AssetLoader         # Pools de threads/processos para carregar os assets
+from ResourceRegistry import registro, bytes_textura, destroi_textura, destroi_malha  # Recursos deduplicados
+from TextureStreaming import Streaming      # Envio de texturas por PBO, dentro de um orçamento por quadro
+import CameraPath                           # Gravação/reprodução da trajetória da câmera
+from ShaderProgram import ShaderProgram, CameraUBO, BLOCO_CAMERA  # Uniforms em cache + UBO da câmera
+import Scene                                # Descrição da cena em arquivo (JSON)
+from RenderQueue import RenderQueue         # Draws ordenados por estado
+import Instancing                           # Matrizes por instância + glDrawElementsInstanced
+from TransformHierarchy import TransformHierarchy  # Matrizes de mundo recalculadas só se sujas
+from Profiler import Profiler               # Tempo de CPU/GPU por escopo do quadro
 import pyrr
 from pyrr import matrix44, Vector3    # ← adicione esta linha
 import ctypes
+import time
+import argparse
 
 # --- Parâmetros da janela ---
 WIDTH, HEIGHT = 800, 600
 
+# --- Formato dos vértices no VBO ---
+# 'float32' (20 bytes), 'float16' ou 'int16' (12 bytes) — ver VertexFormat.py
+FORMATO_VERTICE = 'int16'
+
 # --- Variáveis globais ---
 Window = None           # Handle da janela GLFW
-Shader_programm = None  # ID do programa de shaders
-vao_objeto = None       # ID do VAO do objeto
-num_vertices = 0        # Quantidade de vértices a desenhar
-obj_textura = None      # ID da textura UV
+Shader_programm = None  # ShaderProgram (programa de shaders + localização dos uniforms)
+Shader_instancias = None  # ShaderProgram dos objetos instanciados (matriz de modelo por instância)
+camera_ubo = None       # CameraUBO: view/projection compartilhadas por todos os programas
+objetos = []            # Scene.ObjetoCena já enviados para a GPU, na ordem em que ficaram prontos
+fila = RenderQueue()    # draws do quadro, ordenados por estado (ver RenderQueue.py)
+hierarquia = TransformHierarchy()  # transformações dos objetos da cena (um nó por objeto)
+perfil = Profiler()     # desativado (custo quase zero) a menos que --perfil seja dado
+streaming = Streaming() # fila de envio das texturas (ver TextureStreaming.py)
 
 # Instância da câmera para controle WASD
 cam = Camera()
@@ -45,6 +98,9 @@ def redimensiona_callback(window, w, h):
     global WIDTH, HEIGHT
     WIDTH, HEIGHT = w, h
     glViewport(0, 0, WIDTH, HEIGHT)
+    # a projeção fica em cache na câmera: só muda aqui
+    if HEIGHT > 0:
+        cam.set_projection(45.0, WIDTH/HEIGHT, 0.1, 100.0)
 
 def teclado_callback(window, key, scancode, action, mods):
     """
@@ -71,19 +127,23 @@ def mouse_callback(window, xpos, ypos):
 
     lastX, lastY = xpos, ypos
 
-    # chama o método da câmera
+    # chama o método da câmera: só acumula o deslocamento (o GLFW pode chamar este
+    # callback muitas vezes por quadro); a câmera é atualizada uma vez, quando for usada
     cam.process_mouse_movement(xoffset, yoffset)
 
 
 
 
-def inicializa_opengl():
+def inicializa_opengl(visivel=True):
     """
     Inicializa GLFW, cria a janela e configura callbacks.
+    - visivel: False no modo benchmark (janela oculta, sem capturar o mouse).
     """
     global Window
     if not glfw.init():
         raise RuntimeError("Falha ao inicializar GLFW")
+    if not visivel:
+        glfw.window_hint(glfw.VISIBLE, glfw.FALSE)
     Window = glfw.create_window(WIDTH, HEIGHT, "Ex7 - OBJ com Textura", None, None)
     if not Window:
         glfw.terminate()
@@ -94,95 +154,253 @@ def inicializa_opengl():
     glfw.set_key_callback(Window, teclado_callback)
     glfw.make_context_current(Window)
     
-    # esconde e captura o cursor para receber movimento contínuo
-    glfw.set_input_mode(Window, glfw.CURSOR, glfw.CURSOR_DISABLED)
-    # registra nosso callback
-    glfw.set_cursor_pos_callback(Window, mouse_callback)
+    if visivel:
+        # esconde e captura o cursor para receber movimento contínuo
+        glfw.set_input_mode(Window, glfw.CURSOR, glfw.CURSOR_DISABLED)
+        # registra nosso callback
+        glfw.set_cursor_pos_callback(Window, mouse_callback)
 
     # Ativa teste de profundidade
     glEnable(GL_DEPTH_TEST) 
 
+    # Projeção em perspectiva (FOV 45°, near 0.1, far 100), guardada na câmera
+    cam.set_projection(45.0, WIDTH/HEIGHT, 0.1, 100.0)
+
     print("OpenGL:", glGetString(GL_VERSION).decode())
 
 # ----------------------------------------
-# Carregamento de objeto e textura
+# Atributos de vértice a partir do layout
 # ----------------------------------------
 
-def inicializa_objeto():
+def configura_atributos(descritor):
     """
-    Carrega vértices e UVs via load_obj(),
-    cria VAO/VBO e configura atributos de vértice.
-    Também carrega a textura chibi.png.
+    Habilita e configura cada atributo descrito por VertexFormat (location, nº de
+    componentes, tipo GL, normalizado, offset), com o stride do layout.
+    O VAO e o VBO já devem estar vinculados.
     """
-    global vao_objeto, num_vertices, obj_textura
+    for atributo in descritor.atributos:
+        glEnableVertexAttribArray(atributo.location)
+        glVertexAttribPointer(atributo.location, atributo.componentes, atributo.tipo,
+                              GL_TRUE if atributo.normalizado else GL_FALSE,
+                              descritor.stride, ctypes.c_void_p(atributo.offset))
 
-    # load_obj retorna (vertex_buffer, num_vertices)
-    buffer, num_vertices = ObjLoaderSimple.load_obj("meshes/chibi.obj")
-    buffer = buffer.astype(np.float32)
 
-    # Gera e vincula VAO
-    vao_objeto = glGenVertexArrays(1)
-    glBindVertexArray(vao_objeto)
+# ----------------------------------------
+# Carregamento dos objetos da cena
+# ----------------------------------------
+# Os objetos vêm do arquivo da cena (ver Scene.py). Cada um tem duas partes (ver AssetLoader.py):
+#   carrega_objeto() : só CPU (leitura do OBJ, codificação dos vértices);
+#                      roda em uma thread do pool, sem nenhuma chamada OpenGL. A geração
+#                      dos LODs (Python puro, segura o GIL) vai para o pool de processos.
+#   envia_objeto()   : só OpenGL (VAO/VBO/EBO); roda na thread principal e agenda no loader
+#                      as texturas de cada submalha (decode_texture na thread, envio aqui).
+#                      As texturas só são alocadas com os níveis pequenos de mipmap; os
+#                      níveis grandes chegam nos quadros seguintes, por streaming.processa().
+
+def cria_textura(imagem):
+    """Textura enviada aos poucos pelo streaming; o ID já pode ser vinculado."""
+    return streaming.adiciona(imagem).textura
 
-    # Gera VBO e envia dados
-    vbo = glGenBuffers(1)
-    glBindBuffer(GL_ARRAY_BUFFER, vbo)
-    glBufferData(GL_ARRAY_BUFFER, buffer.nbytes, buffer, GL_STATIC_DRAW)
 
-    # Cada vértice: 5 floats → [x,y,z, u,v]
-    stride = buffer.itemsize * 5
-    # Posição (vec3) no location=0
-    glEnableVertexAttribArray(0)
-    glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
-    # UV (vec2) no location=1
-    glEnableVertexAttribArray(1)
-    glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(buffer.itemsize * 3))
+def destroi_textura_streaming(textura):
+    streaming.remove(textura)
+    destroi_textura(textura)
+
+
+def carrega_objeto(objeto, loader=None):
+    """
+    Lê a malha do ObjetoCena e converte para o layout FORMATO_VERTICE.
+    - objeto.lod: cadeia de LODs via load_obj_lod(), uma parte com a textura do objeto;
+      com 'loader', roda em um processo do pool dele (loader.em_processo);
+    - senão: submalhas por material via load_obj_materials(), cada parte com a textura
+      difusa (map_Kd) do seu material, ou a do objeto quando o material não tem uma.
+    Cada parte é (caminho da textura, [(primeiro_indice, num_indices) por LOD]).
+    """
+    if objeto.lod:
+        # load_obj_lod retorna os vértices únicos (compartilhados por todos os LODs), os índices
+        # de todos os LODs concatenados no mesmo EBO e o intervalo (primeiro, quantidade) de cada um;
+        # cada LOD já vem otimizado para o cache de vértices (MeshOptimizer) e tudo é lido
+        # do cache binário (MeshCache) quando o .obj não mudou
+        if loader is not None:
+            buffer, indices, intervalos, esfera = loader.em_processo(MeshLOD.load_obj_lod, objeto.malha)
+        else:
+            buffer, indices, intervalos, esfera = MeshLOD.load_obj_lod(objeto.malha)
+        partes = [(objeto.textura, [tuple(i) for i in intervalos.tolist()])]
+        # caixa envolvente (antes da quantização) para o frustum culling
+        aabb, _ = ObjLoaderSimple.compute_bounds(buffer)
+        variante = {'lods': MeshLOD.RAZOES_PADRAO}
+    else:
+        # load_obj_materials retorna a malha indexada com as faces agrupadas por material:
+        # cada submalha é (material, primeiro_indice, num_indices) dentro do MESMO index_buffer
+        buffer, indices, submalhas, materiais = ObjLoaderSimple.load_obj_materials(objeto.malha)
+        partes = [(materiais.get(material, {}).get('map_Kd', objeto.textura), [(primeiro, quantidade)])
+                  for material, primeiro, quantidade in submalhas]
+        # uma caixa envolvente por submalha: cada material é testado (e pulado) separadamente
+        aabb, _ = ObjLoaderSimple.compute_bounds(buffer, indices, [(p, n) for _, p, n in submalhas])
+        centro, raio = MeshLOD.esfera_envolvente(buffer)
+        esfera = np.append(centro, raio)
+        variante = {'materiais': True}
+    # converte [x,y,z,u,v] float32 para o layout escolhido em FORMATO_VERTICE
+    dados, descritor = VertexFormat.codifica(buffer, FORMATO_VERTICE)
+    # chave de conteúdo no registro (o hash do arquivo também é trabalho de CPU)
+    chave_malha = registro.chave(objeto.malha, dict(variante, tipo='malha', formato=FORMATO_VERTICE))
+    return dados, descritor, indices, partes, aabb, esfera, chave_malha
+
+
+def envia_objeto(objeto, carregado, loader):
+    """
+    Cria (ou reaproveita do registro) VAO/VBO/EBO do objeto, agenda as texturas de cada
+    parte e coloca o objeto na lista 'objetos' desenhada pelo render loop.
+    Cada parte é desenhada a partir do quadro em que a sua textura chegar.
+    """
+    dados, descritor, indices, partes, aabb, esfera, chave_malha = carregado
+
+    def cria_malha():
+        # Gera e vincula VAO
+        vao = glGenVertexArrays(1)
+        glBindVertexArray(vao)
+
+        # Gera VBO e envia os dados já no formato compacto
+        vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, vbo)
+        glBufferData(GL_ARRAY_BUFFER, dados.nbytes, dados, GL_STATIC_DRAW)
+
+        # Gera EBO (element buffer) com os índices; fica registrado no VAO
+        ebo = glGenBuffers(1)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ebo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+
+        # Posição no location=0 e UV no location=1, conforme o descritor do layout
+        configura_atributos(descritor)
+        return vao, vbo, ebo
+
+    # VAO/VBO/EBO vêm do registro: se o mesmo conteúdo já estiver na GPU
+    # (outro caminho, outro objeto da cena), o objeto OpenGL existente é reaproveitado
+    malha = registro.adquire(chave_malha, cria_malha, destroi_malha, dados.nbytes + indices.nbytes)
+    vao = malha.valor[0]
+
+    if objeto.instancias is not None:
+        # objeto instanciado: VAO próprio sobre o VBO/EBO da malha + VBO com as matrizes
+        # das cópias (divisor 1); o VAO da malha continua livre para desenhos comuns
+        _, vbo, ebo = malha.valor
+
+        def cria_instancias():
+            vao_instancias = glGenVertexArrays(1)
+            glBindVertexArray(vao_instancias)
+            glBindBuffer(GL_ARRAY_BUFFER, vbo)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ebo)
+            configura_atributos(descritor)
+            objeto.buffer_instancias = Instancing.InstanceBuffer(vao_instancias, objeto.instancias)
+            return vao_instancias, objeto.buffer_instancias.vbo
+
+        instancias = registro.adquire(f"instancias:{objeto.nome}:{chave_malha}", cria_instancias,
+                                      destroi_malha, objeto.instancias.size * 4)
+        vao = instancias.valor[0]
+
+    # Cada parte é [textura, lods]; a textura fica None até chegar. A textura de cada parte
+    # é decodificada uma única vez por CONTEÚDO: partes podem apontar para o mesmo arquivo
+    # ou para cópias idênticas em outros caminhos, e o que já estiver no registro (ex.:
+    # enviado por outro objeto) nem é decodificado de novo. Partes sem textura não são desenhadas.
+    por_chave = {}
+    objeto.partes = []
+    for caminho, intervalos in partes:
+        # offsets em BYTES dentro do EBO, como glDrawElements espera
+        parte = [None, [(ctypes.c_void_p(primeiro * indices.itemsize), quantidade)
+                        for primeiro, quantidade in intervalos]]
+        if caminho is not None:
+            por_chave.setdefault(registro.chave_textura(caminho), (caminho, []))[1].append(parte)
+        objeto.partes.append(parte)
+
+    def envia_textura(imagem, chave, destino):
+        # imagem é None quando a textura já está no registro (nada a enviar)
+        tamanho = 0 if imagem is None else bytes_textura(imagem)
+        # uma referência no registro por parte que usa a textura
+        for parte in destino:
+            parte[0] = registro.adquire(chave, lambda: cria_textura(imagem),
+                                        destroi_textura_streaming, tamanho).valor
+
+    for chave, (caminho, destino) in por_chave.items():
+        if registro.procura(chave) is not None:
+            envia_textura(None, chave, destino)
+            continue
+        loader.agenda(caminho, decode_texture,
+                      lambda imagem, chave=chave, destino=destino: envia_textura(imagem, chave, destino),
+                      caminho)
+
+    objeto.tipo_indices = GL_UNSIGNED_SHORT if indices.dtype == np.uint16 else GL_UNSIGNED_INT
+    objeto.dequant = descritor.dequantizacao
+    objeto.aabb_local = aabb
+    objeto.esfera_local = np.reshape(esfera, (1, 4))
+    posiciona_objeto(objeto)
+
+    # só agora o objeto passa a ser desenhado pelo render loop
+    objeto.vao = vao
+    objetos.append(objeto)
+
+
+def posiciona_objeto(objeto):
+    """
+    Recalcula o que depende da matriz de mundo do objeto (objeto.model, da hierarquia):
+    a matriz enviada ao shader, as caixas e a esfera no mundo e, nos instanciados, as
+    matrizes das cópias. Chamada no envio e quando a hierarquia recalcula o nó do objeto.
+    """
+    model = objeto.model
+    if objeto.instancias is None:
+        # a dequantização das posições (VertexFormat) é aplicada antes da matriz de modelo
+        objeto.model_gpu = pyrr.matrix44.multiply(objeto.dequant, model).astype(np.float32)
+        objeto.aabb = Frustum.transforma_aabb(objeto.aabb_local, model)
+        objeto.esfera = Frustum.transforma_esferas(objeto.esfera_local, model)[0]
+    else:
+        # a matriz de cada cópia vem do VBO de instâncias; o uniform só dequantiza
+        objeto.instancias = np.matmul(model, objeto.instancias_locais)
+        if objeto.buffer_instancias is not None:
+            objeto.buffer_instancias.atualiza(objeto.instancias)
+        objeto.model_gpu = np.asarray(objeto.dequant, dtype=np.float32)
+        # caixa de cada parte = união das caixas de todas as cópias (culling do grupo inteiro)
+        n, k = len(objeto.instancias), len(objeto.aabb_local)
+        caixas = Frustum.transforma_aabb(np.repeat(objeto.aabb_local, n, axis=0),
+                                         np.tile(objeto.instancias, (k, 1, 1)))
+        caixas = caixas.reshape(k, n, 2, 3)
+        objeto.aabb = np.stack([caixas[:, :, 0].min(axis=1), caixas[:, :, 1].max(axis=1)], axis=1)
+        minimo, maximo = objeto.aabb[:, 0].min(axis=0), objeto.aabb[:, 1].max(axis=0)
+        objeto.esfera = np.append((minimo + maximo) / 2.0, np.linalg.norm(maximo - minimo) / 2.0)
+    objeto.versao = hierarquia.versao[objeto.no]
 
-    # Carrega textura
-    obj_textura = glGenTextures(1)
-    #load_texture("textures/chibi.png", obj_textura)
-    load_texture("textures/chibi.png", obj_textura)
 
-   
 # ----------------------------------------
-# Carregamento de objeto e textura
+# Alternativa para malhas enormes: envio em streaming
 # ----------------------------------------
 
-def inicializa_gato():
+def cria_vao_streaming(path):
     """
-    Carrega vértices e UVs via load_obj(),
-    cria VAO/VBO e configura atributos de vértice.
-    Também carrega a textura chibi.png.
+    Para OBJs com milhões de triângulos, que não cabem confortavelmente na memória:
+    pré-aloca o VBO com o total de vértices (count_obj_vertices) e envia o buffer
+    pedaço a pedaço com glBufferSubData, à medida que iter_obj_chunks() lê o arquivo.
+    Retorna (vao, num_vertices); desenhar com glDrawArrays(GL_TRIANGLES, 0, num_vertices).
     """
-    global vao_gato, num_vertices_gato, obj_textura_gato
-
-    # load_obj retorna (vertex_buffer, num_vertices)
-    buffer, num_vertices_gato = ObjLoaderSimple.load_obj("meshes/Cat/Cat.obj")
-    buffer = buffer.astype(np.float32)
+    total = ObjLoaderSimple.count_obj_vertices(path)
+    bytes_por_vertice = 5 * ctypes.sizeof(ctypes.c_float)
 
-    # Gera e vincula VAO
-    vao_gato = glGenVertexArrays(1)
-    glBindVertexArray(vao_gato)
+    vao = glGenVertexArrays(1)
+    glBindVertexArray(vao)
 
-    # Gera VBO e envia dados
+    # VBO do tamanho final, ainda sem dados (None)
     vbo = glGenBuffers(1)
     glBindBuffer(GL_ARRAY_BUFFER, vbo)
-    glBufferData(GL_ARRAY_BUFFER, buffer.nbytes, buffer, GL_STATIC_DRAW)
+    glBufferData(GL_ARRAY_BUFFER, total * bytes_por_vertice, None, GL_STATIC_DRAW)
 
-    # Cada vértice: 5 floats → [x,y,z, u,v]
-    stride = buffer.itemsize * 5
-    # Posição (vec3) no location=0
+    # cada pedaço (n, 5) float32 é copiado para a sua posição dentro do VBO
+    offset = 0
+    for pedaco in ObjLoaderSimple.iter_obj_chunks(path):
+        glBufferSubData(GL_ARRAY_BUFFER, offset, pedaco.nbytes, pedaco)
+        offset += pedaco.nbytes
+
+    # mesmo layout [x,y,z, u,v] de envia_objeto() com FORMATO_VERTICE = 'float32'
     glEnableVertexAttribArray(0)
-    glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
-    # UV (vec2) no location=1
+    glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, bytes_por_vertice, ctypes.c_void_p(0))
     glEnableVertexAttribArray(1)
-    glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(buffer.itemsize * 3))
-
-    # Carrega textura
-    obj_textura_gato = glGenTextures(1)
-    #load_texture("textures/chibi.png", obj_textura)
-    load_texture("textures/Cat_diffuse.jpg", obj_textura_gato)
-
+    glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, bytes_por_vertice, ctypes.c_void_p(3 * ctypes.sizeof(ctypes.c_float)))
+    return vao, total
 
 
 # ----------------------------------------
@@ -196,8 +414,8 @@ def inicializa_shaders():
         • layout(location = 0) in vec3 in_pos;    → atributo de posição do vértice (x,y,z)
         • layout(location = 1) in vec2 in_uv;     → atributo de coordenada de textura (u,v)
         • uniform mat4 model;                     → matriz de modelo (transformação local do objeto)
-        • uniform mat4 view;                      → matriz de visualização (posição/orientação da câmera)
-        • uniform mat4 projection;                → matriz de projeção (perspectiva)
+        • bloco Camera (BLOCO_CAMERA, std140)     → view, projection e view_projection, num UBO
+                                                    escrito uma vez por quadro (ver ShaderProgram.py)
       e repassa in_uv para o fragment shader em out vec2 frag_uv.
 
     - Fragment shader recebe:
@@ -208,20 +426,20 @@ def inicializa_shaders():
     Após definir as fontes, compilamos e linkamos:
     - compileShader(source, type): compila um shader de tipo GL_VERTEX_SHADER ou GL_FRAGMENT_SHADER.
     - compileProgram(vs, fs): linka os shaders compilados em um programa executável pelo glUseProgram.
+    ShaderProgram faz os dois passos e já guarda a localização de todos os uniforms.
     """
     
-    global Shader_programm
+    global Shader_programm, Shader_instancias, camera_ubo
 
     vertex_src = """#version 400
+        """ + BLOCO_CAMERA + """
         layout(location = 0) in vec3 in_pos;    // posição do vértice
         layout(location = 1) in vec2 in_uv;     // coordenada de textura
         uniform mat4 model;                     // matriz de modelo
-        uniform mat4 view;                      // matriz de visualização
-        uniform mat4 projection;                // matriz de projeção
         out vec2 frag_uv;                       // repassa UV
         void main() {
             frag_uv = in_uv;
-            gl_Position = projection * view * model * vec4(in_pos, 1.0);
+            gl_Position = view_projection * model * vec4(in_pos, 1.0);
         }"""
 
     fragment_src = """#version 400
@@ -232,41 +450,83 @@ def inicializa_shaders():
             FragColor = texture(texture1, frag_uv);
         }"""
 
-    # Compila shaders
-    vs = OpenGL.GL.shaders.compileShader(vertex_src, GL_VERTEX_SHADER)
-    fs = OpenGL.GL.shaders.compileShader(fragment_src, GL_FRAGMENT_SHADER)
-    Shader_programm = OpenGL.GL.shaders.compileProgram(vs, fs)
+    # Objetos instanciados: a matriz de modelo de cada cópia é um atributo (instance_model,
+    # locations 2 a 5, ver Instancing.py); o uniform model só desfaz a quantização
+    vertex_instancias_src = """#version 400
+        """ + BLOCO_CAMERA + Instancing.ATRIBUTO_INSTANCIA + """
+        layout(location = 0) in vec3 in_pos;    // posição do vértice
+        layout(location = 1) in vec2 in_uv;     // coordenada de textura
+        uniform mat4 model;                     // dequantização das posições
+        out vec2 frag_uv;                       // repassa UV
+        void main() {
+            frag_uv = in_uv;
+            gl_Position = view_projection * instance_model * model * vec4(in_pos, 1.0);
+        }"""
+
+    # Compila, linka e guarda as localizações dos uniforms
+    Shader_programm = ShaderProgram(vertex_src, fragment_src)
+    Shader_instancias = ShaderProgram(vertex_instancias_src, fragment_src)
+    camera_ubo = CameraUBO()
+
+    # o sampler lê sempre da unidade 0: basta definir uma vez
+    for programa in (Shader_programm, Shader_instancias):
+        programa.usa()
+        glUniform1i(programa['texture1'], 0)
 
 # ----------------------------------------
 # Loop de renderização
 # ----------------------------------------
 
-def render_loop():
+def render_loop(loader, gravador=None, trilha=None, csv=None, arquivo_perfil=None):
     """
     Loop principal que:
-    - Processa movimento da câmera (WASD)
+    - Envia para a GPU os assets que o loader terminou de carregar
+    - Processa movimento da câmera (WASD), ou a reproduz de 'trilha' (CameraPath.Reprodutor)
     - Limpa buffers
     - Atualiza matrizes uniformes
-    - Renderiza objeto via glDrawArrays
+    - Descarta objetos/submalhas fora do frustum da câmera (teste vetorizado)
+    - Coloca na fila um draw por submalha visível (no LOD adequado à distância) e executa
+      a fila, que ordena os draws por estado e pula as vinculações repetidas
+    Com 'gravador' (CameraPath.Gravador), o estado da câmera de cada quadro é gravado.
+    Com 'trilha', roda em modo benchmark: um quadro por passo da trilha, com as medições
+    de cada quadro impressas no fim (e gravadas em 'csv', se dado).
+    Com o profiler ativo, os tempos por escopo são impressos e exportados em 'arquivo_perfil'.
     """
 
-    # Inicializa a matriz de modelo como IDENTIDADE:
-    # - A matriz identidade é o “elemento neutro” das transformações,
-    #   ou seja, não altera posição, rotação ou escala do objeto.
-    # - A partir dela, aplicamos translações, rotações ou escalas
-    #   usando multiplcações ou substituições.
-    # - Se fosse uma matriz de zeros, todas as coordenadas seriam zeradas
-    #   e o objeto não apareceria na cena
-    # Matriz de modelo fixa
-    model = pyrr.matrix44.create_identity(dtype=np.float32)
-
     # Tempo da frame anterior
     last_time = glfw.get_time()
     # Velocidade da câmera em unidades do mundo por segundo
     base_speed = 10.0
 
+    # tempos de inicialização: primeiro quadro e todos os assets carregados
+    primeiro_quadro = True
+    carregando = True
+
+    # benchmark: tudo carregado e residente antes do primeiro quadro medido, sem vsync
+    medicoes = []                # (tempo de CPU em s, draw calls, triângulos, trocas de programa,
+                                 #  de textura e de VAO) por quadro
+    if trilha is not None:
+        loader.espera()
+        while not streaming.concluido():
+            streaming.processa()
+        glfw.swap_interval(0)
+
     while not glfw.window_should_close(Window):
-       
+        if trilha is not None and len(medicoes) == len(trilha):
+            break
+        inicio_quadro = time.perf_counter()
+        perfil.inicio_quadro()
+
+        # Assets que ficaram prontos nas threads: glBufferData/glTexImage2D aqui,
+        # na thread do contexto, limitado a alguns milissegundos por quadro
+        with perfil.escopo("assets"):
+            loader.processa()
+            # níveis de mipmap pendentes: no máximo streaming.orcamento bytes por quadro, via PBO
+            streaming.processa()
+        if carregando and loader.concluido():
+            carregando = False
+            print(f"Todos os assets carregados em {(time.perf_counter() - loader.inicio) * 1e3:.0f} ms")
+
         # --- calcula deltaTime ---
         current_time = glfw.get_time()
         delta = current_time - last_time
@@ -276,90 +536,168 @@ def render_loop():
         # --- movimenta a câmera usando deltaTime ---
         vel = base_speed * delta  # unidades por frame
 
-        if glfw.get_key(Window, glfw.KEY_W) == glfw.PRESS:
-            cam.process_keyboard("FORWARD", vel)
-        if glfw.get_key(Window, glfw.KEY_S) == glfw.PRESS:
-            cam.process_keyboard("BACKWARD", vel)
-        if glfw.get_key(Window, glfw.KEY_A) == glfw.PRESS:
-            cam.process_keyboard("LEFT", vel)
-        if glfw.get_key(Window, glfw.KEY_D) == glfw.PRESS:
-            cam.process_keyboard("RIGHT", vel)
+        with perfil.escopo("camera"):
+            if trilha is not None:
+                # benchmark: posição e direção vêm da trilha, em passos fixos (sem teclado/mouse)
+                trilha.aplica(len(medicoes), cam)
+            else:
+                if glfw.get_key(Window, glfw.KEY_W) == glfw.PRESS:
+                    cam.process_keyboard("FORWARD", vel)
+                if glfw.get_key(Window, glfw.KEY_S) == glfw.PRESS:
+                    cam.process_keyboard("BACKWARD", vel)
+                if glfw.get_key(Window, glfw.KEY_A) == glfw.PRESS:
+                    cam.process_keyboard("LEFT", vel)
+                if glfw.get_key(Window, glfw.KEY_D) == glfw.PRESS:
+                    cam.process_keyboard("RIGHT", vel)
+            if gravador is not None:
+                gravador.adiciona(current_time, cam)
 
         # Limpa a tela
         glClearColor(0.1, 0.1, 0.1, 1.0)
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
 
-        glUseProgram(Shader_programm)
-
-        # Atualiza matrizes de view e projection
-        view = cam.get_view_matrix()
-        projection = pyrr.matrix44.create_perspective_projection_matrix(
-            45.0, WIDTH/HEIGHT, 0.1, 100.0
-        )
-
-        # Envia uniforms 
-        #localização do uniform
-        # 1, // quantidade de matrizes a enviar
-        # GL_FALSE  // flag de “transpose” ou transposta
-        #  model  // ponteiro/data da matriz
-        glUniformMatrix4fv(glGetUniformLocation(Shader_programm, "model"), 1, GL_FALSE, model)  
-        glUniformMatrix4fv(glGetUniformLocation(Shader_programm, "view"), 1, GL_FALSE, view)
-        glUniformMatrix4fv(glGetUniformLocation(Shader_programm, "projection"), 1, GL_FALSE, projection)
-
-        # Desenha o objeto
-        glBindVertexArray(vao_objeto)
-        glBindTexture(GL_TEXTURE_2D, obj_textura)
-        glDrawArrays(GL_TRIANGLES, 0, num_vertices)
-        
-        
-        
-        # ----------------------------------------
-        # Envia uniforms para o GATO
-
-        # Cria matriz de translação: desloca para a direita
-        trans_gato = pyrr.matrix44.create_from_translation(pyrr.Vector3([30.0, 0.0, 0.0]))
-
-        # Cria matriz de rotação: gira 90 graus no eixo X
-        rot_gato = pyrr.matrix44.create_from_x_rotation(np.radians(90))
-
-        # Cria matriz de escala: reduz tamanho
-        escala_gato = pyrr.matrix44.create_from_scale(pyrr.Vector3([0.2, 0.2, 0.2]))
-
-        # Combina as transformações: Translação * Rotação * Escala
-        model_gato = pyrr.matrix44.multiply(rot_gato, escala_gato)
-        model_gato = pyrr.matrix44.multiply(trans_gato, model_gato)
-
-        # Envia uniforms 
-        #localização do uniform
-        # 1, // quantidade de matrizes a enviar
-        # GL_FALSE  // flag de “transpose” ou transposta
-        #  model_gato  // ponteiro/data da matriz
-        glUniformMatrix4fv(glGetUniformLocation(Shader_programm, "model"), 1, GL_FALSE, model_gato)  
-        glUniformMatrix4fv(glGetUniformLocation(Shader_programm, "view"), 1, GL_FALSE, view)
-        glUniformMatrix4fv(glGetUniformLocation(Shader_programm, "projection"), 1, GL_FALSE, projection)
-
-        # Desenha o gato
-        glBindVertexArray(vao_gato)
-        glBindTexture(GL_TEXTURE_2D, obj_textura_gato)
-        glDrawArrays(GL_TRIANGLES, 0, num_vertices_gato)
-
+        # view e projection: uma escrita no UBO por quadro (e nenhuma se a câmera não mudou)
+        with perfil.escopo("uniforms"):
+            camera_ubo.atualiza(cam)
+
+        # Transformações: só os nós alterados desde o último quadro (e seus descendentes)
+        # são recalculados; numa cena estática atualiza() não faz nada
+        with perfil.escopo("transformacoes"):
+            if len(hierarquia.atualiza()):
+                for objeto in objetos:
+                    if objeto.versao != hierarquia.versao[objeto.no]:
+                        posiciona_objeto(objeto)
+
+        # Frustum culling: leva as caixas de todos os objetos/submalhas para o mundo e testa
+        # todas contra os 6 planos da câmera de uma vez
+        perfil.abre("culling")
+        planos = cam.frustum_planes()
+        volumes = np.concatenate([np.zeros((0, 2, 3), np.float32)] + [o.aabb for o in objetos])
+        visivel = Frustum.aabb_visiveis(planos, volumes)
+        perfil.fecha()
+
+        # Um draw na fila por parte visível cuja textura já chegou
+        perfil.abre("fila")
+        pixels_textura = {}
+        inicio = 0
+        for objeto in objetos:
+            vis = visivel[inicio:inicio + len(objeto.aabb)]
+            inicio += len(objeto.aabb)
+            if not vis.any():
+                continue
+            # Escolhe o LOD pelo tamanho do objeto na tela: altura projetada da esfera envolvente
+            raio = float(objeto.esfera[3])
+            distancia = float(np.linalg.norm(cam.camera_pos - objeto.esfera[:3]))
+            lod = MeshLOD.escolhe_lod(raio, distancia, 45.0, HEIGHT)
+            pixels = MeshLOD.altura_na_tela(raio, distancia, 45.0, HEIGHT)
+            if objeto.instancias is None:
+                programa, copias = Shader_programm, None
+            else:
+                programa, copias = Shader_instancias, len(objeto.instancias)
+            for (textura, lods), v in zip(objeto.partes, vis):
+                if not v or textura is None:
+                    continue
+                offset, quantidade = lods[min(lod, len(lods) - 1)]
+                fila.adiciona(programa, textura, objeto.vao, objeto.model_gpu,
+                              quantidade, objeto.tipo_indices, offset, copias, objeto.nome)
+                pixels_textura[textura] = max(pixels, pixels_textura.get(textura, 0.0))
+
+        # a maior altura na tela entre os objetos que usam a textura decide até que nível
+        # de mipmap ela precisa chegar
+        for textura, pixels in pixels_textura.items():
+            streaming.pede(textura, pixels)
+        perfil.fecha()
+
+        # Ordena por programa → textura → VAO e desenha, pulando as vinculações repetidas
+        # (com o profiler ativo, cada draw é um escopo com o nome do objeto)
+        with perfil.escopo("desenho"):
+            estado = fila.executa(perfil)
+
+        # tempo de CPU do quadro: até aqui (a troca de buffers espera a GPU/vsync)
+        medicoes.append((time.perf_counter() - inicio_quadro, estado['draws'], estado['triangulos'],
+                         estado['programas'], estado['texturas'], estado['vaos']))
 
         # Troca buffers e coleta eventos
-        glfw.swap_buffers(Window)
-        glfw.poll_events()
-
+        with perfil.escopo("swap"):
+            glfw.swap_buffers(Window)
+        with perfil.escopo("entrada"):
+            glfw.poll_events()
+        perfil.fim_quadro()
+        if primeiro_quadro:
+            primeiro_quadro = False
+            print(f"Primeiro quadro em {(time.perf_counter() - loader.inicio) * 1e3:.0f} ms")
+
+    if trilha is not None:
+        relatorio_benchmark(medicoes, csv)
+    if perfil.ativo:
+        perfil.conclui()
+        perfil.imprime_resumo()
+        perfil.exporta(arquivo_perfil)
+        print(f"Perfil gravado em {arquivo_perfil} (trace do Chrome) e no .csv de mesmo nome")
+    loader.encerra()
+    # apaga texturas e buffers da GPU antes de destruir o contexto
+    e = registro.estatisticas()
+    print(f"Registro: {e['recursos']} recursos ({e['bytes_residentes'] / 1e6:.1f} MB), "
+          f"{e['acertos']}/{e['pedidos']} pedidos reaproveitados, "
+          f"{e['bytes_economizados'] / 1e6:.1f} MB não enviados de novo")
+    registro.libera_tudo()
+    streaming.apaga()
+    camera_ubo.apaga()
+    perfil.apaga()
     glfw.terminate()
 
+def relatorio_benchmark(medicoes, csv=None):
+    """Resumo das medições por quadro do modo benchmark e, opcionalmente, o CSV completo."""
+    m = np.array(medicoes, dtype=np.float64)
+    if len(m) == 0:
+        return
+    tempos = m[:, 0] * 1e3
+    print(f"Benchmark: {len(m)} quadros | CPU p50 {np.percentile(tempos, 50):.2f} ms, "
+          f"p95 {np.percentile(tempos, 95):.2f} ms, p99 {np.percentile(tempos, 99):.2f} ms, "
+          f"máx {tempos.max():.2f} ms | {m[:, 1].mean():.2f} draws e "
+          f"{m[:, 2].mean():.0f} triângulos por quadro (média)")
+    print(f"Trocas de estado por quadro (média): {m[:, 3].mean():.2f} programas, "
+          f"{m[:, 4].mean():.2f} texturas, {m[:, 5].mean():.2f} VAOs")
+    if csv:
+        with open(csv, 'w') as f:
+            f.write("quadro,cpu_ms,draws,triangulos,trocas_programa,trocas_textura,trocas_vao\n")
+            for k, (tempo, draws, triangulos, programas, texturas, vaos) in enumerate(m):
+                f.write(f"{k},{tempo * 1e3:.4f},{int(draws)},{int(triangulos)},"
+                        f"{int(programas)},{int(texturas)},{int(vaos)}\n")
+        print(f"Quadros gravados em {csv}")
+
 # ----------------------------------------
 # Função principal
 # ----------------------------------------
 
 def main():
-    inicializa_opengl()
-    inicializa_objeto()
-    inicializa_gato()
+    parser = argparse.ArgumentParser(description="Ex7 - OBJ com textura")
+    parser.add_argument("--cena", default="scene.json", help="arquivo da cena (ver Scene.py)")
+    parser.add_argument("--grava", metavar="ARQUIVO", help="grava a trajetória da câmera (.campath)")
+    parser.add_argument("--replay", metavar="ARQUIVO", help="modo benchmark: reproduz a trajetória")
+    parser.add_argument("--csv", metavar="ARQUIVO", help="no benchmark, grava as medições por quadro")
+    parser.add_argument("--dt", type=float, default=1.0 / 60.0, help="passo fixo da reprodução (s)")
+    parser.add_argument("--perfil", metavar="ARQUIVO",
+                        help="mede CPU/GPU por escopo e grava o trace (.json) e o CSV (ver Profiler.py)")
+    args = parser.parse_args()
+
+    gravador = CameraPath.Gravador() if args.grava else None
+    trilha = CameraPath.Reprodutor(CameraPath.le(args.replay), args.dt) if args.replay else None
+
+    # o loader é criado antes da janela: os assets já começam a ser lidos nas threads
+    # enquanto o GLFW e os shaders são inicializados
+    loader = AssetLoader()
+    for objeto in Scene.carrega_cena(args.cena, hierarquia):
+        loader.agenda(objeto.nome, carrega_objeto,
+                      lambda carregado, objeto=objeto: envia_objeto(objeto, carregado, loader), objeto, loader)
+    inicializa_opengl(visivel=trilha is None)
     inicializa_shaders()
-    render_loop()
+    # as consultas de tempo da GPU são criadas no primeiro quadro, já com o contexto atual
+    perfil.ativo = args.perfil is not None
+    render_loop(loader, gravador, trilha, args.csv, args.perfil)
+    if gravador is not None:
+        gravador.grava(args.grava)
+        print(f"Trajetória gravada em {args.grava} ({len(gravador.amostras)} quadros)")
 
 if __name__ == "__main__":
     main()
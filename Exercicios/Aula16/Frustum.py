@@ -0,0 +1,149 @@
+# Frustum.py
+# Planos do frustum de visão e teste de visibilidade (frustum culling) vetorizado
+#
+# O frustum é a pirâmide truncada que a câmera enxerga. Ele é delimitado por 6 planos
+# (esquerda, direita, baixo, cima, perto, longe), que podem ser extraídos diretamente da
+# matriz view × projection (Gribb e Hartmann, 2001).
+#
+# Convenção do pyrr: as matrizes são para vetores-LINHA, ou seja, clip = [x,y,z,1] @ view @ projection
+# (por isso são enviadas ao shader com GL_FALSE). A coluna j de M = view @ projection dá a
+# coordenada j do clip space; um ponto está dentro do frustum quando −w ≤ x, y, z ≤ w, e cada
+# uma dessas 6 desigualdades é um plano (a, b, c, d) com a·x + b·y + c·z + d ≥ 0 do lado de dentro.
+#
+# Os testes recebem os volumes de TODOS os objetos de uma vez (arrays (k, ...)) e devolvem
+# um array booleano (k,), sem laço Python por objeto.
+
+import numpy as np
+
+# Ordem dos planos em planos()
+ESQUERDA, DIREITA, BAIXO, CIMA, PERTO, LONGE = range(6)
+
+
+def planos(view, projection):
+    """
+    Extrai os 6 planos do frustum de view × projection (pyrr, vetores-linha).
+
+    Retorna:
+        np.ndarray float32 (6, 4): [a, b, c, d] de cada plano, com (a, b, c) unitário e
+        apontando para DENTRO do frustum (distância com sinal = a·x + b·y + c·z + d).
+    """
+    m = np.asarray(view, dtype=np.float64) @ np.asarray(projection, dtype=np.float64)
+    x, y, z, w = m[..., :, 0], m[..., :, 1], m[..., :, 2], m[..., :, 3]
+    p = np.stack([w + x, w - x, w + y, w - y, w + z, w - z], axis=-2)
+    p /= np.linalg.norm(p[..., :3], axis=-1, keepdims=True)
+    return p.astype(np.float32)
+
+
+def transforma_aabb(aabb, modelo):
+    """
+    Leva AABBs do espaço do objeto para o espaço do mundo (Arvo, 1990): o centro é
+    transformado normalmente e a meia-extensão pelo valor absoluto da parte 3x3 da matriz.
+    O resultado é a AABB (alinhada aos eixos do mundo) que contém a caixa transformada.
+
+    Parâmetros:
+        aabb   (np.ndarray): (k, 2, 3) com [mínimo, máximo] de cada caixa.
+        modelo (np.ndarray): (4, 4) para todas as caixas ou (k, 4, 4), uma por caixa.
+
+    Retorna:
+        np.ndarray float32 (k, 2, 3).
+    """
+    aabb = np.asarray(aabb, dtype=np.float64)
+    modelo = np.asarray(modelo, dtype=np.float64)
+    centro = (aabb[:, 0] + aabb[:, 1]) / 2.0
+    extensao = (aabb[:, 1] - aabb[:, 0]) / 2.0
+    rot, trans = modelo[..., :3, :3], modelo[..., 3, :3]
+    # vetores-linha: p' = p @ R + t (com R e t por caixa quando modelo é (k, 4, 4))
+    if rot.ndim == 2:
+        centro, extensao = centro @ rot, extensao @ np.abs(rot)
+    else:
+        centro = np.einsum('ki,kij->kj', centro, rot)
+        extensao = np.einsum('ki,kij->kj', extensao, np.abs(rot))
+    centro = centro + trans
+    return np.stack([centro - extensao, centro + extensao], axis=1).astype(np.float32)
+
+
+def transforma_esferas(esferas, modelo):
+    """
+    Leva esferas [cx, cy, cz, raio] para o espaço do mundo; o raio é multiplicado pela
+    maior escala da matriz (comprimento da maior linha da parte 3x3).
+    'modelo' é (4, 4) para todas ou (k, 4, 4), uma por esfera.
+    """
+    esferas = np.asarray(esferas, dtype=np.float64)
+    modelo = np.asarray(modelo, dtype=np.float64)
+    centro = np.c_[esferas[:, :3], np.ones(len(esferas))]
+    if modelo.ndim == 2:
+        centro = centro @ modelo
+        escala = np.linalg.norm(modelo[:3, :3], axis=1).max()
+    else:
+        centro = np.einsum('ki,kij->kj', centro, modelo)
+        escala = np.linalg.norm(modelo[:, :3, :3], axis=2).max(axis=1)
+    return np.c_[centro[:, :3], esferas[:, 3] * escala].astype(np.float32)
+
+
+def esferas_visiveis(planos_frustum, esferas):
+    """
+    True para cada esfera (k, 4) que não está inteiramente do lado de fora de algum plano.
+    Conservador: esferas perto das "quinas" do frustum podem passar sem estar visíveis.
+    """
+    esferas = np.asarray(esferas, dtype=np.float32)
+    distancias = esferas[:, :3] @ planos_frustum[:, :3].T + planos_frustum[:, 3]      # (k, 6)
+    return np.all(distancias >= -esferas[:, 3:4], axis=1)
+
+
+def aabb_visiveis(planos_frustum, aabb):
+    """
+    True para cada AABB (k, 2, 3) que não está inteiramente do lado de fora de algum plano.
+    Para cada plano basta testar o canto mais "para dentro" (p-vertex): centro·n + d + extensão·|n| ≥ 0.
+    """
+    aabb = np.asarray(aabb, dtype=np.float32)
+    centro = (aabb[:, 0] + aabb[:, 1]) / 2.0
+    extensao = (aabb[:, 1] - aabb[:, 0]) / 2.0
+    n, d = planos_frustum[:, :3], planos_frustum[:, 3]
+    distancias = centro @ n.T + d + extensao @ np.abs(n).T                            # (k, 6)
+    return np.all(distancias >= 0.0, axis=1)
+
+
+# ----------------------------------------
+# Teste e benchmark: vetorizado x laço por objeto
+# ----------------------------------------
+# Uso: python Frustum.py [num_objetos]
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from pyrr import matrix44
+
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    view = matrix44.create_look_at([0.0, 4.0, 30.0], [0.0, 4.0, 29.0], [0.0, 1.0, 0.0])
+    projection = matrix44.create_perspective_projection_matrix(45.0, 800 / 600, 0.1, 100.0)
+    p = planos(view, projection)
+
+    # pontos: um à frente da câmera (dentro) e um atrás (fora)
+    assert esferas_visiveis(p, [[0.0, 4.0, 0.0, 0.0]])[0]
+    assert not esferas_visiveis(p, [[0.0, 4.0, 40.0, 1.0]])[0]
+    assert not esferas_visiveis(p, [[0.0, 4.0, -200.0, 1.0]])[0]       # além do plano "longe"
+
+    # confere com a projeção: pontos com |x|,|y|,|z| ≤ w no clip space ⇔ dentro dos 6 planos
+    rng = np.random.default_rng(1)
+    pts = rng.uniform([-80, -60, -120], [80, 60, 40], (k, 3)).astype(np.float32)
+    clip = np.c_[pts, np.ones(k)] @ view @ projection
+    dentro = np.all(np.abs(clip[:, :3]) <= clip[:, 3:4], axis=1)
+    assert np.array_equal(esferas_visiveis(p, np.c_[pts, np.zeros(k)]), dentro)
+
+    # caixas aleatórias espalhadas pela cena
+    mins = rng.uniform([-200, -10, -200], [200, 10, 50], (k, 3))
+    aabb = np.stack([mins, mins + rng.uniform(0.5, 5.0, (k, 3))], axis=1).astype(np.float32)
+
+    t0 = time.perf_counter()
+    vis = aabb_visiveis(p, aabb)
+    t1 = time.perf_counter()
+    laco = []
+    for caixa in aabb:
+        c, e = (caixa[0] + caixa[1]) / 2.0, (caixa[1] - caixa[0]) / 2.0
+        laco.append(all(float(c @ pl[:3] + pl[3] + e @ np.abs(pl[:3])) >= 0.0 for pl in p))
+    t2 = time.perf_counter()
+    assert vis.tolist() == laco
+
+    print(f"{k} AABBs: {vis.sum()} visíveis ({100.0 * vis.mean():.1f}%)")
+    print(f"vetorizado: {(t1 - t0) * 1e3:7.2f} ms   laço Python: {(t2 - t1) * 1e3:7.2f} ms "
+          f"({(t2 - t1) / (t1 - t0):.0f}x)")
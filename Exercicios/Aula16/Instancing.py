@@ -0,0 +1,211 @@
+# Instancing.py
+# Desenho instanciado: muitas cópias da mesma malha num único draw call
+#
+# Desenhar N cópias de uma malha com um laço Python custa, por cópia, um glUniformMatrix4fv
+# e um glDrawElements — e cada chamada passa pelo PyOpenGL e pela validação do driver.
+# Com instancing as N matrizes de modelo ficam num VBO de instâncias, ligado ao VAO como
+# atributo com divisor 1 (avança uma vez por INSTÂNCIA, não por vértice), e um único
+# glDrawElementsInstanced desenha todas as cópias.
+#
+# A matriz por instância é um atributo mat4 no shader (layout(location = 2) in mat4
+# instance_model), que ocupa 4 locations seguidos (2, 3, 4 e 5), um vec4 por coluna:
+# 64 bytes por instância. Como nos uniforms, a matriz do pyrr (vetores-linha) já está na
+# memória na ordem por colunas do GLSL — a linha k da matriz é a coluna k do atributo.
+#
+# As matrizes de todas as instâncias são montadas de uma vez com NumPy (matrizes_modelo, em
+# TransformHierarchy.py, sem OpenGL), sem criar uma matriz pyrr por instância. Este módulo
+# só trata da parte na GPU: InstanceBuffer é o único que usa OpenGL.
+
+import ctypes
+
+import numpy as np
+from OpenGL.GL import (
+    glGenBuffers, glBindBuffer, glBufferData, glBufferSubData, glBindVertexArray,
+    glEnableVertexAttribArray, glVertexAttribPointer, glVertexAttribDivisor, glDrawElementsInstanced,
+    GL_ARRAY_BUFFER, GL_STATIC_DRAW, GL_FLOAT, GL_FALSE, GL_TRIANGLES
+)
+
+from TransformHierarchy import matrizes_modelo, grade
+
+# Primeiro location da matriz de instância (mat4: LOCATION_INSTANCIA ... LOCATION_INSTANCIA + 3)
+LOCATION_INSTANCIA = 2
+
+# Declaração do atributo, para colar no vertex shader
+ATRIBUTO_INSTANCIA = f"""
+layout(location = {LOCATION_INSTANCIA}) in mat4 instance_model;   // matriz de modelo da instância
+"""
+
+
+class InstanceBuffer:
+    """
+    VBO com uma matriz de modelo por instância, ligado a um VAO da malha.
+
+    Uso:
+        vao = ...VAO com VBO/EBO e atributos da malha...
+        instancias = InstanceBuffer(vao, matrizes_modelo(posicoes, rotacoes, escalas))
+        glBindVertexArray(vao)
+        instancias.desenha(num_indices, GL_UNSIGNED_SHORT, ctypes.c_void_p(0))
+    O VAO passa a ter os atributos da instância: não compartilhe com desenhos não instanciados
+    de shaders que usem os locations LOCATION_INSTANCIA ... LOCATION_INSTANCIA + 3.
+    """
+
+    def __init__(self, vao, matrizes, uso=GL_STATIC_DRAW):
+        matrizes = np.ascontiguousarray(matrizes, dtype=np.float32)
+        self.vao = vao
+        self.quantidade = len(matrizes)
+        self.capacidade = len(matrizes)
+        self.uso = uso
+
+        self.vbo = glGenBuffers(1)
+        glBindVertexArray(vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, matrizes.nbytes, matrizes, uso)
+        # mat4 = 4 atributos vec4 seguidos, um por coluna; divisor 1 = um valor por instância
+        for coluna in range(4):
+            local = LOCATION_INSTANCIA + coluna
+            glEnableVertexAttribArray(local)
+            glVertexAttribPointer(local, 4, GL_FLOAT, GL_FALSE, 64, ctypes.c_void_p(16 * coluna))
+            glVertexAttribDivisor(local, 1)
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    @property
+    def bytes(self):
+        return self.capacidade * 64
+
+    def atualiza(self, matrizes):
+        """Troca as matrizes (ex.: instâncias em movimento); realoca só se não couberem."""
+        matrizes = np.ascontiguousarray(matrizes, dtype=np.float32)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        if len(matrizes) > self.capacidade:
+            glBufferData(GL_ARRAY_BUFFER, matrizes.nbytes, matrizes, self.uso)
+            self.capacidade = len(matrizes)
+        else:
+            glBufferSubData(GL_ARRAY_BUFFER, 0, matrizes.nbytes, matrizes)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.quantidade = len(matrizes)
+
+    def desenha(self, num_indices, tipo_indices, offset):
+        """Todas as instâncias num draw só (o VAO já deve estar vinculado)."""
+        glDrawElementsInstanced(GL_TRIANGLES, num_indices, tipo_indices, offset, self.quantidade)
+
+
+# ----------------------------------------
+# Benchmark: laço por objeto × instancing, de 1 a 100 mil cópias
+# ----------------------------------------
+# Uso: python Instancing.py
+# Janela oculta (funciona com LIBGL_ALWAYS_SOFTWARE=1 xvfb-run). Para cada N:
+#   montagem: N matrizes com Scene.matriz_modelo (pyrr, uma a uma) × matrizes_modelo (NumPy)
+#   laço    : glUniformMatrix4fv(model) + glDrawElements por cópia (como a RenderQueue faz)
+#   inst.   : envio das N matrizes (glBufferSubData) + um glDrawElementsInstanced
+# Os tempos de desenho são de CPU até o glFinish (inclui o trabalho da GPU).
+
+if __name__ == "__main__":
+    import time
+    import glfw
+    from OpenGL.GL import (glGenVertexArrays, glDrawElements, glUniformMatrix4fv, glFinish,
+                           GL_ELEMENT_ARRAY_BUFFER, GL_UNSIGNED_SHORT, GL_DYNAMIC_DRAW)
+    import Scene
+    from ShaderProgram import ShaderProgram, CameraUBO, BLOCO_CAMERA
+    from Camera import Camera
+
+    # as duas montagens dão as mesmas matrizes
+    rng = np.random.default_rng(5)
+    pos, rot, esc = rng.normal(0, 50, (64, 3)), rng.uniform(-180, 180, (64, 3)), rng.uniform(0.1, 3, (64, 3))
+    vetorizadas = matrizes_modelo(pos, rot, esc)
+    for k in range(64):
+        assert np.allclose(vetorizadas[k], Scene.matriz_modelo(pos[k], rot[k], esc[k]), atol=1e-4)
+
+    if not glfw.init():
+        raise RuntimeError("Falha ao inicializar GLFW")
+    glfw.window_hint(glfw.VISIBLE, glfw.FALSE)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MAJOR, 4)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, 0)
+    glfw.window_hint(glfw.OPENGL_PROFILE, glfw.OPENGL_CORE_PROFILE)
+    janela = glfw.create_window(256, 256, "instancing", None, None)
+    if not janela:
+        glfw.terminate()
+        raise RuntimeError("Falha ao criar janela GLFW")
+    glfw.make_context_current(janela)
+
+    fragment_src = """#version 400
+        out vec4 FragColor;
+        void main() { FragColor = vec4(1.0); }"""
+    por_objeto = ShaderProgram("#version 400\n" + BLOCO_CAMERA + """
+        layout(location = 0) in vec3 in_pos;
+        uniform mat4 model;
+        void main() { gl_Position = view_projection * model * vec4(in_pos, 1.0); }""", fragment_src)
+    instanciado = ShaderProgram("#version 400\n" + BLOCO_CAMERA + ATRIBUTO_INSTANCIA + """
+        layout(location = 0) in vec3 in_pos;
+        uniform mat4 model;
+        void main() { gl_Position = view_projection * instance_model * model * vec4(in_pos, 1.0); }""",
+                                fragment_src)
+
+    # cubo indexado (8 vértices, 12 triângulos)
+    vertices = np.array([[x, y, z] for x in (-.5, .5) for y in (-.5, .5) for z in (-.5, .5)], np.float32)
+    indices = np.array([0, 1, 3, 0, 3, 2, 4, 6, 7, 4, 7, 5, 0, 4, 5, 0, 5, 1,
+                        2, 3, 7, 2, 7, 6, 0, 2, 6, 0, 6, 4, 1, 5, 7, 1, 7, 3], np.uint16)
+    vao = glGenVertexArrays(1)
+    glBindVertexArray(vao)
+    vbo, ebo = glGenBuffers(1), glGenBuffers(1)
+    glBindBuffer(GL_ARRAY_BUFFER, vbo)
+    glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+    glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ebo)
+    glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+    glEnableVertexAttribArray(0)
+    glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 12, ctypes.c_void_p(0))
+
+    cam = Camera()
+    cam.set_state([0.0, 150.0, 400.0], -90.0, -20.0)
+    ubo = CameraUBO()
+    ubo.atualiza(cam)
+    identidade = np.identity(4, dtype=np.float32)
+    buffer = InstanceBuffer(vao, np.zeros((1, 4, 4), np.float32), GL_DYNAMIC_DRAW)
+
+    def mede(funcao, repeticoes):
+        glFinish()
+        t0 = time.perf_counter()
+        for _ in range(repeticoes):
+            funcao()
+        glFinish()
+        return (time.perf_counter() - t0) / repeticoes * 1e3
+
+    print(f"{'N':>7s} | montagem pyrr  NumPy (ms) | laço por objeto  instancing (ms/quadro) | ganho")
+    for n in (1, 10, 100, 1000, 10000, 100000):
+        lado = int(np.ceil(np.sqrt(n)))
+        posicoes = grade(lado, lado, 3.0)[:n]
+        rotacoes = np.c_[np.zeros(n), rng.uniform(0, 360, n), np.zeros(n)]
+        escalas = rng.uniform(0.5, 1.5, n)
+
+        t_numpy = mede(lambda: matrizes_modelo(posicoes, rotacoes, escalas), 3)
+        if n <= 10000:
+            t_pyrr = mede(lambda: [Scene.matriz_modelo(p, r, (e, e, e))
+                                   for p, r, e in zip(posicoes, rotacoes, escalas)], 1)
+            texto_pyrr = f"{t_pyrr:10.2f}"
+        else:
+            texto_pyrr = f"{'—':>10s}"
+        matrizes = matrizes_modelo(posicoes, rotacoes, escalas)
+
+        def laco():
+            por_objeto.usa()
+            glBindVertexArray(vao)
+            local = por_objeto['model']
+            for m in matrizes:
+                glUniformMatrix4fv(local, 1, GL_FALSE, m)
+                glDrawElements(GL_TRIANGLES, len(indices), GL_UNSIGNED_SHORT, ctypes.c_void_p(0))
+
+        def instancias():
+            instanciado.usa()
+            glUniformMatrix4fv(instanciado['model'], 1, GL_FALSE, identidade)
+            buffer.atualiza(matrizes)
+            glBindVertexArray(vao)
+            buffer.desenha(len(indices), GL_UNSIGNED_SHORT, ctypes.c_void_p(0))
+
+        repeticoes = max(1, min(20, 20000 // n))
+        t_laco = mede(laco, repeticoes)
+        t_inst = mede(instancias, 20)
+        print(f"{n:7d} | {texto_pyrr} {t_numpy:10.2f}     | {t_laco:12.2f} {t_inst:12.2f}          "
+              f"| {t_laco / t_inst:6.1f}x")
+
+    ubo.apaga()
+    glfw.terminate()
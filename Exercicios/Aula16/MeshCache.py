@@ -0,0 +1,241 @@
+# MeshCache.py
+# Cache binário persistente de malhas já processadas ("sidecar" ao lado do .obj)
+#
+# Ler um OBJ é caro: é texto, precisa ser separado em tokens e convertido para float.
+# Depois da primeira leitura, gravamos o resultado já pronto para a GPU em um arquivo
+# binário ao lado do original, por exemplo:
+#   meshes/chibi.obj  →  meshes/chibi.obj.indexed.meshcache
+#
+# Formato do arquivo:
+#   • 8 bytes  : assinatura b'MESHCACH'
+#   • 4 bytes  : versão do formato (uint32, little-endian)
+#   • 4 bytes  : tamanho do cabeçalho JSON (uint32)
+#   • cabeçalho JSON com a chave de validade e a tabela de arrays (nome, dtype, shape, offset)
+#   • dados brutos de cada array, alinhados em 64 bytes
+#
+# A chave de validade é (caminho absoluto, tamanho, mtime, hash SHA-1 do conteúdo, versão).
+# A versão é a do código que gerou os dados (cada módulo tem a sua, ex.: MeshOptimizer.VERSAO):
+# mudar o algoritmo e incrementar a versão invalida os sidecars antigos.
+# Se só o mtime mudou (cópia, 'touch') e o SHA-1 confere, o mtime gravado é atualizado,
+# para que as próximas execuções voltem a dispensar o hash.
+# Na próxima execução, os arrays são abertos com np.memmap: nenhum parsing, nenhuma cópia —
+# o array mapeado pode ir direto para glBufferData.
+# Se o .obj mudar, o cache é descartado e regravado automaticamente.
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+ASSINATURA = b'MESHCACH'
+VERSAO     = 1
+ALINHAMENTO = 64
+
+
+class MeshCache:
+    """
+    Funções utilitárias para gravar/ler arrays NumPy em um arquivo "sidecar"
+    vinculado a um arquivo de origem (.obj).
+    """
+
+    @staticmethod
+    def caminho(origem, variante):
+        """Caminho do sidecar: '<origem>.<variante>.meshcache'."""
+        return f"{origem}.{variante}.meshcache"
+
+    @staticmethod
+    def hash_arquivo(path):
+        """SHA-1 do conteúdo do arquivo, lido em blocos de 1 MB."""
+        h = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for bloco in iter(lambda: f.read(1 << 20), b''):
+                h.update(bloco)
+        return h.hexdigest()
+
+    @staticmethod
+    def chave(origem):
+        """Chave de validade do arquivo de origem (sem o hash, que é calculado só quando preciso)."""
+        info = os.stat(origem)
+        return {'path': os.path.abspath(origem), 'size': info.st_size, 'mtime_ns': info.st_mtime_ns}
+
+    @staticmethod
+    def carrega_ou_gera(origem, variante, gerador, versao=1):
+        """
+        Retorna os arrays do cache se ele for válido; senão chama gerador(),
+        grava o resultado e o retorna.
+
+        Parâmetros:
+            origem   (str): caminho do arquivo de origem (.obj).
+            variante (str): nome do tipo de dado guardado (ex.: 'indexed').
+            gerador  (callable): função sem argumentos que retorna {nome: np.ndarray}.
+            versao   (int/str): versão do código de 'gerador'; um sidecar de outra versão é regerado.
+
+        Retorna:
+            dict {nome: np.ndarray} — arrays memory-mapped (somente leitura) quando
+            vieram do cache, ou os arrays recém-gerados.
+        """
+        sidecar = MeshCache.caminho(origem, variante)
+        chave = MeshCache.chave(origem)
+        chave['versao'] = versao
+        arrays = MeshCache.le(sidecar, origem, chave)
+        if arrays is not None:
+            return arrays
+
+        arrays = gerador()
+        chave['sha1'] = MeshCache.hash_arquivo(origem)
+        try:
+            MeshCache.grava(sidecar, chave, arrays)
+        except OSError:
+            # cache é só otimização: pasta sem permissão de escrita, disco cheio etc.
+            pass
+        return arrays
+
+    @staticmethod
+    def le_cabecalho(sidecar):
+        """Lê e devolve o cabeçalho JSON do sidecar, ou None se ausente/inválido."""
+        try:
+            with open(sidecar, 'rb') as f:
+                fixo = f.read(16)
+                if len(fixo) < 16 or fixo[:8] != ASSINATURA:
+                    return None
+                versao, tamanho = struct.unpack('<II', fixo[8:])
+                if versao != VERSAO:
+                    return None
+                return json.loads(f.read(tamanho).decode('utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def le(sidecar, origem, chave):
+        """
+        Abre o sidecar com np.memmap se a chave bater com a do arquivo de origem.
+        Mesmo caminho/tamanho/mtime → válido sem reler a origem.
+        Tamanho igual mas mtime diferente (ex.: arquivo copiado ou 'touch') → compara o SHA-1
+        e, se bater, grava o novo mtime no cabeçalho.
+        A versão (chave['versao']) precisa ser a mesma.
+        """
+        cabecalho = MeshCache.le_cabecalho(sidecar)
+        if cabecalho is None:
+            return None
+        gravada = cabecalho['chave']
+        if gravada['path'] != chave['path'] or gravada['size'] != chave['size'] \
+                or gravada.get('versao') != chave.get('versao'):
+            return None
+        if gravada['mtime_ns'] != chave['mtime_ns']:
+            if gravada['sha1'] != MeshCache.hash_arquivo(origem):
+                return None
+            gravada['mtime_ns'] = chave['mtime_ns']
+            MeshCache.regrava_cabecalho(sidecar, cabecalho)
+        return MeshCache.mapeia(sidecar, cabecalho)
+
+    @staticmethod
+    def regrava_cabecalho(sidecar, cabecalho):
+        """
+        Reescreve só o cabeçalho, no lugar (os dados não são copiados). grava() deixa pelo
+        menos 64 bytes livres antes dos dados; se o novo cabeçalho não couber, nada é feito.
+        """
+        texto = json.dumps(cabecalho).encode('utf-8')
+        inicio = min((info['offset'] for info in cabecalho['arrays'].values()), default=0)
+        if 16 + len(texto) > inicio:
+            return
+        try:
+            with open(sidecar, 'r+b') as f:
+                f.write(ASSINATURA + struct.pack('<II', VERSAO, len(texto)) + texto)
+        except OSError:
+            pass
+
+    @staticmethod
+    def mapeia(sidecar, cabecalho):
+        """Abre cada array da tabela do cabeçalho com np.memmap (somente leitura)."""
+        arrays = {}
+        for nome, info in cabecalho['arrays'].items():
+            shape = tuple(info['shape'])
+            if int(np.prod(shape)) == 0:
+                # np.memmap não aceita mapear 0 bytes
+                arrays[nome] = np.zeros(shape, dtype=info['dtype'])
+            else:
+                arrays[nome] = np.memmap(sidecar, dtype=info['dtype'], mode='r',
+                                         offset=info['offset'], shape=shape)
+        return arrays
+
+    @staticmethod
+    def grava(sidecar, chave, arrays):
+        """
+        Grava os arrays no sidecar. Escreve primeiro em um arquivo temporário na mesma
+        pasta e depois o renomeia, para que um processo concorrente nunca leia um cache pela metade.
+        """
+        tabela = {}
+        offset = 0
+        for nome, a in arrays.items():
+            a = np.ascontiguousarray(a)
+            tabela[nome] = {'dtype': a.dtype.str, 'shape': list(a.shape), 'offset': offset, 'nbytes': a.nbytes}
+            offset += -(-a.nbytes // ALINHAMENTO) * ALINHAMENTO
+
+        # o cabeçalho é montado duas vezes: os offsets são relativos até sabermos seu tamanho
+        cabecalho = json.dumps({'chave': chave, 'arrays': tabela}).encode('utf-8')
+        inicio = -(-(16 + len(cabecalho) + 64) // ALINHAMENTO) * ALINHAMENTO
+        for info in tabela.values():
+            info['offset'] += inicio
+        cabecalho = json.dumps({'chave': chave, 'arrays': tabela}).encode('utf-8')
+        assert 16 + len(cabecalho) <= inicio
+
+        pasta = os.path.dirname(os.path.abspath(sidecar))
+        fd, tmp = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(ASSINATURA + struct.pack('<II', VERSAO, len(cabecalho)) + cabecalho)
+                for nome, a in arrays.items():
+                    f.seek(tabela[nome]['offset'])
+                    f.write(np.ascontiguousarray(a).tobytes())
+                f.truncate(max([inicio] + [i['offset'] + i['nbytes'] for i in tabela.values()]))
+            os.replace(tmp, sidecar)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+
+# ----------------------------------------
+# Benchmark: inicialização fria x quente
+# ----------------------------------------
+# Uso: python MeshCache.py [arquivo.obj]
+# "Fria": sem sidecar (parsing completo + gravação do cache).
+# "Quente": sidecar válido (apenas np.memmap).
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from ObjLoaderSimple import ObjLoaderSimple
+
+    origem = sys.argv[1] if len(sys.argv) > 1 else "meshes/chibi.obj"
+    sidecar = MeshCache.caminho(origem, 'indexed')
+    if os.path.exists(sidecar):
+        os.remove(sidecar)
+
+    t0 = time.perf_counter()
+    vb_frio, ib_frio, _ = ObjLoaderSimple.load_obj_cached(origem)
+    t1 = time.perf_counter()
+    vb_quente, ib_quente, _ = ObjLoaderSimple.load_obj_cached(origem)
+    t2 = time.perf_counter()
+
+    assert vb_frio.tobytes() == vb_quente.tobytes() and ib_frio.tobytes() == ib_quente.tobytes()
+    print(f"fria  : {(t1 - t0) * 1e3:8.2f} ms (parsing + gravação de {os.path.getsize(sidecar) / 1e3:.0f} KB)")
+    print(f"quente: {(t2 - t1) * 1e3:8.2f} ms (np.memmap)  → {(t1 - t0) / (t2 - t1):.0f}x mais rápido")
+
+    # cópia com outro mtime: o SHA-1 confere uma vez e o novo mtime fica gravado no sidecar
+    import shutil
+    with tempfile.TemporaryDirectory() as pasta:
+        copia = os.path.join(pasta, os.path.basename(origem))
+        shutil.copyfile(origem, copia)
+        ObjLoaderSimple.load_obj_cached(copia)
+        info = os.stat(copia)
+        os.utime(copia, ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+        ObjLoaderSimple.load_obj_cached(copia)
+        gravada = MeshCache.le_cabecalho(MeshCache.caminho(copia, 'indexed'))['chave']
+        assert gravada['mtime_ns'] == os.stat(copia).st_mtime_ns
+        assert MeshCache.le(MeshCache.caminho(copia, 'indexed'), copia,
+                            dict(MeshCache.chave(copia), versao=gravada['versao'] + 1)) is None
+    print("mtime atualizado após 'touch'; versão diferente invalida o sidecar")
@@ -0,0 +1,311 @@
+# MeshLOD.py
+# Cadeia de níveis de detalhe (LOD) por simplificação com métrica de erro quádrica (QEM)
+#
+# Um objeto distante ocupa poucos pixels na tela, mas glDrawElements continua processando
+# todos os seus triângulos. Aqui geramos versões simplificadas da malha (por exemplo 100%,
+# 50%, 25% e 10% dos triângulos) e escolhemos, a cada quadro, qual desenhar de acordo com
+# o tamanho do objeto projetado na tela.
+#
+# Simplificação (Garland e Heckbert, 1997):
+#   • cada vértice acumula uma "quádrica" Q (matriz 4x4) = soma dos planos dos triângulos
+#     vizinhos; vᵀQv é a soma dos quadrados das distâncias de v a esses planos;
+#   • colapsamos repetidamente a aresta (a, b) de menor custo vᵀ(Qa+Qb)v, com v = a ou v = b
+#     (o vértice que sobra fica na sua posição ORIGINAL — assim todos os LODs compartilham
+#     o mesmo VBO e cada LOD é só um intervalo diferente do index buffer);
+#   • bordas abertas recebem planos perpendiculares extras, para não "encolherem";
+#   • colapsos que invertem a normal de algum triângulo são rejeitados.
+#
+# A simplificação é feita sobre as POSIÇÕES (vértices com a mesma posição e UVs diferentes,
+# nas costuras da textura, são tratados como um só), para não abrir rachaduras nas costuras.
+# Depois, cada vértice removido é trocado pelo vértice sobrevivente de UV mais próxima.
+
+import heapq
+import math
+
+import numpy as np
+
+from MeshCache import MeshCache
+from ObjLoaderSimple import ObjLoaderSimple, VERSAO as VERSAO_PARSER
+import MeshOptimizer
+
+# Versão da simplificação: entra na chave do sidecar (com a do otimizador e a do parser)
+VERSAO = 1
+
+# Proporções padrão de triângulos em cada LOD
+RAZOES_PADRAO = (1.0, 0.5, 0.25, 0.1)
+# Altura mínima na tela (pixels) para usar cada LOD; abaixo do último, usa o LOD mais simples
+LIMIARES_PADRAO = (300.0, 120.0, 50.0)
+# Peso das quádricas das bordas abertas
+PESO_BORDA = 1000.0
+
+
+# ----------------------------------------
+# Simplificação
+# ----------------------------------------
+
+def _quadricas(pos, tris):
+    """Quádrica (4x4) de cada vértice: soma dos planos dos triângulos, ponderados pela área."""
+    a, b, c = pos[tris[:, 0]], pos[tris[:, 1]], pos[tris[:, 2]]
+    n = np.cross(b - a, c - a)
+    area2 = np.linalg.norm(n, axis=1)
+    n = n / np.maximum(area2, 1e-30)[:, None]
+    plano = np.c_[n, -(n * a).sum(axis=1)]                 # (nx, ny, nz, d)
+    q_tri = plano[:, :, None] * plano[:, None, :] * (area2 / 2.0)[:, None, None]
+    q = np.zeros((len(pos), 4, 4))
+    for k in range(3):
+        np.add.at(q, tris[:, k], q_tri)
+
+    # bordas: arestas usadas por um único triângulo
+    arestas = np.sort(np.concatenate([tris[:, [0, 1]], tris[:, [1, 2]], tris[:, [2, 0]]]), axis=1)
+    dono = np.tile(np.arange(len(tris)), 3)
+    _, inverso, contagem = np.unique(arestas, axis=0, return_inverse=True, return_counts=True)
+    borda = contagem[inverso.reshape(-1)] == 1
+    if np.any(borda):
+        e = arestas[borda]
+        p0, p1 = pos[e[:, 0]], pos[e[:, 1]]
+        # plano que contém a aresta e é perpendicular ao triângulo
+        nb = np.cross(p1 - p0, n[dono[borda]])
+        nb = nb / np.maximum(np.linalg.norm(nb, axis=1), 1e-30)[:, None]
+        pb = np.c_[nb, -(nb * p0).sum(axis=1)]
+        qb = pb[:, :, None] * pb[:, None, :] * PESO_BORDA
+        np.add.at(q, e[:, 0], qb)
+        np.add.at(q, e[:, 1], qb)
+    return q
+
+
+def _custo(q, pos, a, b):
+    """Melhor colapso da aresta (a, b): retorna (custo, sobrevivente, removido)."""
+    qs = q[a] + q[b]
+    va = np.append(pos[a], 1.0)
+    vb = np.append(pos[b], 1.0)
+    ca, cb = float(va @ qs @ va), float(vb @ qs @ vb)
+    return (ca, a, b) if ca <= cb else (cb, b, a)
+
+
+def _inverte_normal(pos, tris, vivos_de, removido, sobrevivente):
+    """True se mover 'removido' para a posição de 'sobrevivente' inverte algum triângulo."""
+    for t in vivos_de[removido]:
+        tri = tris[t]
+        if sobrevivente in tri:
+            continue                       # este triângulo vai degenerar e sumir
+        p = pos[tri]
+        antes = np.cross(p[1] - p[0], p[2] - p[0])
+        p = p.copy()
+        p[list(tri).index(removido)] = pos[sobrevivente]
+        depois = np.cross(p[1] - p[0], p[2] - p[0])
+        if float(antes @ depois) <= 0.0:
+            return True
+    return False
+
+
+def simplifica(pos, tris, alvos):
+    """
+    Colapsa arestas até o número de triângulos vivos chegar a cada um dos 'alvos'
+    (em ordem decrescente). Retorna, para cada alvo, o array 'pai': pai[v] é o vértice
+    (de posição) que substituiu v (pai[v] == v se v sobreviveu).
+    """
+    n_tri = len(tris)
+    q = _quadricas(pos, tris)
+    tris = [list(t) for t in tris.tolist()]
+    vivo_tri = [True] * n_tri
+    vivos_de = [set() for _ in range(len(pos))]
+    for t, tri in enumerate(tris):
+        for v in tri:
+            vivos_de[v].add(t)
+    pai = np.arange(len(pos))
+    versao = [0] * len(pos)
+
+    fila = []
+    arestas = {tuple(sorted((tri[i], tri[(i + 1) % 3]))) for tri in tris for i in range(3)}
+    for a, b in arestas:
+        custo, s, r = _custo(q, pos, a, b)
+        heapq.heappush(fila, (custo, s, r, versao[s], versao[r]))
+
+    resultados = []
+    vivos = n_tri
+    for alvo in alvos:
+        while vivos > alvo and fila:
+            _, s, r, vs, vr = heapq.heappop(fila)
+            if pai[s] != s or pai[r] != r or versao[s] != vs or versao[r] != vr:
+                continue                   # entrada desatualizada
+            if _inverte_normal(pos, tris, vivos_de, r, s):
+                continue
+
+            # colapso r → s
+            pai[r] = s
+            q[s] += q[r]
+            for t in vivos_de[r]:
+                tri = tris[t]
+                if s in tri:
+                    vivo_tri[t] = False
+                    vivos -= 1
+                    for v in tri:
+                        if v != r:
+                            vivos_de[v].discard(t)
+                else:
+                    tri[tri.index(r)] = s
+                    vivos_de[s].add(t)
+            vivos_de[r] = set()
+            versao[s] += 1
+
+            # recalcula os custos das arestas em volta do sobrevivente
+            vizinhos = {v for t in vivos_de[s] for v in tris[t]} - {s}
+            for v in vizinhos:
+                custo, a, b = _custo(q, pos, s, v)
+                heapq.heappush(fila, (custo, a, b, versao[a], versao[b]))
+        resultados.append(pai.copy())
+    return resultados
+
+
+def _raiz(pai):
+    """Segue pai[] até o sobrevivente final de cada vértice (vetorizado)."""
+    raiz = pai.copy()
+    while True:
+        prox = raiz[raiz]
+        if np.array_equal(prox, raiz):
+            return raiz
+        raiz = prox
+
+
+def gera_lods(vertex_buffer, index_buffer, razoes=RAZOES_PADRAO):
+    """
+    Gera a cadeia de LODs de uma malha indexada ([x,y,z,u,v] float32 + índices).
+
+    Retorna:
+        index_buffer (np.ndarray): índices de todos os LODs concatenados (mesmo VBO).
+        intervalos   (np.ndarray): int64 (n_lods, 2) com (primeiro_indice, num_indices) de cada LOD.
+    """
+    vertices = np.asarray(vertex_buffer, dtype=np.float32).reshape(-1, 5)
+    indices = np.asarray(index_buffer, dtype=np.int64)
+
+    # une vértices com a mesma posição (costuras de UV)
+    pos_unicas, pid = np.unique(vertices[:, :3], axis=0, return_inverse=True)
+    pid = pid.reshape(-1)
+    tris_p = pid[indices].reshape(-1, 3)
+    validos = (tris_p[:, 0] != tris_p[:, 1]) & (tris_p[:, 1] != tris_p[:, 2]) & (tris_p[:, 0] != tris_p[:, 2])
+    tris_idx = indices.reshape(-1, 3)[validos]
+    tris_p = tris_p[validos]
+
+    alvos = [int(len(tris_p) * r) for r in razoes]
+    pais = simplifica(pos_unicas.astype(np.float64), tris_p, alvos)
+
+    # vértices agrupados por posição, para achar o substituto de UV mais próxima
+    ordem_pid = np.argsort(pid, kind='stable')
+    inicio_pid = np.searchsorted(pid[ordem_pid], np.arange(len(pos_unicas) + 1))
+    uvs = vertices[:, 3:]
+
+    partes, intervalos, total = [], [], 0
+    for pai in pais:
+        raiz = _raiz(pai)
+        t = raiz[tris_p]
+        vivo = (t[:, 0] != t[:, 1]) & (t[:, 1] != t[:, 2]) & (t[:, 0] != t[:, 2])
+
+        # troca cada vértice colapsado pelo vértice do sobrevivente com a UV mais próxima
+        troca = np.arange(len(vertices))
+        for i in np.flatnonzero(raiz[pid] != pid).tolist():
+            r = raiz[pid[i]]
+            candidatos = ordem_pid[inicio_pid[r]:inicio_pid[r + 1]]
+            d = ((uvs[candidatos] - uvs[i]) ** 2).sum(axis=1)
+            troca[i] = candidatos[int(np.argmin(d))]
+
+        lod = troca[tris_idx[vivo]].reshape(-1)
+        partes.append(lod)
+        intervalos.append((total, lod.size))
+        total += lod.size
+
+    return np.concatenate(partes), np.array(intervalos, dtype=np.int64).reshape(-1, 2)
+
+
+def esfera_envolvente(vertex_buffer):
+    """Esfera envolvente simples: centro da AABB e maior distância a ele. Retorna (centro, raio)."""
+    pos = np.asarray(vertex_buffer, dtype=np.float32).reshape(-1, 5)[:, :3].astype(np.float64)
+    if len(pos) == 0:
+        return np.zeros(3, np.float32), np.float32(0.0)
+    centro = (pos.min(axis=0) + pos.max(axis=0)) / 2.0
+    raio = np.sqrt(((pos - centro) ** 2).sum(axis=1).max())
+    return centro.astype(np.float32), np.float32(raio)
+
+
+def load_obj_lod(path, razoes=RAZOES_PADRAO, cache_size=16):
+    """
+    load_obj_indexed() + cadeia de LODs, cada LOD otimizado para o cache de vértices
+    (MeshOptimizer), tudo guardado no cache binário (variante 'lod<razoes>_c<cache_size>').
+
+    Retorna:
+        vertex_buffer (np.ndarray): float32 [x,y,z,u,v,...] compartilhado por todos os LODs.
+        index_buffer  (np.ndarray): índices de todos os LODs concatenados.
+        intervalos    (np.ndarray): (n_lods, 2) com (primeiro_indice, num_indices).
+        esfera        (np.ndarray): float32 [cx, cy, cz, raio] no espaço do objeto.
+    """
+    def gera():
+        vb, ib, _ = ObjLoaderSimple.load_obj_indexed(path)
+        lods, intervalos = gera_lods(vb, ib, razoes)
+        tipo = np.uint16 if len(vb) // 5 <= 65536 else np.uint32
+        vb, lods = MeshOptimizer.otimiza(vb, lods.astype(tipo), cache_size,
+                                         intervalos=[tuple(i) for i in intervalos.tolist()])
+        centro, raio = esfera_envolvente(vb)
+        return {'vertices': vb, 'indices': lods, 'intervalos': intervalos,
+                'esfera': np.append(centro, raio).astype(np.float32)}
+
+    # todo parâmetro que muda o resultado entra no nome da variante
+    chave = 'lod' + '_'.join(f'{r:g}' for r in razoes) + f'_c{cache_size}'
+    arrays = MeshCache.carrega_ou_gera(path, chave, gera,
+                                      f'{VERSAO}.{MeshOptimizer.VERSAO}.{VERSAO_PARSER}')
+    return arrays['vertices'], arrays['indices'], arrays['intervalos'], arrays['esfera']
+
+
+# ----------------------------------------
+# Seleção do LOD
+# ----------------------------------------
+
+def altura_na_tela(raio, distancia, fov_graus, altura_tela):
+    """Altura aproximada, em pixels, de uma esfera de raio 'raio' a 'distancia' da câmera."""
+    if distancia <= raio:
+        return float('inf')
+    return altura_tela * raio / (distancia * math.tan(math.radians(fov_graus) / 2.0))
+
+
+def escolhe_lod(raio, distancia, fov_graus, altura_tela, limiares=LIMIARES_PADRAO):
+    """Índice do LOD: 0 enquanto o objeto tiver mais de limiares[0] pixels de altura, etc."""
+    pixels = altura_na_tela(raio, distancia, fov_graus, altura_tela)
+    for k, limiar in enumerate(limiares):
+        if pixels >= limiar:
+            return k
+    return len(limiares)
+
+
+# ----------------------------------------
+# Benchmark: triângulos por quadro num voo de câmera
+# ----------------------------------------
+# Uso: python MeshLOD.py [arquivo.obj]
+# Uma grade de 10x10 cópias da malha, espaçadas de 25 unidades; a câmera percorre a
+# diagonal da grade, a 60 quadros por segundo, durante 10 segundos.
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    origem = sys.argv[1] if len(sys.argv) > 1 else "meshes/chibi.obj"
+    t0 = time.perf_counter()
+    vb, ib, intervalos, esfera = load_obj_lod(origem)
+    print(f"LODs gerados/carregados em {time.perf_counter() - t0:.2f}s: "
+          + ", ".join(f"{n // 3} tri" for _, n in intervalos.tolist()))
+
+    grade = np.array([(x * 25.0, 0.0, z * -25.0) for x in range(10) for z in range(10)])
+    centros = grade + esfera[:3]
+    quadros = 600
+    caminho = np.linspace([-20.0, 5.0, 20.0], [250.0, 5.0, -250.0], quadros)
+
+    completo = lod = 0
+    por_lod = np.zeros(len(intervalos), dtype=np.int64)
+    for cam in caminho:
+        distancias = np.linalg.norm(centros - cam, axis=1)
+        for d in distancias:
+            k = min(escolhe_lod(float(esfera[3]), float(d), 45.0, 600), len(intervalos) - 1)
+            por_lod[k] += 1
+            lod += intervalos[k, 1] // 3
+            completo += intervalos[0, 1] // 3
+
+    print(f"triângulos/quadro: completo {completo / quadros:,.0f}  com LOD {lod / quadros:,.0f} "
+          f"({100.0 * lod / completo:.1f}%)")
+    print("objetos por LOD (soma no voo):", por_lod.tolist())
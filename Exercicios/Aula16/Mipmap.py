@@ -0,0 +1,186 @@
+# Mipmap.py
+# Geração da pirâmide de mipmaps na CPU (NumPy), com filtro box ou Kaiser e gama sRGB correta
+#
+# Um mipmap é a sequência de versões da textura, cada uma com metade da largura e da altura
+# da anterior, até 1x1. Com GL_LINEAR_MIPMAP_LINEAR a GPU amostra o nível cujo texel tem
+# mais ou menos o tamanho do pixel na tela (e interpola entre os dois níveis mais próximos):
+# objetos distantes leem uma textura pequena (melhor para o cache de texturas) e sem serrilhado.
+#
+# Tamanhos dos níveis (regra do OpenGL): nível k = max(1, floor(largura / 2^k)) x max(1, floor(altura / 2^k)).
+#
+# Filtros (separáveis: aplicados nas linhas e depois nas colunas):
+#   • 'box'    : média de 2 texels. Em dimensões ímpares a média é de 3 texels com pesos
+#                que preservam a média da imagem ("polyphase box", NVIDIA 2005).
+#   • 'kaiser' : sinc janelada por Kaiser (8 taps), mais nítida e com menos aliasing;
+#                em dimensões ímpares cai para o box.
+#
+# sRGB: as cores das imagens (JPEG/PNG) são gravadas com gama sRGB, não linear. Fazer a média
+# diretamente nesses valores escurece a textura nos níveis pequenos; por isso as cores são
+# convertidas para linear, filtradas e convertidas de volta. O alfa já é linear.
+
+import numpy as np
+
+# Parâmetros do filtro de Kaiser
+KAISER_TAPS = 8
+KAISER_ALFA = 4.0
+
+
+# ----------------------------------------
+# Conversões sRGB ↔ linear
+# ----------------------------------------
+
+def srgb_para_linear(c):
+    """c em [0, 1] (gama sRGB) → intensidade linear em [0, 1]."""
+    c = np.asarray(c, dtype=np.float32)
+    return np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4).astype(np.float32)
+
+
+def linear_para_srgb(c):
+    """Intensidade linear em [0, 1] → c em [0, 1] com gama sRGB."""
+    c = np.clip(np.asarray(c, dtype=np.float32), 0.0, 1.0)
+    return np.where(c <= 0.0031308, c * 12.92, 1.055 * c ** (1.0 / 2.4) - 0.055).astype(np.float32)
+
+
+# ----------------------------------------
+# Redução de 2x em um eixo
+# ----------------------------------------
+
+def _reduz_box(a, eixo):
+    """Reduz o eixo 'eixo' de n para max(1, n // 2) com o filtro box."""
+    n = a.shape[eixo]
+    if n == 1:
+        return a
+    a = np.moveaxis(a, eixo, 0)
+    m = n // 2
+    if n % 2 == 0:
+        r = (a[0::2] + a[1::2]) * 0.5
+    else:
+        # n = 2m + 1: cada saída i cobre os texels 2i, 2i+1, 2i+2 com pesos
+        # (m − i, m, i + 1) / (2m + 1) — todos os texels contribuem com o mesmo peso total
+        i = np.arange(m, dtype=np.float32).reshape((-1,) + (1,) * (a.ndim - 1))
+        r = ((m - i) * a[0:2 * m:2] + m * a[1:2 * m:2] + (i + 1) * a[2::2]) / (2 * m + 1)
+    return np.moveaxis(r, 0, eixo)
+
+
+def _pesos_kaiser(taps=KAISER_TAPS, alfa=KAISER_ALFA):
+    """Pesos da sinc (corte em metade da frequência) janelada por Kaiser, normalizados."""
+    x = np.arange(taps, dtype=np.float64) - (taps - 1) / 2.0        # ±0.5, ±1.5, ... texels
+    sinc = np.sinc(x / 2.0)
+    janela = np.i0(alfa * np.sqrt(np.clip(1.0 - (2.0 * x / taps) ** 2, 0.0, 1.0))) / np.i0(alfa)
+    w = sinc * janela
+    return (w / w.sum()).astype(np.float32)
+
+
+def _reduz_kaiser(a, eixo):
+    """Reduz o eixo 'eixo' de n (par) para n // 2 com o filtro de Kaiser (bordas repetidas)."""
+    n = a.shape[eixo]
+    if n % 2 == 1:
+        return _reduz_box(a, eixo)
+    a = np.moveaxis(a, eixo, 0)
+    w = _pesos_kaiser()
+    meio = len(w) // 2
+    # saída i é centrada entre os texels 2i e 2i+1: taps em 2i − meio + 1 ... 2i + meio
+    centros = np.arange(n // 2) * 2
+    r = np.zeros((n // 2,) + a.shape[1:], dtype=np.float32)
+    for k, peso in enumerate(w):
+        idx = np.clip(centros + k - meio + 1, 0, n - 1)
+        r += peso * a[idx]
+    return np.moveaxis(r, 0, eixo)
+
+
+def reduz(imagem, filtro='box'):
+    """Um nível abaixo: (h, w, c) float32 → (max(1, h//2), max(1, w//2), c)."""
+    f = _reduz_kaiser if filtro == 'kaiser' else _reduz_box
+    return f(f(imagem, 0), 1)
+
+
+# ----------------------------------------
+# Pirâmide completa
+# ----------------------------------------
+
+def num_niveis(largura, altura):
+    """Número de níveis até 1x1: floor(log2(max(largura, altura))) + 1."""
+    return int(max(largura, altura)).bit_length()
+
+
+def gera_piramide(rgba, filtro='box', srgb=True):
+    """
+    Gera todos os níveis de mipmap de uma imagem RGBA uint8 (altura, largura, 4).
+
+    Parâmetros:
+        filtro: 'box' ou 'kaiser'.
+        srgb  : True para imagens de cor (filtra RGB em espaço linear);
+                False para dados que já são lineares (mapas de relevo, normais).
+
+    Retorna:
+        lista de arrays uint8 (h_k, w_k, 4), do nível 0 (a própria imagem) até 1x1.
+    """
+    rgba = np.asarray(rgba)
+    niveis = [rgba]
+    atual = rgba.astype(np.float32) / 255.0
+    if srgb:
+        atual[..., :3] = srgb_para_linear(atual[..., :3])
+
+    for _ in range(num_niveis(rgba.shape[1], rgba.shape[0]) - 1):
+        atual = reduz(atual, filtro)
+        saida = np.clip(atual, 0.0, 1.0)            # Kaiser tem lóbulos negativos
+        if srgb:
+            saida = np.concatenate([linear_para_srgb(saida[..., :3]), saida[..., 3:]], axis=-1)
+        niveis.append(np.rint(saida * 255.0).astype(np.uint8))
+    return niveis
+
+
+# ----------------------------------------
+# Teste da matemática da pirâmide (sem OpenGL)
+# ----------------------------------------
+# Uso: python Mipmap.py
+
+if __name__ == "__main__":
+    import time
+
+    # tamanhos e quantidade de níveis seguem a regra do OpenGL, inclusive não potência de 2
+    for h, w in ((512, 512), (1024, 256), (300, 7), (1, 1), (5, 3)):
+        niveis = gera_piramide(np.zeros((h, w, 4), np.uint8))
+        esperado = [(max(1, h >> k), max(1, w >> k)) for k in range(num_niveis(w, h))]
+        assert [n.shape[:2] for n in niveis] == esperado, (h, w)
+        assert niveis[-1].shape[:2] == (1, 1)
+
+    # imagem constante continua constante em todos os níveis, nos dois filtros
+    for filtro in ('box', 'kaiser'):
+        cor = np.full((64, 48, 4), (200, 100, 30, 255), np.uint8)
+        for n in gera_piramide(cor, filtro):
+            assert np.array_equal(n, cor[:n.shape[0], :n.shape[1]]), filtro
+
+    # box preserva a média (em linear), também em dimensões ímpares
+    rng = np.random.default_rng(0)
+    img = rng.random((45, 27, 4), dtype=np.float32)
+    a = img
+    while a.shape[:2] != (1, 1):
+        b = reduz(a, 'box')
+        assert np.allclose(a.mean(axis=(0, 1)), b.mean(axis=(0, 1)), atol=1e-5)
+        a = b
+
+    # sRGB: xadrez preto/branco vira cinza de 50% de LUZ = 188 em sRGB (e não 128)
+    xadrez = np.zeros((2, 2, 4), np.uint8)
+    xadrez[0, 0, :3] = xadrez[1, 1, :3] = 255
+    xadrez[..., 3] = 255
+    assert tuple(gera_piramide(xadrez, srgb=True)[1][0, 0]) == (188, 188, 188, 255)
+    assert tuple(gera_piramide(xadrez, srgb=False)[1][0, 0]) == (128, 128, 128, 255)
+
+    # Kaiser: pesos normalizados, simétricos; remove a frequência de Nyquist (linhas alternadas)
+    w = _pesos_kaiser()
+    assert abs(w.sum() - 1.0) < 1e-6 and np.allclose(w, w[::-1])
+    listras = np.zeros((64, 64, 4), np.float32)
+    listras[::2] = 1.0
+    meio = reduz(listras, 'kaiser')[8:-8, 8:-8]
+    assert np.allclose(meio, 0.5, atol=1e-3)
+
+    # desempenho em uma textura 1024x1024
+    img = rng.integers(0, 256, (1024, 1024, 4), dtype=np.uint8)
+    for filtro in ('box', 'kaiser'):
+        t0 = time.perf_counter()
+        niveis = gera_piramide(img, filtro)
+        t1 = time.perf_counter()
+        print(f"{filtro:6s}: {len(niveis)} níveis de 1024x1024 em {(t1 - t0) * 1e3:.0f} ms "
+              f"(+{sum(n.nbytes for n in niveis[1:]) / img.nbytes * 100:.1f}% de memória)")
+    print("OK")
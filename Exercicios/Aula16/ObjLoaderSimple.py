@@ -1,131 +1,1044 @@
-# ObjLoaderSimple.py
-# Carrega apenas vértices e coordenadas de textura (UV) de um arquivo .obj
-# Gera um buffer intercalado [x, y, z, u, v] para uso com glDrawArrays
-#
-# Cada linha de face no OBJ usa o formato:
-#   f i/j/k i/j/k i/j/k
-#   • i = índice de VÉRTICE (posição) — 1-based no arquivo, subtraímos 1 para 0-based em Python
-#   • j = índice de COORDENADA DE TEXTURA (UV) — 1-based, subtrai 1 para 0-based
-#   • k = índice de NORMAL — 1-based, subtrai 1 para 0-based (não usado neste loader simples)
-# O loader extrai (i, j) para cada vértice do triângulo, convertendo para índices Python,
-# e depois monta o buffer [x, y, z, u, v] na ordem correta para glDrawArrays.
-
-import numpy as np
-
-class ObjLoaderSimple:
-    """
-    Classe utilitária para ler modelos OBJ simplificados, contendo apenas
-    vértices (v) e coordenadas de textura (vt), e montar um buffer de dados
-    intercalados para renderização sem normais.
-    """
-
-    @staticmethod
-    def load_obj(path):
-        """
-        Lê um arquivo .obj procurando linhas de vértices ('v') e UVs ('vt'),
-        e faces ('f'), e monta um buffer de floats intercalados [x, y, z, u, v].
-
-        Parâmetros:
-            path (str): caminho para o arquivo .obj a ser lido.
-
-        Retorna:
-            vertex_buffer (np.ndarray): array float32 com dados [x,y,z,u,v,...].
-            num_vertices  (int): número de vértices (contagem de triplas x,y,z).
-        """
-        vertices = []     # lista de [x, y, z]
-        uvs      = []     # lista de [u, v]
-        faces    = []     # lista de tuplas (índice vértice, índice UV)
-
-
-
-
-        # Para cada linha do arquivo OBJ, o loader:
-        # 1. Usa line.strip().split() para:
-        #    - strip(): remover espaços em branco e quebras de linha no início/fim.
-        #    - split(): separar a linha em tokens (parts) usando espaços como delimitador.
-        # 2. Checa if not parts: continue — pula linhas em branco ou só com espaços.
-        # 3. Examina parts[0] (o primeiro token) para decidir o que aquela linha representa:
-        #    - 'v'  → linha de vértice: parts[1:4] são as coordenadas x, y, z; converte para float e adiciona a vertices.
-        #    - 'vt' → linha de coordenada de textura: parts[1:3] são u, v; converte para float e adiciona a uvs.
-        #    - 'f'  → linha de face: cada token parts[1], parts[2], parts[3] é algo como "i/j/k"; a gente separa em vals = vert.split('/')
-        #             e extrai os índices de vértice (i) e de UV (j), convertendo de 1-based para 0-based e armazenando em faces.
-        # Assim, cada linha é processada apenas uma vez, roteando o fluxo conforme o prefixo parts[0].
-        
-        # Abra e leia cada linha do arquivo
-        with open(path, 'r') as f:
-            for line in f:
-                parts = line.strip().split()
-                if not parts:  #se é linha em branco pula p proxima
-                    continue
-
-                # Interpreta coordenadas de vértice
-                if parts[0] == 'v':
-                    # 'v x y z'
-                    x, y, z = map(float, parts[1:4])
-                    vertices.append([x, y, z])
-
-                # Interpreta coordenadas de textura
-                elif parts[0] == 'vt':
-                    # 'vt u v'
-                    u, v = map(float, parts[1:3])
-                    uvs.append([u, v])
-
-                
-                # --- Leitura e ajuste de índices de face ---
-                # Este trecho processa cada linha de face ('f') do arquivo OBJ,
-                # que vem no formato "i/j/k" para cada vértice do triângulo:
-                #   i = índice de vértice (posição)
-                #   j = índice de coordenada de textura (UV)
-                #   k = índice de normal (não usado aqui)
-                # Para cada "i/j", convertemos de 1-based (OBJ) para 0-based (Python):
-                #   vi = int(i) - 1  → posição correta em vertices[vi]
-                #   ti = int(j) - 1  → posição correta em uvs[ti] (ou None se não existir)
-                # O par (vi, ti) é então armazenado em `faces` para montar o buffer de vértices.
-                # Interpreta faces (somente os índices de vértice e UV)
-                elif parts[0] == 'f':
-                    # Cada face no OBJ é definida por três vértices no formato "i/j/k"
-                    # onde i = índice de vértice, j = índice de UV, k = índice de normal.
-                    # Aqui percorremos apenas os três primeiros (triângulo).
-                    for vert in parts[1:4]:
-                        # Exemplo de vert: "12/34/56" ou "12/34" se não houver normal.
-                        vals = vert.split('/')  
-
-                        # ----------------------------
-                        # Índice de vértice (vi):
-                        # vals[0] é a parte antes da primeira "/", ex: "12".
-                        # Convertemos para inteiro e subtraímos 1 porque o OBJ é 1-based (indice começa em 1) e em python os indices começam em zero.
-                        # Assim, vi aponta para vertices[vi].
-                        #ex: v  a   b   c       ← vértice 12, fica: vi = int("12") - 1  # vi = 11
-                        vi = int(vals[0]) - 1  
-
-                        # ----------------------------
-                        # Índice de UV (ti) texturas:
-                        # Se houver uma segunda parte (vals[1]) e ela não estiver vazia,
-                        # convertemos para inteiro e subtraímos 1 (também 1-based → 0-based).
-                        # Caso contrário, marcamos ti como None (sem textura).
-                        if len(vals) > 1 and vals[1]:
-                            ti = int(vals[1]) - 1
-                        else:
-                            ti = None
-
-                        # Adiciona ao array de faces o par (índice de vértice, índice de UV)
-                        faces.append((vi, ti))  #[x, y, z, u, v]
-
-        #------- Monta o buffer intercalado [x, y, z, u, v] para cada face-----
-        buffer = []
-        for vi, ti in faces:
-            # Adiciona posição do vértice
-            x, y, z = vertices[vi]
-            buffer.extend([x, y, z])
-            # Adiciona UV se existir, senão (0.0, 0.0)
-            if ti is not None and ti < len(uvs):
-                u, v = uvs[ti]
-                buffer.extend([u, v])
-            else:
-                buffer.extend([0.0, 0.0])
-
-        # Converte para numpy float32 e calcula número de vértices
-        vertex_buffer = np.array(buffer, dtype=np.float32)
-        num_vertices  = vertex_buffer.size // 5  # 5 componentes por vértice O operador // faz divisão inteira, ou seja, sempre retorna um número inteiro (no exemplo 500 // 5 dá 100, sem casas decimais).
-
-        return vertex_buffer, num_vertices
+# ObjLoaderSimple.py
+# Carrega apenas vértices e coordenadas de textura (UV) de um arquivo .obj
+# Gera um buffer intercalado [x, y, z, u, v] para uso com glDrawArrays
+#
+# Cada linha de face no OBJ usa o formato:
+#   f i/j/k i/j/k i/j/k
+#   • i = índice de VÉRTICE (posição) — 1-based no arquivo, subtraímos 1 para 0-based em Python
+#   • j = índice de COORDENADA DE TEXTURA (UV) — 1-based, subtrai 1 para 0-based
+#   • k = índice de NORMAL — 1-based, subtrai 1 para 0-based (não usado neste loader simples)
+# O loader extrai (i, j) para cada vértice do triângulo, convertendo para índices Python,
+# e depois monta o buffer [x, y, z, u, v] na ordem correta para glDrawArrays.
+#
+# Há vários caminhos de leitura:
+#   • load_obj()       : versão didática, linha a linha (laço Python).
+#   • load_obj_numpy() : versão "em lote" — lê o arquivo inteiro de uma vez como bytes,
+#                        classifica as linhas v/vt/vn/f com operações NumPy, converte os
+#                        números com np.fromstring (em C) e monta o buffer com indexação
+#                        avançada (fancy indexing), sem laço por face.
+#                        O resultado é idêntico, byte a byte, ao de load_obj() (exceto com
+#                        índices negativos, ver abaixo).
+#   • load_obj_indexed() : mesma leitura, mas remove os cantos (v, vt) repetidos e retorna
+#                          vértices únicos + array de índices para glDrawElements.
+#   • load_obj_cached()  : igual a load_obj_indexed(), mas guarda o resultado em um cache
+#                          binário ao lado do .obj (ver MeshCache.py) e, nas próximas
+#                          execuções, apenas mapeia esse arquivo na memória (np.memmap).
+#   • iter_obj_chunks()  : leitura em STREAMING para malhas enormes — lê o arquivo em blocos
+#                          e gera pedaços de tamanho fixo do buffer [x, y, z, u, v]; a memória
+#                          fica limitada ao tamanho do pedaço + tabelas de atributos (v, vt).
+#                          count_obj_vertices() informa o total antes, para pré-alocar o VBO.
+#   • load_obj_parallel(): divide o arquivo em faixas de bytes (alinhadas em fim de linha),
+#                          interpreta cada faixa em um processo separado e junta as tabelas;
+#                          resultado idêntico ao de load_obj_numpy().
+#   • load_obj_materials(): lê também 'mtllib'/'usemtl' e o arquivo .mtl (load_mtl) e devolve
+#                          a malha indexada com as faces agrupadas por material: cada material
+#                          é um intervalo contíguo do mesmo index_buffer (uma "submalha").
+#   • compute_bounds()   : AABB e esfera envolvente da malha ou de cada submalha (culling).
+#
+# Índices negativos (relativos): no OBJ, -1 é o ÚLTIMO vértice declarado ANTES da face
+# (-k → contagem_até_aqui - k). Todos os caminhos vetorizados seguem essa regra, resolvida em
+# _parse_arrays(). load_obj() mantém de propósito a conversão antiga, int(i) - 1, que trata -1
+# como o PENÚLTIMO vértice da tabela completa — os dois só divergem em arquivos com índices
+# negativos.
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from MeshCache import MeshCache
+
+# Versão do parser: entra na chave dos sidecars (MeshCache); incrementar ao mudar o resultado
+VERSAO = 2
+
+# Códigos ASCII usados pelo parser vetorizado
+_NL, _TAB, _ESPACO, _BARRA, _CERQUILHA = 10, 9, 32, 47, 35
+_V, _T, _N, _F = ord('v'), ord('t'), ord('n'), ord('f')
+
+# Propriedades do .mtl lidas por load_mtl(): cores (3 floats) e escalares
+_MTL_CORES = ('Ka', 'Kd', 'Ks', 'Ke', 'Tf')
+_MTL_ESCALARES = ('Ns', 'Ni', 'd', 'Tr')
+
+class _TabelaCrescente:
+    """
+    Tabela (n, colunas) float32 que cresce dobrando a capacidade, como uma lista
+    do Python, mas sem criar um objeto por número. Usada pelo streaming para
+    acumular v/vt entre blocos do arquivo.
+    """
+
+    def __init__(self, colunas):
+        self.dados = np.zeros((1024, colunas), dtype=np.float32)
+        self.n = 0
+
+    def append(self, linhas):
+        fim = self.n + len(linhas)
+        if fim > len(self.dados):
+            maior = np.zeros((max(fim, 2 * len(self.dados)), self.dados.shape[1]), dtype=np.float32)
+            maior[:self.n] = self.dados[:self.n]
+            self.dados = maior
+        self.dados[self.n:fim] = linhas
+        self.n = fim
+
+    def view(self):
+        return self.dados[:self.n]
+
+
+def _parse_faixa(args):
+    """
+    Trabalho de um processo do pool em load_obj_parallel(): lê a faixa de bytes
+    [ini, fim) do arquivo e a interpreta com o parser vetorizado.
+    Fica fora da classe para poder ser enviada (pickle) aos processos filhos.
+    """
+    path, ini, fim = args
+    with open(path, 'rb') as f:
+        f.seek(ini)
+        # índices negativos ficam relativos ao início da faixa; load_obj_parallel() soma
+        # depois as contagens das faixas anteriores (ver 'relativo')
+        return ObjLoaderSimple._parse_arrays(f.read(fim - ini))
+
+
+class ObjLoaderSimple:
+    """
+    Classe utilitária para ler modelos OBJ simplificados, contendo apenas
+    vértices (v) e coordenadas de textura (vt), e montar um buffer de dados
+    intercalados para renderização sem normais.
+    """
+
+    @staticmethod
+    def load_obj(path):
+        """
+        Lê um arquivo .obj procurando linhas de vértices ('v') e UVs ('vt'),
+        e faces ('f'), e monta um buffer de floats intercalados [x, y, z, u, v].
+
+        Parâmetros:
+            path (str): caminho para o arquivo .obj a ser lido.
+
+        Retorna:
+            vertex_buffer (np.ndarray): array float32 com dados [x,y,z,u,v,...].
+            num_vertices  (int): número de vértices (contagem de triplas x,y,z).
+        """
+        vertices = []     # lista de [x, y, z]
+        uvs      = []     # lista de [u, v]
+        faces    = []     # lista de tuplas (índice vértice, índice UV)
+
+
+
+
+        # Para cada linha do arquivo OBJ, o loader:
+        # 1. Usa line.strip().split() para:
+        #    - strip(): remover espaços em branco e quebras de linha no início/fim.
+        #    - split(): separar a linha em tokens (parts) usando espaços como delimitador.
+        # 2. Checa if not parts: continue — pula linhas em branco ou só com espaços.
+        # 3. Examina parts[0] (o primeiro token) para decidir o que aquela linha representa:
+        #    - 'v'  → linha de vértice: parts[1:4] são as coordenadas x, y, z; converte para float e adiciona a vertices.
+        #    - 'vt' → linha de coordenada de textura: parts[1:3] são u, v; converte para float e adiciona a uvs.
+        #    - 'f'  → linha de face: cada token parts[1], parts[2], parts[3] é algo como "i/j/k"; a gente separa em vals = vert.split('/')
+        #             e extrai os índices de vértice (i) e de UV (j), convertendo de 1-based para 0-based e armazenando em faces.
+        # Assim, cada linha é processada apenas uma vez, roteando o fluxo conforme o prefixo parts[0].
+        
+        # Abra e leia cada linha do arquivo
+        with open(path, 'r') as f:
+            for line in f:
+                parts = line.strip().split()
+                if not parts:  #se é linha em branco pula p proxima
+                    continue
+
+                # Interpreta coordenadas de vértice
+                if parts[0] == 'v':
+                    # 'v x y z'
+                    x, y, z = map(float, parts[1:4])
+                    vertices.append([x, y, z])
+
+                # Interpreta coordenadas de textura
+                elif parts[0] == 'vt':
+                    # 'vt u v'
+                    u, v = map(float, parts[1:3])
+                    uvs.append([u, v])
+
+                
+                # --- Leitura e ajuste de índices de face ---
+                # Este trecho processa cada linha de face ('f') do arquivo OBJ,
+                # que vem no formato "i/j/k" para cada vértice do triângulo:
+                #   i = índice de vértice (posição)
+                #   j = índice de coordenada de textura (UV)
+                #   k = índice de normal (não usado aqui)
+                # Para cada "i/j", convertemos de 1-based (OBJ) para 0-based (Python):
+                #   vi = int(i) - 1  → posição correta em vertices[vi]
+                #   ti = int(j) - 1  → posição correta em uvs[ti] (ou None se não existir)
+                # O par (vi, ti) é então armazenado em `faces` para montar o buffer de vértices.
+                # Interpreta faces (somente os índices de vértice e UV)
+                elif parts[0] == 'f':
+                    # Cada face no OBJ é definida por três vértices no formato "i/j/k"
+                    # onde i = índice de vértice, j = índice de UV, k = índice de normal.
+                    # Aqui percorremos apenas os três primeiros (triângulo).
+                    for vert in parts[1:4]:
+                        # Exemplo de vert: "12/34/56" ou "12/34" se não houver normal.
+                        vals = vert.split('/')  
+
+                        # ----------------------------
+                        # Índice de vértice (vi):
+                        # vals[0] é a parte antes da primeira "/", ex: "12".
+                        # Convertemos para inteiro e subtraímos 1 porque o OBJ é 1-based (indice começa em 1) e em python os indices começam em zero.
+                        # Assim, vi aponta para vertices[vi].
+                        #ex: v  a   b   c       ← vértice 12, fica: vi = int("12") - 1  # vi = 11
+                        vi = int(vals[0]) - 1  
+
+                        # ----------------------------
+                        # Índice de UV (ti) texturas:
+                        # Se houver uma segunda parte (vals[1]) e ela não estiver vazia,
+                        # convertemos para inteiro e subtraímos 1 (também 1-based → 0-based).
+                        # Caso contrário, marcamos ti como None (sem textura).
+                        if len(vals) > 1 and vals[1]:
+                            ti = int(vals[1]) - 1
+                        else:
+                            ti = None
+
+                        # Adiciona ao array de faces o par (índice de vértice, índice de UV)
+                        faces.append((vi, ti))  #[x, y, z, u, v]
+
+        #------- Monta o buffer intercalado [x, y, z, u, v] para cada face-----
+        buffer = []
+        for vi, ti in faces:
+            # Adiciona posição do vértice
+            x, y, z = vertices[vi]
+            buffer.extend([x, y, z])
+            # Adiciona UV se existir, senão (0.0, 0.0)
+            if ti is not None and ti < len(uvs):
+                u, v = uvs[ti]
+                buffer.extend([u, v])
+            else:
+                buffer.extend([0.0, 0.0])
+
+        # Converte para numpy float32 e calcula número de vértices
+        vertex_buffer = np.array(buffer, dtype=np.float32)
+        num_vertices  = vertex_buffer.size // 5  # 5 componentes por vértice O operador // faz divisão inteira, ou seja, sempre retorna um número inteiro (no exemplo 500 // 5 dá 100, sem casas decimais).
+
+        return vertex_buffer, num_vertices
+
+    @staticmethod
+    def load_obj_numpy(path):
+        """
+        Versão vetorizada de load_obj(): mesmo resultado, byte a byte, mas sem
+        laço Python por linha nem por face. Índices negativos seguem a regra do OBJ
+        (relativos à contagem até a face), não a de load_obj() — ver o início do arquivo.
+
+        Parâmetros:
+            path (str): caminho para o arquivo .obj a ser lido.
+
+        Retorna:
+            vertex_buffer (np.ndarray): array float32 com dados [x,y,z,u,v,...].
+            num_vertices  (int): número de vértices (cantos de face) no buffer.
+        """
+        with open(path, 'rb') as f:
+            bruto = f.read()
+        dados = ObjLoaderSimple._parse_arrays(bruto)
+        vertex_buffer = ObjLoaderSimple._monta_buffer(dados)
+        return vertex_buffer, vertex_buffer.size // 5
+
+    @staticmethod
+    def load_obj_indexed(path):
+        """
+        Lê o OBJ e gera uma malha INDEXADA: cada par (vértice, UV) distinto vira um
+        único registro [x, y, z, u, v], e as faces passam a referenciá-lo por índice.
+        Desenhar com glDrawElements(GL_TRIANGLES, num_indices, tipo, None) produz
+        a mesma imagem que glDrawArrays com o buffer de load_obj(), com menos memória
+        e aproveitando o cache de vértices da GPU.
+
+        Parâmetros:
+            path (str): caminho para o arquivo .obj a ser lido.
+
+        Retorna:
+            vertex_buffer (np.ndarray): float32 com os vértices únicos [x,y,z,u,v,...].
+            index_buffer  (np.ndarray): uint16 (se couber) ou uint32 com 3 índices por triângulo.
+            num_indices   (int): quantidade de índices (= num_vertices de load_obj).
+        """
+        with open(path, 'rb') as f:
+            bruto = f.read()
+        dados = ObjLoaderSimple._parse_arrays(bruto)
+        vertex_buffer, index_buffer = ObjLoaderSimple._indexa(dados)
+        return vertex_buffer, index_buffer, index_buffer.size
+
+    @staticmethod
+    def load_obj_cached(path):
+        """
+        Mesma saída de load_obj_indexed(), usando o cache binário de MeshCache:
+        na primeira chamada o OBJ é lido e o sidecar '<path>.indexed.meshcache' é gravado;
+        nas seguintes (enquanto o .obj não mudar) os arrays vêm direto de np.memmap.
+
+        Retorna:
+            vertex_buffer (np.ndarray): float32 com os vértices únicos [x,y,z,u,v,...].
+            index_buffer  (np.ndarray): uint16 ou uint32 com 3 índices por triângulo.
+            num_indices   (int): quantidade de índices.
+        """
+        def gera():
+            vertex_buffer, index_buffer, _ = ObjLoaderSimple.load_obj_indexed(path)
+            return {'vertices': vertex_buffer, 'indices': index_buffer}
+
+        arrays = MeshCache.carrega_ou_gera(path, 'indexed', gera, VERSAO)
+        return arrays['vertices'], arrays['indices'], arrays['indices'].size
+
+    @staticmethod
+    def iter_obj_chunks(path, chunk_vertices=65536, bloco_bytes=1 << 20):
+        """
+        Gerador: lê o OBJ em blocos de 'bloco_bytes' e produz pedaços do buffer
+        intercalado [x, y, z, u, v] com até 'chunk_vertices' vértices cada
+        (arrays float32 de forma (n, 5); só o último pode ser menor).
+
+        Concatenar todos os pedaços dá o mesmo buffer de load_obj_numpy() sempre que as
+        faces só usam vértices/UVs já lidos — o caso normal, pois os exportadores escrevem
+        v/vt antes das faces. Índices negativos seguem a mesma regra de load_obj_numpy()
+        (relativos à quantidade de v/vt declarados antes da face): cada bloco é interpretado
+        com as contagens dos blocos anteriores.
+
+        Memória de pico ≈ tabelas v/vt (float32) + 1 bloco de texto + 1 pedaço,
+        independente do número de faces do arquivo.
+
+        Uso típico (VBO pré-alocado com count_obj_vertices):
+            glBufferData(GL_ARRAY_BUFFER, total * 20, None, GL_STATIC_DRAW)
+            for pedaco in iter_obj_chunks(path):
+                glBufferSubData(GL_ARRAY_BUFFER, offset, pedaco.nbytes, pedaco)
+                offset += pedaco.nbytes
+        """
+        posicoes = _TabelaCrescente(3)
+        uvs = _TabelaCrescente(2)
+        normais = 0                  # só a contagem: as normais não entram no buffer
+        pedaco = np.zeros((chunk_vertices, 5), dtype=np.float32)
+        cheio = 0
+
+        for bloco in ObjLoaderSimple._blocos(path, bloco_bytes):
+            dados = ObjLoaderSimple._parse_arrays(bloco, (posicoes.n, uvs.n, normais))
+            posicoes.append(dados['v'])
+            uvs.append(dados['vt'])
+            normais += len(dados['vn'])
+            if dados['fv'].size == 0:
+                continue
+            # as faces do bloco são resolvidas contra as tabelas acumuladas até aqui
+            dados['v'], dados['vt'] = posicoes.view(), uvs.view()
+            cantos = ObjLoaderSimple._monta_buffer(dados).reshape(-1, 5)
+
+            usados = 0
+            while usados < len(cantos):
+                n = min(chunk_vertices - cheio, len(cantos) - usados)
+                pedaco[cheio:cheio + n] = cantos[usados:usados + n]
+                cheio += n
+                usados += n
+                if cheio == chunk_vertices:
+                    yield pedaco.copy()
+                    cheio = 0
+            del cantos, dados
+
+        if cheio:
+            yield pedaco[:cheio].copy()
+
+    @staticmethod
+    def count_obj_vertices(path, bloco_bytes=1 << 20):
+        """
+        Conta quantos vértices (cantos de face) load_obj()/iter_obj_chunks() vão gerar,
+        sem converter nenhum número — serve para pré-alocar o VBO do streaming.
+        """
+        total = 0
+        for bloco in ObjLoaderSimple._blocos(path, bloco_bytes):
+            buf, tipo_byte, ini, tipo = ObjLoaderSimple._classifica(bloco)
+            faces = ini[tipo == 4]
+            if faces.size:
+                _, _, posicao = ObjLoaderSimple._conteudo(buf, tipo_byte, faces, 4, 1)
+                total += int(np.count_nonzero(posicao < 3))
+        return total
+
+    @staticmethod
+    def _blocos(path, bloco_bytes):
+        """Lê o arquivo em blocos de ~bloco_bytes, sempre terminando em fim de linha."""
+        resto = b''
+        with open(path, 'rb') as f:
+            while True:
+                lido = f.read(bloco_bytes)
+                if not lido:
+                    break
+                lido = resto + lido
+                corte = lido.rfind(b'\n')
+                if corte < 0:
+                    resto = lido
+                    continue
+                resto = lido[corte + 1:]
+                yield lido[:corte]
+        if resto.strip():
+            yield resto
+
+    @staticmethod
+    def load_obj_parallel(path, workers=None, faixa_minima=1 << 20):
+        """
+        Versão paralela de load_obj_numpy(): o arquivo é dividido em 'workers' faixas
+        de bytes, cada uma terminando em fim de linha, e cada faixa é interpretada
+        em um processo do pool (_parse_faixa). Depois juntamos, NA ORDEM do arquivo,
+        as tabelas v/vt/vn e os índices das faces.
+
+        Os índices positivos já são globais (contam desde o início do arquivo). Os negativos
+        são relativos à quantidade de v/vt/vn declarados antes da face: cada processo os
+        resolve com as contagens da SUA faixa, e na junção somamos a eles a contagem das
+        faixas anteriores (contagem_até_aqui + i, como na leitura serial). Por isso o
+        resultado é determinístico e idêntico, byte a byte, ao de load_obj_numpy().
+
+        Parâmetros:
+            path        (str): caminho para o arquivo .obj.
+            workers     (int): número de processos (padrão: os.cpu_count()).
+            faixa_minima(int): arquivos pequenos não compensam o custo dos processos;
+                               cada faixa tem pelo menos este tamanho em bytes.
+
+        Retorna:
+            vertex_buffer (np.ndarray), num_vertices (int) — como load_obj().
+        """
+        workers = workers or os.cpu_count() or 1
+        tamanho = os.path.getsize(path)
+        n_faixas = max(1, min(workers, tamanho // faixa_minima))
+        if n_faixas == 1:
+            return ObjLoaderSimple.load_obj_numpy(path)
+
+        faixas = ObjLoaderSimple._faixas(path, tamanho, n_faixas)
+        with ProcessPoolExecutor(max_workers=n_faixas) as pool:
+            # pool.map devolve os resultados na ordem das faixas
+            partes = list(pool.map(_parse_faixa, [(path, ini, fim) for ini, fim in faixas]))
+
+        # índices negativos: soma as tabelas das faixas anteriores
+        base = np.zeros(3, dtype=np.int64)
+        for p in partes:
+            for k, chave in enumerate(('fv', 'ft', 'fn')):
+                relativo = p['relativo'][:, k]
+                if relativo.any():
+                    p[chave][relativo] += base[k]
+            base += (len(p['v']), len(p['vt']), len(p['vn']))
+
+        dados = {chave: np.concatenate([p[chave] for p in partes]) for chave in partes[0]}
+        vertex_buffer = ObjLoaderSimple._monta_buffer(dados)
+        return vertex_buffer, vertex_buffer.size // 5
+
+    @staticmethod
+    def _faixas(path, tamanho, n):
+        """
+        Divide [0, tamanho) em n faixas; cada corte é empurrado até logo depois
+        do próximo '\n', para que nenhuma linha fique partida entre dois processos.
+        """
+        cortes = [0]
+        with open(path, 'rb') as f:
+            for k in range(1, n):
+                pos = max(k * tamanho // n, cortes[-1])
+                f.seek(pos)
+                resto = f.readline()          # avança até o fim da linha atual
+                cortes.append(min(pos + len(resto), tamanho))
+        cortes.append(tamanho)
+        return [(a, b) for a, b in zip(cortes[:-1], cortes[1:]) if b > a]
+
+    @staticmethod
+    def load_obj_materials(path):
+        """
+        Lê o OBJ com seus materiais. As faces são reordenadas (de forma estável) para que
+        todas as faces de um mesmo material fiquem juntas: o renderizador usa UM VBO/EBO
+        e faz, por material, um glBindTexture e um glDrawElements sobre o seu intervalo.
+        O resultado (sem o .mtl, que é pequeno) fica no cache binário de MeshCache.
+
+        Parâmetros:
+            path (str): caminho para o arquivo .obj.
+
+        Retorna:
+            vertex_buffer (np.ndarray): float32 com os vértices únicos [x,y,z,u,v,...].
+            index_buffer  (np.ndarray): uint16 ou uint32, agrupado por material.
+            submeshes     (list): tuplas (nome_material, primeiro_indice, num_indices), na ordem
+                                  em que cada material aparece no arquivo; nome None = sem 'usemtl'.
+            materiais     (dict): {nome: propriedades} lidas dos arquivos 'mtllib' (ver load_mtl).
+        """
+        def gera():
+            with open(path, 'rb') as f:
+                bruto = f.read()
+            return ObjLoaderSimple._agrupa_materiais(bruto)
+
+        arrays = MeshCache.carrega_ou_gera(path, 'materials', gera, VERSAO)
+        nomes = [str(n) or None for n in arrays['nomes']]
+        submeshes = [(nomes[k], int(inicio), int(n)) for k, (inicio, n) in enumerate(arrays['intervalos'])]
+
+        materiais = {}
+        pasta = os.path.dirname(path)
+        for mtllib in arrays['mtllib']:
+            caminho_mtl = os.path.join(pasta, str(mtllib))
+            if os.path.exists(caminho_mtl):
+                materiais.update(ObjLoaderSimple.load_mtl(caminho_mtl))
+        return arrays['vertices'], arrays['indices'], submeshes, materiais
+
+    @staticmethod
+    def load_mtl(path):
+        """
+        Lê um arquivo .mtl. Retorna {nome: {propriedade: valor}}, com:
+            cores      (Ka, Kd, Ks, Ke, Tf): lista de 3 floats
+            escalares  (Ns, Ni, d, Tr)     : float
+            illum                          : int
+            texturas   (map_Kd, map_bump, bump, ...): caminho do arquivo, relativo à pasta
+                                             atual (o .mtl usa caminhos relativos a ele mesmo)
+        """
+        pasta = os.path.dirname(path)
+        materiais = {}
+        atual = None
+        with open(path, 'r') as f:
+            for linha in f:
+                parts = linha.strip().split()
+                if not parts or parts[0].startswith('#'):
+                    continue
+                chave = parts[0]
+                if chave == 'newmtl':
+                    atual = materiais[' '.join(parts[1:])] = {}
+                elif atual is None:
+                    continue
+                elif chave in _MTL_CORES:
+                    atual[chave] = [float(x) for x in parts[1:4]]
+                elif chave in _MTL_ESCALARES:
+                    atual[chave] = float(parts[1])
+                elif chave == 'illum':
+                    atual[chave] = int(parts[1])
+                elif chave.startswith('map_') or chave in ('bump', 'disp', 'decal', 'refl'):
+                    # opções como "-bm 1.0" vêm antes; o nome do arquivo é o último token
+                    atual[chave] = os.path.join(pasta, parts[-1])
+        return materiais
+
+    @staticmethod
+    def compute_bounds(vertex_buffer, index_buffer=None, intervalos=None):
+        """
+        Volumes envolventes no espaço do objeto, para o frustum culling (ver Frustum.py).
+        Sem index_buffer: um volume para todo o buffer. Com index_buffer e 'intervalos'
+        (lista de (primeiro_indice, num_indices), como as submeshes de load_obj_materials):
+        um volume por intervalo, calculado só com os vértices que ele referencia.
+
+        Retorna:
+            aabb   (np.ndarray): float32 (k, 2, 3) com [mínimo, máximo] de cada volume.
+            esfera (np.ndarray): float32 (k, 4) com [cx, cy, cz, raio]; o centro é o da AABB.
+        """
+        pos = np.asarray(vertex_buffer, dtype=np.float32).reshape(-1, 5)[:, :3]
+        if index_buffer is None:
+            intervalos = [(0, len(pos))]
+            cantos = pos
+        else:
+            index_buffer = np.asarray(index_buffer, dtype=np.int64)
+            if intervalos is None:
+                intervalos = [(0, index_buffer.size)]
+            # os cantos de cada intervalo, um intervalo após o outro (reduceat por trechos)
+            cantos = pos[np.concatenate([index_buffer[p:p + n] for p, n in intervalos])]
+
+        # intervalos vazios ficam com volume nulo na origem
+        aabb = np.zeros((len(intervalos), 2, 3), np.float32)
+        esfera = np.zeros((len(intervalos), 4), np.float32)
+        tamanhos = np.array([n for _, n in intervalos], dtype=np.int64)
+        cheios = np.flatnonzero(tamanhos > 0)
+        if len(cheios) == 0:
+            return aabb, esfera
+        inicios = np.concatenate(([0], np.cumsum(tamanhos)[:-1]))[cheios]
+
+        minimo = np.minimum.reduceat(cantos, inicios, axis=0)
+        maximo = np.maximum.reduceat(cantos, inicios, axis=0)
+        centro = (minimo + maximo) / 2.0
+        trecho = np.repeat(np.arange(len(cheios)), tamanhos[cheios])
+        raio = np.sqrt(np.maximum.reduceat(((cantos - centro[trecho]) ** 2).sum(axis=1), inicios))
+        aabb[cheios] = np.stack([minimo, maximo], axis=1)
+        esfera[cheios] = np.c_[centro, raio]
+        return aabb, esfera
+
+    @staticmethod
+    def _agrupa_materiais(bruto):
+        """
+        Interpreta o OBJ e descobre o material de cada canto: é o do último 'usemtl'
+        ANTES da linha da face (busca binária entre os números de linha).
+        Depois ordena os cantos por material (ordem estável, mantendo a ordem original
+        dentro de cada material) e indexa. Retorna os arrays guardados no cache.
+        """
+        buf, tipo_byte, ini, tipo = ObjLoaderSimple._classifica(bruto)
+        dados = ObjLoaderSimple._parse_classificado(buf, tipo_byte, ini, tipo)
+
+        usemtl = ObjLoaderSimple._linhas_com_prefixo(buf, ini, tipo, b'usemtl')
+        mtllib = ObjLoaderSimple._linhas_com_prefixo(buf, ini, tipo, b'mtllib')
+        nomes_usemtl = [ObjLoaderSimple._argumento(bruto, ini, k) for k in usemtl]
+        arquivos_mtl = [ObjLoaderSimple._argumento(bruto, ini, k) for k in mtllib]
+
+        # material de cada linha de face (-1 = antes de qualquer usemtl)
+        linhas_face = np.flatnonzero(tipo == 4)
+        mat_face = np.searchsorted(usemtl, linhas_face) - 1
+        # cantos por face (só os 3 primeiros de cada face são usados)
+        if linhas_face.size:
+            _, por_linha, _ = ObjLoaderSimple._conteudo(buf, tipo_byte, ini[linhas_face], 4, 1)
+        else:
+            por_linha = np.zeros(0, dtype=np.int64)
+        mat_canto = np.repeat(mat_face, np.minimum(por_linha, 3))
+
+        # nomes distintos, na ordem da primeira face que os usa
+        nome_de = np.array([''] + nomes_usemtl)[mat_canto + 1]
+        distintos, primeiro, grupo = np.unique(nome_de, return_index=True, return_inverse=True)
+        ordem_grupos = np.argsort(primeiro, kind='stable')
+        posto = np.empty_like(ordem_grupos)
+        posto[ordem_grupos] = np.arange(ordem_grupos.size)
+        grupo = posto[grupo.reshape(-1)]
+
+        ordem = np.argsort(grupo, kind='stable')
+        for chave in ('fv', 'ft', 'ft_ok', 'fn', 'fn_ok'):
+            dados[chave] = dados[chave][ordem]
+        vertex_buffer, index_buffer = ObjLoaderSimple._indexa(dados)
+
+        contagens = np.bincount(grupo, minlength=ordem_grupos.size)
+        inicios = np.cumsum(contagens) - contagens
+        return {
+            'vertices': vertex_buffer,
+            'indices': index_buffer,
+            'intervalos': np.stack([inicios, contagens], axis=1).astype(np.int64).reshape(-1, 2),
+            'nomes': np.array(distintos[ordem_grupos], dtype='<U256').reshape(-1),
+            'mtllib': np.array(arquivos_mtl, dtype='<U256').reshape(-1),
+        }
+
+    @staticmethod
+    def _linhas_com_prefixo(buf, ini, tipo, prefixo):
+        """Números das linhas (não classificadas) que começam com 'prefixo' seguido de espaço."""
+        candidatas = np.flatnonzero(tipo == 0)
+        ok = np.ones(candidatas.size, dtype=bool)
+        for k, c in enumerate(prefixo + b' '):
+            pos = np.minimum(ini[candidatas] + k, buf.size - 1)
+            ok &= (buf[pos] == c) | ((c == _ESPACO) & (buf[pos] == _TAB))
+        return candidatas[ok]
+
+    @staticmethod
+    def _argumento(bruto, ini, linha):
+        """Tudo depois da primeira palavra da linha, sem espaços nas pontas (ex.: nome do material)."""
+        fim = bruto.find(b'\n', ini[linha])
+        texto = bruto[ini[linha]:fim if fim >= 0 else len(bruto)].decode('utf-8', 'replace')
+        return texto.strip().split(None, 1)[1].strip()
+
+    @staticmethod
+    def _indexa(dados):
+        """
+        Remove cantos repetidos. A chave de cada canto é (índice de vértice, índice de UV),
+        com índices ainda negativos (ex.: 0 no arquivo) normalizados e cantos sem UV válida agrupados numa UV
+        "nula" (0.0, 0.0). Os vértices únicos ficam na ordem da primeira aparição,
+        o que mantém a localidade original do arquivo.
+        """
+        fv, ft = dados['fv'], dados['ft']
+        nv, nt = len(dados['v']), len(dados['vt'])
+        if fv.size == 0:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.uint16)
+
+        com_uv = dados['ft_ok'] & (ft < nt)
+        # os relativos já foram resolvidos em _parse_arrays(); o que ainda for negativo é indexado
+        # como em Python (-1 é o último): normaliza para que v[-1] e v[nv-1] coincidam;
+        # índices fora do intervalo provocam IndexError em _monta_buffer, como em load_obj()
+        chave = (fv % max(nv, 1)) * (nt + 1) + np.where(com_uv, ft % max(nt, 1), nt)
+
+        _, primeiro, inverso = np.unique(chave, return_index=True, return_inverse=True)
+        # np.unique ordena pelas chaves; reordenamos pela primeira aparição no arquivo
+        ordem = np.argsort(primeiro, kind='stable')
+        nova_posicao = np.empty_like(ordem)
+        nova_posicao[ordem] = np.arange(ordem.size)
+
+        cantos = ObjLoaderSimple._monta_buffer(dados).reshape(-1, 5)
+        vertex_buffer = cantos[primeiro[ordem]].reshape(-1)
+        tipo = np.uint16 if ordem.size <= 65536 else np.uint32
+        index_buffer = nova_posicao[inverso.reshape(-1)].astype(tipo)
+        return vertex_buffer, index_buffer
+
+    @staticmethod
+    def _parse_arrays(bruto, bases=(0, 0, 0)):
+        """
+        Separa o conteúdo (bytes) de um OBJ em arrays NumPy. 'bases' são as quantidades de
+        v, vt e vn declarados ANTES de 'bruto' (leitura em blocos).
+
+        Retorna um dicionário com:
+            'v'    : float64 (nv, 3)  – posições
+            'vt'   : float64 (nt, 2)  – coordenadas de textura
+            'vn'   : float64 (nn, 3)  – normais
+            'fv'   : int64   (nc,)    – índice de vértice de cada canto (0-based)
+            'ft'   : int64   (nc,)    – índice de UV de cada canto (válido só onde 'ft_ok')
+            'ft_ok': bool    (nc,)    – True se o canto tem UV
+            'fn'   : int64   (nc,)    – índice de normal (válido só onde 'fn_ok')
+            'fn_ok': bool    (nc,)    – True se o canto tem normal
+            'relativo': bool (nc, 3)  – índice (v, vt, vn) negativo no arquivo
+        Índices positivos: int(i) - 1, como em load_obj(). Negativos: bases + quantidade
+        declarada até a linha da face + i (regra do OBJ). De cada face são usados só os três
+        primeiros cantos (parts[1:4]).
+        """
+        return ObjLoaderSimple._parse_classificado(*ObjLoaderSimple._classifica(bruto), bases)
+
+    @staticmethod
+    def _parse_classificado(buf, tipo_byte, ini, tipo, bases=(0, 0, 0)):
+        """Corpo de _parse_arrays(), a partir das linhas já classificadas por _classifica()."""
+        dados = {
+            'v':  ObjLoaderSimple._floats(buf, tipo_byte, ini[tipo == 1], 1, 3),
+            'vt': ObjLoaderSimple._floats(buf, tipo_byte, ini[tipo == 2], 2, 2),
+            'vn': ObjLoaderSimple._floats(buf, tipo_byte, ini[tipo == 3], 2, 3),
+        }
+        faces = ObjLoaderSimple._faces(buf, tipo_byte, ini[tipo == 4])
+        linha = faces.pop('linha')
+
+        # índices negativos: -k é o k-ésimo último elemento declarado ANTES da linha da face.
+        # Em 'fv' o arquivo tem i e guardamos i - 1, então i = -k aparece como -k - 1 (< -1);
+        # i = 0 (inválido) fica -1, como em load_obj().
+        relativo = np.zeros((linha.size, 3), dtype=bool)
+        for k, (chave, ok, codigo) in enumerate((('fv', None, 1), ('ft', 'ft_ok', 2), ('fn', 'fn_ok', 3))):
+            negativo = faces[chave] < -1
+            if ok is not None:
+                negativo &= faces[ok]
+            if negativo.any():
+                # quantos v/vt/vn vêm antes de cada linha de face
+                antes = np.cumsum(tipo == codigo)[tipo == 4]
+                faces[chave][negativo] += bases[k] + antes[linha[negativo]] + 1
+                relativo[:, k] = negativo
+        dados.update(faces)
+        dados['relativo'] = relativo
+        return dados
+
+    @staticmethod
+    def _classifica(bruto):
+        """
+        Classifica cada linha do conteúdo (bytes) pelo seu prefixo.
+
+        Retorna:
+            buf       : uint8 – o conteúdo, com um '\n' extra no fim e comentários ('#') em branco
+            tipo_byte : uint8 – para cada byte, o tipo da linha a que pertence
+            ini       : int64 – posição inicial de cada linha
+            tipo      : uint8 – tipo de cada linha: 0 outro, 1 'v', 2 'vt', 3 'vn', 4 'f'
+        """
+        buf = np.frombuffer(bruto + b'\n', dtype=np.uint8)
+
+        # início e fim ('\n') de cada linha
+        fim = np.flatnonzero(buf == _NL)
+        ini = np.empty_like(fim)
+        ini[0] = 0
+        ini[1:] = fim[:-1] + 1
+
+        # linhas indentadas são raras: normalizamos com lstrip() e recomeçamos
+        c0 = buf[ini]
+        if np.any((c0 == _ESPACO) | (c0 == _TAB)):
+            linhas = bruto.split(b'\n')
+            return ObjLoaderSimple._classifica(b'\n'.join(l.lstrip() for l in linhas))
+
+        # comentários: de '#' até o fim da linha vira espaço (o tamanho não muda, então 'ini'
+        # continua valendo), como load_obj(), que só olha os primeiros tokens de cada linha
+        if b'#' in bruto:
+            buf = buf.copy()
+            cerquilhas = np.flatnonzero(buf == _CERQUILHA)
+            # primeiro '#' de cada linha comentada e o '\n' que fecha a linha
+            linhas, primeiro = np.unique(np.searchsorted(fim, cerquilhas), return_index=True)
+            inicio, tamanho = cerquilhas[primeiro], fim[linhas] - cerquilhas[primeiro]
+            # posições de todos os bytes comentados, sem percorrer o buffer inteiro
+            deslocamento = np.repeat(inicio - (np.cumsum(tamanho) - tamanho), tamanho)
+            buf[deslocamento + np.arange(int(tamanho.sum()))] = _ESPACO
+            c0 = buf[ini]
+
+        # classifica cada linha pelos 3 primeiros caracteres (o '\n' final serve de sentinela)
+        c1 = buf[np.minimum(ini + 1, buf.size - 1)]
+        c2 = buf[np.minimum(ini + 2, buf.size - 1)]
+        sep1 = (c1 == _ESPACO) | (c1 == _TAB)
+        sep2 = (c2 == _ESPACO) | (c2 == _TAB)
+        tipo = np.zeros(ini.size, dtype=np.uint8)
+        tipo[(c0 == _V) & sep1] = 1               # 'v '
+        tipo[(c0 == _V) & (c1 == _T) & sep2] = 2  # 'vt '
+        tipo[(c0 == _V) & (c1 == _N) & sep2] = 3  # 'vn '
+        tipo[(c0 == _F) & sep1] = 4               # 'f '
+        # tipo de cada byte = tipo da linha a que ele pertence
+        tipo_byte = np.repeat(tipo, fim - ini + 1)
+        return buf, tipo_byte, ini, tipo
+
+    @staticmethod
+    def _conteudo(buf, tipo_byte, inicios, codigo, prefixo):
+        """
+        Junta, em um único array de bytes, o conteúdo das linhas de um tipo
+        (sem o prefixo 'v', 'vt', ...; cada linha continua terminada em '\n').
+        Retorna também, para cada linha, quantos tokens ela tem e, para cada token,
+        sua posição dentro da linha (0, 1, 2, ...).
+        """
+        mascara = tipo_byte == codigo
+        for k in range(prefixo):
+            mascara[inicios + k] = False
+        conteudo = buf[mascara]
+
+        # um token começa onde um byte não-branco segue um byte branco
+        branco = conteudo <= _ESPACO
+        comeca = ~branco
+        comeca[1:] &= branco[:-1]
+        # tokens por linha: cada token pertence à linha do primeiro '\n' depois dele
+        fim_linhas = np.flatnonzero(conteudo == _NL)
+        linha_do_token = np.searchsorted(fim_linhas, np.flatnonzero(comeca))
+        por_linha = np.bincount(linha_do_token, minlength=inicios.size)
+        # posição de cada token na sua linha
+        total = int(por_linha.sum())
+        posicao = np.arange(total) - np.repeat(np.cumsum(por_linha) - por_linha, por_linha)
+        return conteudo, por_linha, posicao
+
+    @staticmethod
+    def _floats(buf, tipo_byte, inicios, prefixo, colunas):
+        """
+        Converte as linhas de um tipo em um array float64 (n, colunas), usando só
+        os primeiros 'colunas' números de cada linha (como parts[1:4] em load_obj).
+        """
+        if inicios.size == 0:
+            return np.zeros((0, colunas), dtype=np.float64)
+        codigo = {(1, 3): 1, (2, 2): 2, (2, 3): 3}[(prefixo, colunas)]
+        conteudo, por_linha, posicao = ObjLoaderSimple._conteudo(buf, tipo_byte, inicios, codigo, prefixo)
+        if np.any(por_linha < colunas):
+            raise ValueError("linha com componentes de menos no arquivo OBJ")
+        valores = np.fromstring(conteudo.tobytes(), dtype=np.float64, sep=' ')
+        if valores.size != posicao.size:
+            raise ValueError("valor numérico inválido no arquivo OBJ")
+        if np.all(por_linha == colunas):
+            return valores.reshape(-1, colunas)
+        return valores[posicao < colunas].reshape(-1, colunas)
+
+    @staticmethod
+    def _faces(buf, tipo_byte, inicios):
+        """
+        Converte os cantos "i", "i/j", "i//k" ou "i/j/k" das linhas 'f' em arrays de índices.
+        Caminho rápido: se todos os cantos têm o mesmo formato do primeiro, trocamos
+        '/' por espaço e convertemos tudo com um único np.fromstring.
+        Caso contrário (formatos misturados, campos vazios), um laço simples por canto.
+        """
+        vazio = np.zeros(0, dtype=np.int64)
+        if inicios.size == 0:
+            return {'fv': vazio, 'ft': vazio, 'ft_ok': vazio.astype(bool),
+                    'fn': vazio, 'fn_ok': vazio.astype(bool), 'linha': vazio}
+
+        conteudo, por_linha, posicao = ObjLoaderSimple._conteudo(buf, tipo_byte, inicios, 4, 1)
+        # linha de face (entre as 'inicios') de cada canto usado
+        linha = np.repeat(np.arange(inicios.size), np.minimum(por_linha, 3))
+        usados = posicao < 3          # só os 3 primeiros cantos de cada face
+        n = int(usados.sum())
+        total = posicao.size
+
+        # formato do primeiro canto
+        primeiro = bytes(conteudo[:64]).split()[0]
+        barras = primeiro.count(b'/')
+        duplas = b'//' in primeiro
+        eh_barra = conteudo == _BARRA
+        n_duplas = int(np.count_nonzero(eh_barra[1:] & eh_barra[:-1]))
+        colunas = ['v', 'n'] if duplas else ['v', 't', 'n'][:barras + 1]
+
+        tabela = None
+        if (int(eh_barra.sum()) == barras * total and n_duplas == (total if duplas else 0)
+                and not primeiro.endswith(b'/')):
+            texto = np.where(eh_barra, np.uint8(_ESPACO), conteudo).tobytes()
+            numeros = np.fromstring(texto, dtype=np.int64, sep=' ')
+            if numeros.size == total * len(colunas):
+                tabela = numeros.reshape(total, len(colunas))[usados] - 1
+
+        if tabela is not None:
+            cols = dict(zip(colunas, tabela.T))
+            sim, nao = np.ones(n, dtype=bool), np.zeros(n, dtype=bool)
+            zeros = np.zeros(n, dtype=np.int64)
+            return {
+                'fv': np.ascontiguousarray(cols['v']),
+                'ft': np.ascontiguousarray(cols['t']) if 't' in cols else zeros,
+                'ft_ok': sim if 't' in cols else nao,
+                'fn': np.ascontiguousarray(cols['n']) if 'n' in cols else zeros,
+                'fn_ok': sim if 'n' in cols else nao,
+                'linha': linha,
+            }
+
+        # caminho lento: mesmas regras de load_obj(), canto a canto
+        cantos = [c for c, u in zip(conteudo.tobytes().split(), usados) if u]
+        fv, ft, fn = np.zeros(n, np.int64), np.zeros(n, np.int64), np.zeros(n, np.int64)
+        ft_ok, fn_ok = np.zeros(n, bool), np.zeros(n, bool)
+        for c, vert in enumerate(cantos):
+            vals = vert.split(b'/')
+            fv[c] = int(vals[0]) - 1
+            if len(vals) > 1 and vals[1]:
+                ft[c], ft_ok[c] = int(vals[1]) - 1, True
+            if len(vals) > 2 and vals[2]:
+                fn[c], fn_ok[c] = int(vals[2]) - 1, True
+        return {'fv': fv, 'ft': ft, 'ft_ok': ft_ok, 'fn': fn, 'fn_ok': fn_ok, 'linha': linha}
+
+    @staticmethod
+    def _monta_buffer(dados):
+        """
+        Monta o buffer intercalado [x, y, z, u, v] com fancy indexing:
+        posições = v[fv], UVs = vt[ft] onde o canto tem UV válida, senão (0.0, 0.0).
+        Mesmas regras de load_obj(); os índices relativos já vêm resolvidos de _parse_arrays().
+        """
+        fv, ft = dados['fv'], dados['ft']
+        saida = np.zeros((fv.size, 5), dtype=np.float32)
+        saida[:, :3] = dados['v'][fv]
+        # mesma condição de load_obj(): "ti is not None and ti < len(uvs)"
+        com_uv = dados['ft_ok'] & (ft < len(dados['vt']))
+        saida[com_uv, 3:] = dados['vt'][ft[com_uv]]
+        return saida.reshape(-1)
+
+
+# ----------------------------------------
+# Benchmark: load_obj() x load_obj_numpy()
+# ----------------------------------------
+# Uso: python ObjLoaderSimple.py [arquivo.obj]
+#      python ObjLoaderSimple.py --memoria [arquivo.obj]   (pico de RSS: numpy x streaming)
+#      python ObjLoaderSimple.py --paralelo [arquivo.obj]  (escalabilidade com 1..16 processos)
+# Replica o conteúdo do OBJ 1x, 4x, 16x e 64x (as faces continuam apontando para os
+# primeiros vértices, o que basta para medir o parser) e compara os dois caminhos.
+
+def _perfil_memoria(origem):
+    """
+    Pico de memória (RSS) de load_obj_numpy() x iter_obj_chunks() para arquivos cada vez
+    maiores. As tabelas v/vt são as do OBJ original; só as FACES são replicadas, então o
+    streaming deve manter o pico praticamente constante (curva "plana").
+    Cada medida roda em um processo separado, pois ru_maxrss é o pico do processo inteiro.
+    """
+    import os
+    import subprocess
+    import sys
+    import tempfile
+
+    with open(origem, 'r') as f:
+        linhas = f.read().splitlines()
+    atributos = '\n'.join(l for l in linhas if not l.startswith('f ')) + '\n'
+    faces = '\n'.join(l for l in linhas if l.startswith('f ')) + '\n'
+
+    medida = (
+        "import resource, sys\n"
+        "from ObjLoaderSimple import ObjLoaderSimple\n"
+        "if sys.argv[2] == 'numpy':\n"
+        "    buf, n = ObjLoaderSimple.load_obj_numpy(sys.argv[1])\n"
+        "else:\n"
+        "    n = sum(len(p) for p in ObjLoaderSimple.iter_obj_chunks(sys.argv[1]))\n"
+        "print(n, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+    )
+    print(f"{'faces x':>8} {'tamanho':>10} {'RSS numpy':>11} {'RSS stream':>11}")
+    for copias in (8, 32, 128, 512):
+        # escreve cópia a cópia: o processo pai não pode inflar, pois o filho herda
+        # o pico de RSS do fork no Linux
+        with tempfile.NamedTemporaryFile('w', suffix='.obj', delete=False) as tmp:
+            tmp.write(atributos)
+            for _ in range(copias):
+                tmp.write(faces)
+        try:
+            rss = {}
+            for modo in ('numpy', 'stream'):
+                saida = subprocess.run([sys.executable, '-c', medida, tmp.name, modo],
+                                       capture_output=True, text=True, check=True,
+                                       cwd=os.path.dirname(os.path.abspath(__file__)))
+                n, rss[modo] = map(int, saida.stdout.split())
+            tamanho = os.path.getsize(tmp.name) / 1e6
+            # ru_maxrss vem em KB no Linux
+            print(f"{copias:>8} {tamanho:>8.1f}MB {rss['numpy'] / 1e3:>9.0f}MB {rss['stream'] / 1e3:>9.0f}MB")
+        finally:
+            os.remove(tmp.name)
+
+
+def _indices_negativos():
+    """
+    Índices relativos (-1 = último v/vt declarado antes da face), cruzando as faixas do
+    load_obj_parallel(): cada triângulo aparece duas vezes, com índices negativos e com os
+    positivos equivalentes, e os dois precisam gerar os mesmos cantos em todos os caminhos.
+    """
+    import tempfile
+
+    with tempfile.NamedTemporaryFile('w', suffix='.obj', delete=False) as tmp:
+        tmp.write("v 0 0 0\nv 1 0 0\nv 0 1 0\nvt 0 0\nvt 1 0\nvt 0 1\nf -3/-3 -2/-2 -1/-1\n")
+    try:
+        buf, _ = ObjLoaderSimple.load_obj_numpy(tmp.name)
+        assert buf.reshape(-1, 5)[:, :2].tolist() == [[0, 0], [1, 0], [0, 1]]
+    finally:
+        os.remove(tmp.name)
+
+    with tempfile.NamedTemporaryFile('w', suffix='.obj', delete=False) as tmp:
+        for k in range(2000):
+            for j in range(3):
+                tmp.write(f"v {k} {j} {k * j}\nvt {j / 3:g} {k / 2000:g}\n")
+            a = 3 * k + 1
+            tmp.write(f"f -3/-3 -2/-2 -1/-1\nf {a}/{a} {a + 1}/{a + 1} {a + 2}/{a + 2}\n")
+    try:
+        ref, _ = ObjLoaderSimple.load_obj_numpy(tmp.name)
+        pares = ref.reshape(-1, 2, 3, 5)
+        assert pares[:, 0].tobytes() == pares[:, 1].tobytes(), "índices negativos mal resolvidos!"
+        buf, _ = ObjLoaderSimple.load_obj_parallel(tmp.name, 4, faixa_minima=1)
+        assert buf.tobytes() == ref.tobytes(), "índices negativos: paralelo diferente do serial!"
+        stream = np.concatenate(list(ObjLoaderSimple.iter_obj_chunks(tmp.name, 1000, 4096)))
+        assert stream.tobytes() == ref.tobytes(), "índices negativos: streaming diferente!"
+        vb, ib, _ = ObjLoaderSimple.load_obj_indexed(tmp.name)
+        assert vb.reshape(-1, 5)[ib].tobytes() == ref.tobytes(), "índices negativos: indexado diferente!"
+    finally:
+        os.remove(tmp.name)
+    print("índices negativos: serial, paralelo, streaming e indexado iguais")
+
+
+def _escala_paralela(origem, copias=64):
+    """
+    Tempo de load_obj_parallel() com 1, 2, 4, 8 e 16 processos sobre o OBJ replicado,
+    conferindo que o buffer é sempre idêntico ao de load_obj_numpy() — também num OBJ
+    com índices negativos (_indices_negativos).
+    """
+    import tempfile
+
+    _indices_negativos()
+
+    with open(origem, 'r') as f:
+        conteudo = f.read().rstrip('\n') + '\n'
+    with tempfile.NamedTemporaryFile('w', suffix='.obj', delete=False) as tmp:
+        for _ in range(copias):
+            tmp.write(conteudo)
+    try:
+        t0 = time.perf_counter()
+        ref, _ = ObjLoaderSimple.load_obj_numpy(tmp.name)
+        serial = time.perf_counter() - t0
+        print(f"{os.path.getsize(tmp.name) / 1e6:.1f} MB, {os.cpu_count()} CPUs — serial: {serial:.3f}s")
+        print(f"{'processos':>9} {'tempo':>8} {'ganho':>7}")
+        for workers in (1, 2, 4, 8, 16):
+            t0 = time.perf_counter()
+            buf, _ = ObjLoaderSimple.load_obj_parallel(tmp.name, workers, faixa_minima=1)
+            dt = time.perf_counter() - t0
+            assert buf.tobytes() == ref.tobytes(), "resultado paralelo diferente do serial!"
+            print(f"{workers:>9} {dt:>7.3f}s {serial / dt:>6.2f}x")
+    finally:
+        os.remove(tmp.name)
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import tempfile
+
+    if '--paralelo' in sys.argv:
+        sys.argv.remove('--paralelo')
+        _escala_paralela(sys.argv[1] if len(sys.argv) > 1 else "meshes/chibi.obj")
+        sys.exit()
+
+    if '--memoria' in sys.argv:
+        sys.argv.remove('--memoria')
+        _perfil_memoria(sys.argv[1] if len(sys.argv) > 1 else "meshes/chibi.obj")
+        sys.exit()
+
+    origem = sys.argv[1] if len(sys.argv) > 1 else "meshes/chibi.obj"
+    with open(origem, 'r') as f:
+        conteudo = f.read().rstrip('\n') + '\n'
+
+    # comentários no fim das linhas (e linhas só de comentário): mesmo buffer que load_obj()
+    with tempfile.NamedTemporaryFile('w', suffix='.obj', delete=False) as tmp:
+        tmp.write("# triângulo\nv 0 0 0 # a\nv 1 0 0\t# b\nv 0 1 0\nvt 0 0 # uv\nvt 1 0\nvt 0 1\n"
+                  "f 1/1 2/2 3/3 # face\nf 3/3 2/2 1/1 #\n")
+    try:
+        ref, _ = ObjLoaderSimple.load_obj(tmp.name)
+        buf, _ = ObjLoaderSimple.load_obj_numpy(tmp.name)
+        assert buf.tobytes() == ref.tobytes(), "comentários: buffers diferentes!"
+        vb, ib, _ = ObjLoaderSimple.load_obj_indexed(tmp.name)
+        assert vb.reshape(-1, 5)[ib].tobytes() == ref.tobytes(), "comentários: malha indexada diferente!"
+        stream = np.concatenate(list(ObjLoaderSimple.iter_obj_chunks(tmp.name)))
+        assert stream.tobytes() == ref.tobytes(), "comentários: streaming diferente!"
+    finally:
+        os.remove(tmp.name)
+
+    print(f"{'cópias':>7} {'tamanho':>10} {'load_obj':>10} {'numpy':>10} {'ganho':>7}")
+    for copias in (1, 4, 16, 64):
+        with tempfile.NamedTemporaryFile('w', suffix='.obj', delete=False) as tmp:
+            tmp.write(conteudo * copias)
+        try:
+            t0 = time.perf_counter()
+            ref, n_ref = ObjLoaderSimple.load_obj(tmp.name)
+            t1 = time.perf_counter()
+            buf, n_buf = ObjLoaderSimple.load_obj_numpy(tmp.name)
+            t2 = time.perf_counter()
+            assert n_ref == n_buf and ref.tobytes() == buf.tobytes(), "buffers diferentes!"
+            tamanho = os.path.getsize(tmp.name) / 1e6
+            print(f"{copias:>7} {tamanho:>8.1f}MB {t1 - t0:>9.3f}s {t2 - t1:>9.3f}s {(t1 - t0) / (t2 - t1):>6.1f}x")
+            stream = np.concatenate(list(ObjLoaderSimple.iter_obj_chunks(tmp.name, 4096, 1 << 16)))
+            assert stream.tobytes() == ref.tobytes(), "streaming diferente!"
+            assert ObjLoaderSimple.count_obj_vertices(tmp.name) == n_ref
+            if copias == 1:
+                vb, ib, n_ind = ObjLoaderSimple.load_obj_indexed(tmp.name)
+                assert vb.reshape(-1, 5)[ib].tobytes() == ref.tobytes(), "malha indexada diferente!"
+                print(f"  indexado: {vb.size // 5} vértices únicos de {n_ref} cantos "
+                      f"({(vb.nbytes + ib.nbytes) / 1e3:.0f} KB x {ref.nbytes / 1e3:.0f} KB)")
+        finally:
+            os.remove(tmp.name)
@@ -0,0 +1,372 @@
+# Profiler.py
+# Medição de tempo por escopo nomeado, na CPU e na GPU, com estatísticas e exportação
+#
+# O 'delta' do render loop diz quanto durou o quadro, mas não ONDE o tempo foi gasto.
+# Aqui cada trecho do quadro é envolvido num escopo com nome, e escopos podem ser aninhados:
+#
+#   perfil.inicio_quadro()                 # abre o escopo raiz "quadro"
+#   with perfil.escopo("camera"):
+#       ...
+#   with perfil.escopo("desenho"):
+#       perfil.abre("chibi"); ...; perfil.fecha()   # mesma coisa, sem o 'with'
+#   perfil.fim_quadro()
+#
+#   • CPU: time.perf_counter_ns() na abertura e no fechamento de cada escopo;
+#   • GPU: consultas GL_TIME_ELAPSED. Só uma pode estar ativa por vez, então um escopo
+#     aninhado encerra a consulta do pai e o pai abre outra quando o filho termina: o tempo
+#     de GPU do escopo vai da sua primeira à sua última consulta (filhos incluídos);
+#   • sem esperar a GPU: os resultados de um quadro só são lidos depois de 'atraso' quadros
+#     (duplo buffer com atraso=1), e só se GL_QUERY_RESULT_AVAILABLE já estiver pronto —
+#     senão ficam para o próximo quadro. As consultas são reaproveitadas num pool;
+#   • estatísticas: os últimos 'janela' quadros de cada nome (soma por quadro) → p50/p95/p99;
+#   • exportação: trace JSON do Chrome (chrome://tracing ou ui.perfetto.dev) e CSV;
+#   • desativado (ativo=False, o padrão), escopo() devolve um objeto fixo que não faz nada e
+#     abre()/fecha() retornam no primeiro 'if': o custo é o de uma chamada de método.
+#
+# No trace a GPU aparece numa linha própria. GL_TIME_ELAPSED mede durações, não instantes:
+# cada quadro da GPU é desenhado a partir do início do quadro na CPU, com as consultas em
+# sequência (sem os intervalos em que a GPU ficou parada).
+#
+# Funciona com qualquer driver com consultas de tempo (OpenGL 3.3), inclusive o Mesa
+# llvmpipe, para medições em CI sem GPU:
+#   LIBGL_ALWAYS_SOFTWARE=1 xvfb-run python Ex7_Carregando_Objetos_alterado.py \
+#       --replay voo.campath --perfil perfil.json
+# Sem suporte a consultas (glGenQueries falha), só o tempo de CPU é medido.
+
+import collections
+import json
+import os
+import time
+
+import numpy as np
+from OpenGL.GL import (
+    glGenQueries, glDeleteQueries, glBeginQuery, glEndQuery, glGetQueryObjectuiv, glGetQueryObjectui64v,
+    GL_TIME_ELAPSED, GL_QUERY_RESULT, GL_QUERY_RESULT_AVAILABLE
+)
+
+JANELA = 300          # quadros usados nos percentis
+ATRASO = 1            # quadros entre o fim de um quadro e a leitura das suas consultas
+HISTORICO = 36000     # quadros guardados para exportação (10 min a 60 Hz)
+
+
+class _Nulo:
+    """Escopo do profiler desativado: entra e sai sem fazer nada."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        return False
+
+
+NULO = _Nulo()
+
+
+class Profiler:
+    """
+    Uso:
+        perfil = Profiler(ativo=True)          # depois de criar o contexto OpenGL, se gpu=True
+        a cada quadro: inicio_quadro(), escopos, fim_quadro()
+        no fim: conclui(); perfil.resumo() / imprime_resumo(); exporta_trace(path); exporta_csv(path)
+        apaga() antes de destruir o contexto
+    """
+
+    def __init__(self, ativo=False, gpu=True, janela=JANELA, atraso=ATRASO, historico=HISTORICO):
+        self.ativo = ativo
+        self.gpu = gpu
+        self.atraso = atraso
+        self.origem = time.perf_counter_ns()
+        self.quadro = 0
+        self._nome = None          # nome passado a escopo(), aberto no __enter__
+        self._registros = []       # escopos do quadro atual: [nome, inicio_ns, fim_ns, pai]
+        self._consultas = []       # (registro, id da consulta), na ordem em que foram iniciadas
+        self._pilha = []           # registros abertos
+        self._pendentes = collections.deque()   # (quadro, registros, consultas) esperando a GPU
+        self._livres = []          # pool de consultas
+        self._todas = []
+        # por quadro resolvido: (quadro, registros, [gpu_inicio_ns, gpu_fim_ns] por registro, ou None)
+        self.historico = collections.deque(maxlen=historico)
+        self.cpu = collections.defaultdict(lambda: collections.deque(maxlen=janela))   # nome → ms por quadro
+        self.gpu_ms = collections.defaultdict(lambda: collections.deque(maxlen=janela))
+        self._saida = np.zeros(1, np.uint32)
+        self._resultado = np.zeros(1, np.uint64)
+
+    # ---- escopos ----
+
+    def escopo(self, nome):
+        """Context manager que mede o trecho com esse nome (NULO se desativado)."""
+        if not self.ativo:
+            return NULO
+        self._nome = nome
+        return self
+
+    def __enter__(self):
+        self.abre(self._nome)
+        return self
+
+    def __exit__(self, *excecao):
+        self.fecha()
+        return False
+
+    def abre(self, nome):
+        """Abre um escopo dentro do escopo aberto mais recente."""
+        if not self.ativo:
+            return
+        indice = len(self._registros)
+        pai = self._pilha[-1] if self._pilha else -1
+        if self.gpu:
+            if self._pilha:
+                glEndQuery(GL_TIME_ELAPSED)
+            self._inicia_consulta(indice)
+        self._pilha.append(indice)
+        self._registros.append([nome, time.perf_counter_ns(), 0, pai])
+
+    def fecha(self):
+        """Fecha o escopo aberto mais recente."""
+        if not self.ativo:
+            return
+        agora = time.perf_counter_ns()
+        self._registros[self._pilha.pop()][2] = agora
+        if self.gpu:
+            glEndQuery(GL_TIME_ELAPSED)
+            if self._pilha:
+                self._inicia_consulta(self._pilha[-1])
+
+    def _inicia_consulta(self, registro):
+        if not self._livres:
+            try:
+                consulta = int(glGenQueries(1))
+            except Exception:
+                # sem consultas de tempo no driver: segue medindo só a CPU
+                self.gpu = False
+                return
+            self._todas.append(consulta)
+            self._livres.append(consulta)
+        consulta = self._livres.pop()
+        glBeginQuery(GL_TIME_ELAPSED, consulta)
+        self._consultas.append((registro, consulta))
+
+    # ---- quadros ----
+
+    def inicio_quadro(self):
+        if self.ativo:
+            self.abre("quadro")
+
+    def fim_quadro(self):
+        """Fecha o escopo "quadro", guarda os tempos de CPU e lê as consultas já prontas."""
+        if not self.ativo:
+            return
+        self.fecha()
+        if self._pilha:
+            raise RuntimeError(f"escopo {self._registros[self._pilha[-1]][0]!r} aberto no fim do quadro")
+        registros, consultas = self._registros, self._consultas
+        self._registros, self._consultas = [], []
+
+        por_nome = collections.defaultdict(int)
+        for nome, inicio, fim, _ in registros:
+            por_nome[nome] += fim - inicio
+        for nome, ns in por_nome.items():
+            self.cpu[nome].append(ns * 1e-6)
+
+        if self.gpu and consultas:
+            self._pendentes.append((self.quadro, registros, consultas))
+        else:
+            self.historico.append((self.quadro, registros, None))
+        self.quadro += 1
+        self._resolve(espera=False)
+
+    def _resolve(self, espera):
+        """
+        Lê as consultas dos quadros pendentes, do mais antigo para o mais novo. Sem 'espera',
+        para no primeiro quadro recente demais ou ainda não terminado pela GPU.
+        """
+        while self._pendentes:
+            quadro, registros, consultas = self._pendentes[0]
+            if not espera:
+                if self.quadro - quadro <= self.atraso:
+                    return
+                # as consultas terminam em ordem: se a última está pronta, todas estão
+                glGetQueryObjectuiv(consultas[-1][1], GL_QUERY_RESULT_AVAILABLE, self._saida)
+                if not self._saida[0]:
+                    return
+            self._pendentes.popleft()
+
+            duracoes = np.empty(len(consultas), np.int64)
+            for k, (_, consulta) in enumerate(consultas):
+                glGetQueryObjectui64v(consulta, GL_QUERY_RESULT, self._resultado)
+                duracoes[k] = self._resultado[0]
+                self._livres.append(consulta)
+            # linha do tempo da GPU: as consultas uma depois da outra
+            # (o fim de um escopo é o fim da sua última consulta, depois das dos filhos)
+            fins = np.cumsum(duracoes)
+            inicios = fins - duracoes
+            gpu = [None] * len(registros)
+            for k, (registro, _) in enumerate(consultas):
+                if gpu[registro] is None:
+                    gpu[registro] = [inicios[k], fins[k]]
+                else:
+                    gpu[registro][1] = fins[k]
+
+            por_nome = collections.defaultdict(int)
+            for (nome, *_), intervalo in zip(registros, gpu):
+                if intervalo is not None:
+                    por_nome[nome] += intervalo[1] - intervalo[0]
+            for nome, ns in por_nome.items():
+                self.gpu_ms[nome].append(ns * 1e-6)
+            self.historico.append((quadro, registros, gpu))
+
+    def conclui(self):
+        """Espera a GPU e lê todas as consultas pendentes (no fim da medição)."""
+        self._resolve(espera=True)
+        self.historico = collections.deque(sorted(self.historico, key=lambda h: h[0]),
+                                           maxlen=self.historico.maxlen)
+
+    def apaga(self):
+        if self._todas:
+            glDeleteQueries(len(self._todas), self._todas)
+        self._todas, self._livres = [], []
+        self._pendentes.clear()
+
+    # ---- resultados ----
+
+    def resumo(self):
+        """{nome: {'cpu': (p50, p95, p99, média), 'gpu': (...) ou None}} em ms, na janela."""
+        def percentis(amostras):
+            if not amostras:
+                return None
+            a = np.fromiter(amostras, np.float64, len(amostras))
+            p50, p95, p99 = np.percentile(a, (50, 95, 99))
+            return p50, p95, p99, a.mean()
+
+        return {nome: {'cpu': percentis(self.cpu[nome]), 'gpu': percentis(self.gpu_ms.get(nome))}
+                for nome in self.cpu}
+
+    def imprime_resumo(self):
+        print(f"{'escopo':16s} {'CPU p50':>8s} {'p95':>7s} {'p99':>7s} | {'GPU p50':>8s} {'p95':>7s} {'p99':>7s} (ms)")
+        for nome, r in self.resumo().items():
+            gpu = "      —       —       —" if r['gpu'] is None else \
+                f"{r['gpu'][0]:8.3f} {r['gpu'][1]:7.3f} {r['gpu'][2]:7.3f}"
+            print(f"{nome:16s} {r['cpu'][0]:8.3f} {r['cpu'][1]:7.3f} {r['cpu'][2]:7.3f} | {gpu}")
+
+    def exporta_trace(self, path):
+        """Trace no formato de eventos do Chrome: CPU na linha 0, GPU na linha 1 (µs)."""
+        eventos = [{'name': 'thread_name', 'ph': 'M', 'pid': 0, 'tid': 0, 'args': {'name': 'CPU'}},
+                   {'name': 'thread_name', 'ph': 'M', 'pid': 0, 'tid': 1, 'args': {'name': 'GPU'}}]
+        for quadro, registros, gpu in self.historico:
+            base = registros[0][1] if registros else 0
+            for i, (nome, inicio, fim, _) in enumerate(registros):
+                eventos.append({'name': nome, 'cat': 'cpu', 'ph': 'X', 'pid': 0, 'tid': 0,
+                                'ts': (inicio - self.origem) / 1e3, 'dur': (fim - inicio) / 1e3,
+                                'args': {'quadro': quadro}})
+                if gpu is not None and gpu[i] is not None:
+                    eventos.append({'name': nome, 'cat': 'gpu', 'ph': 'X', 'pid': 0, 'tid': 1,
+                                    'ts': (base - self.origem + int(gpu[i][0])) / 1e3,
+                                    'dur': int(gpu[i][1] - gpu[i][0]) / 1e3,
+                                    'args': {'quadro': quadro}})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': eventos, 'displayTimeUnit': 'ms'}, f)
+
+    def exporta_csv(self, path):
+        """Uma linha por escopo por quadro; gpu_ms vazio se não medido."""
+        with open(path, 'w') as f:
+            f.write("quadro,escopo,pai,inicio_ms,cpu_ms,gpu_ms\n")
+            for quadro, registros, gpu in self.historico:
+                for i, (nome, inicio, fim, pai) in enumerate(registros):
+                    nome_pai = registros[pai][0] if pai >= 0 else ""
+                    gpu_ms = "" if gpu is None or gpu[i] is None else f"{(gpu[i][1] - gpu[i][0]) * 1e-6:.4f}"
+                    f.write(f"{quadro},{nome},{nome_pai},{(inicio - self.origem) * 1e-6:.4f},"
+                            f"{(fim - inicio) * 1e-6:.4f},{gpu_ms}\n")
+
+    def exporta(self, path):
+        """Trace em 'path' (.json) e CSV com o mesmo nome (.csv)."""
+        self.exporta_trace(path)
+        self.exporta_csv(os.path.splitext(path)[0] + ".csv")
+
+
+# ----------------------------------------
+# Teste e custo: escopos aninhados com consultas simuladas, e o custo por escopo
+# ----------------------------------------
+# Uso: python Profiler.py (sem contexto OpenGL: as consultas são simuladas, a GPU
+#      "termina" cada quadro três quadros depois)
+
+if __name__ == "__main__":
+    import tempfile
+
+    duracao = {}         # consulta → ns simulados
+    ativa = [None]
+    quadro_fim = {}      # consulta → quadro do profiler em que a GPU a termina
+    ids = iter(range(1, 1 << 30))
+
+    def glGenQueries(n):
+        return next(ids)
+
+    def glBeginQuery(alvo, consulta):
+        assert ativa[0] is None, "duas consultas GL_TIME_ELAPSED ativas"
+        ativa[0] = consulta
+        duracao[consulta] = 1000 * consulta % 7 + 500
+        quadro_fim[consulta] = perfil.quadro + 3
+
+    def glEndQuery(alvo):
+        assert ativa[0] is not None
+        ativa[0] = None
+
+    def glGetQueryObjectuiv(consulta, nome, saida):
+        saida[0] = perfil.quadro >= quadro_fim[consulta]
+
+    def glGetQueryObjectui64v(consulta, nome, saida):
+        saida[0] = duracao[consulta]
+
+    def glDeleteQueries(n, consultas):
+        pass
+
+    perfil = Profiler(ativo=True)
+    for q in range(20):
+        perfil.inicio_quadro()
+        with perfil.escopo("camera"):
+            pass
+        with perfil.escopo("desenho"):
+            for objeto in ("chibi", "gato"):
+                perfil.abre(objeto)
+                perfil.fecha()
+        perfil.fim_quadro()
+        # nunca espera: só quadros que a GPU (simulada) já terminou foram lidos
+        assert len(perfil.gpu_ms['quadro']) == max(0, q - 1)
+    assert ativa[0] is None
+    perfil.conclui()
+    assert len(perfil.gpu_ms['quadro']) == 20 and len(perfil._pendentes) == 0
+    # 5 escopos → 2 * 5 - 1 consultas por quadro, no máximo 4 quadros em voo: o pool é reaproveitado
+    assert len(perfil._todas) <= 9 * 4
+    # GPU: o escopo inclui os filhos; o quadro inclui tudo
+    _, registros, gpu = perfil.historico[-1]
+    nomes = [r[0] for r in registros]
+    desenho, chibi, gato = nomes.index("desenho"), nomes.index("chibi"), nomes.index("gato")
+    assert gpu[desenho][0] <= gpu[chibi][0] < gpu[gato][1] <= gpu[desenho][1] <= gpu[0][1]
+
+    with tempfile.TemporaryDirectory() as pasta:
+        perfil.exporta(os.path.join(pasta, "perfil.json"))
+        with open(os.path.join(pasta, "perfil.json")) as f:
+            eventos = json.load(f)['traceEvents']
+        with open(os.path.join(pasta, "perfil.csv")) as f:
+            linhas = f.read().splitlines()
+    assert sum(e.get('cat') == 'gpu' for e in eventos) == sum(e.get('cat') == 'cpu' for e in eventos) == 20 * 5
+    assert len(linhas) == 1 + 20 * 5
+    perfil.imprime_resumo()
+
+    # custo por escopo (só CPU), desativado e ativado
+    n = 200000
+    for ativo in (False, True):
+        p = Profiler(ativo=ativo, gpu=False)
+        t0 = time.perf_counter()
+        for k in range(n // 1000):
+            p.inicio_quadro()
+            for _ in range(1000):
+                with p.escopo("x"):
+                    pass
+            p.fim_quadro()
+        print(f"ativo={ativo!s:5s}: {(time.perf_counter() - t0) / n * 1e9:6.0f} ns por escopo")
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with NULO:
+            pass
+    print(f"laço vazio com 'with': {(time.perf_counter() - t0) / n * 1e9:6.0f} ns")
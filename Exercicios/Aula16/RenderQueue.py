@@ -0,0 +1,166 @@
+# RenderQueue.py
+# Fila de desenho do quadro, ordenada por estado (programa → textura → VAO)
+#
+# Cada troca de estado (glUseProgram, glBindTexture, glBindVertexArray) é uma chamada
+# Python → OpenGL e, no driver, uma validação a mais no próximo draw. Desenhando objeto por
+# objeto, na ordem em que aparecem na cena, o mesmo estado é vinculado de novo várias vezes.
+#
+# O render loop só ADICIONA os draws visíveis à fila (adiciona); executa() ordena pela
+# chave (programa, textura, VAO) — a troca de programa é a mais cara, a de VAO a mais
+# barata — e emite cada troca só quando o estado realmente muda. A matriz de modelo também
+# só é reenviada quando muda (submalhas do mesmo objeto compartilham a mesma matriz).
+#
+# O estado vinculado é esquecido a cada executa(): entre dois quadros outros códigos
+# (AssetLoader, TextureStreaming) vinculam texturas e VAOs por conta própria.
+#
+# Com executa(perfil) (um Profiler ativo), cada draw é medido num escopo com o 'nome' dado
+# em adiciona() — o nome do objeto, no Ex7.
+
+from OpenGL.GL import glBindTexture, glBindVertexArray, glUniformMatrix4fv, glDrawElements, \
+    glDrawElementsInstanced, GL_TEXTURE_2D, GL_TRIANGLES, GL_FALSE
+
+
+class RenderQueue:
+    """
+    Uso, a cada quadro:
+        fila.adiciona(programa, textura, vao, model, quantidade, tipo_indices, offset)
+        ...
+        estado = fila.executa()      # draws, triângulos e trocas de estado do quadro
+    'programa' é um ShaderProgram com o uniform 'model' (view/projection vêm do CameraUBO).
+    Com instancias=N o draw é um glDrawElementsInstanced de N cópias (ver Instancing.py).
+    'nome' identifica o draw no Profiler passado a executa().
+    """
+
+    def __init__(self):
+        self.itens = []
+        self.ultimo = None           # estatísticas do último executa()
+
+    def adiciona(self, programa, textura, vao, model, quantidade, tipo_indices, offset, instancias=None,
+                 nome=None):
+        """Um glDrawElements(GL_TRIANGLES, quantidade, tipo_indices, offset) com esse estado."""
+        self.itens.append((programa.programa, textura, vao, programa, model, quantidade, tipo_indices, offset,
+                           instancias, nome))
+
+    def __len__(self):
+        return len(self.itens)
+
+    def executa(self, perfil=None):
+        """
+        Ordena e desenha tudo que foi adicionado, esvaziando a fila. Retorna um dict com
+        draws, triângulos, trocas de programa/textura/VAO/modelo e 'evitadas': quantas
+        vinculações um laço sem ordenação nem cache faria a mais (3 por draw).
+        Com 'perfil' (Profiler ativo), cada draw, com as suas vinculações, é um escopo.
+        """
+        if perfil is not None and not perfil.ativo:
+            perfil = None
+        # ordenação estável: draws com o mesmo estado ficam na ordem em que foram adicionados
+        self.itens.sort(key=lambda item: item[:3])
+
+        programa_atual = textura_atual = vao_atual = model_atual = None
+        local_model = -1
+        draws = triangulos = 0
+        trocas_programa = trocas_textura = trocas_vao = trocas_model = 0
+        for programa_id, textura, vao, programa, model, quantidade, tipo_indices, offset, instancias, nome \
+                in self.itens:
+            if perfil is not None:
+                perfil.abre(nome)
+            if programa_id != programa_atual:
+                programa.usa()
+                local_model = programa['model']
+                programa_atual, model_atual = programa_id, None
+                trocas_programa += 1
+            if textura != textura_atual:
+                glBindTexture(GL_TEXTURE_2D, textura)
+                textura_atual = textura
+                trocas_textura += 1
+            if vao != vao_atual:
+                glBindVertexArray(vao)
+                vao_atual = vao
+                trocas_vao += 1
+            if model is not model_atual:
+                glUniformMatrix4fv(local_model, 1, GL_FALSE, model)
+                model_atual = model
+                trocas_model += 1
+            if instancias is None:
+                glDrawElements(GL_TRIANGLES, quantidade, tipo_indices, offset)
+                triangulos += quantidade // 3
+            else:
+                glDrawElementsInstanced(GL_TRIANGLES, quantidade, tipo_indices, offset, instancias)
+                triangulos += quantidade // 3 * instancias
+            draws += 1
+            if perfil is not None:
+                perfil.fecha()
+        self.itens.clear()
+
+        self.ultimo = {
+            'draws': draws,
+            'triangulos': triangulos,
+            'programas': trocas_programa,
+            'texturas': trocas_textura,
+            'vaos': trocas_vao,
+            'modelos': trocas_model,
+            'evitadas': 3 * draws - (trocas_programa + trocas_textura + trocas_vao),
+        }
+        return self.ultimo
+
+
+# ----------------------------------------
+# Teste: trocas de estado de uma cena sintética, com e sem ordenação
+# ----------------------------------------
+# Uso: python RenderQueue.py (sem contexto OpenGL: as chamadas GL são só contadas)
+
+if __name__ == "__main__":
+    import random
+
+    chamadas = {}
+
+    def contando(nome):
+        def f(*args):
+            chamadas[nome] = chamadas.get(nome, 0) + 1
+        return f
+
+    glBindTexture, glBindVertexArray = contando('glBindTexture'), contando('glBindVertexArray')
+    glUniformMatrix4fv, glDrawElements = contando('glUniformMatrix4fv'), contando('glDrawElements')
+
+    class ProgramaFalso:
+        def __init__(self, programa):
+            self.programa = programa
+
+        def usa(self):
+            contando('glUseProgram')()
+
+        def __getitem__(self, nome):
+            return 0
+
+    # 2 programas, 8 texturas, 20 malhas; 200 objetos com até 3 submalhas, em ordem aleatória
+    rng = random.Random(7)
+    programas = [ProgramaFalso(p) for p in (1, 2)]
+    objetos = []
+    for _ in range(200):
+        vao, programa, model = rng.randrange(20), rng.choice(programas), object()
+        for _ in range(rng.randint(1, 3)):
+            objetos.append((programa, rng.randrange(8), vao, model))
+    rng.shuffle(objetos)
+
+    # sem fila: vincula tudo a cada draw
+    for programa, textura, vao, model in objetos:
+        programa.usa()
+        glBindTexture(None, textura)
+        glBindVertexArray(vao)
+        glUniformMatrix4fv(0, 1, None, model)
+        glDrawElements(None, 3, None, None)
+    sem_fila, chamadas = chamadas, {}
+
+    fila = RenderQueue()
+    for programa, textura, vao, model in objetos:
+        fila.adiciona(programa, textura, vao, model, 3, None, None)
+    estado = fila.executa()
+    assert len(fila) == 0 and estado['draws'] == len(objetos) == chamadas['glDrawElements']
+    assert estado['programas'] == 2 and estado['texturas'] <= 2 * 8
+    assert chamadas['glUseProgram'] == estado['programas']
+    assert chamadas['glBindTexture'] == estado['texturas']
+    assert chamadas['glBindVertexArray'] == estado['vaos']
+
+    for nome in ('glUseProgram', 'glBindTexture', 'glBindVertexArray', 'glUniformMatrix4fv', 'glDrawElements'):
+        print(f"{nome:20s} sem fila {sem_fila[nome]:5d}   com fila {chamadas[nome]:5d}")
+    print(f"{estado['draws']} draws: {estado['evitadas']} vinculações evitadas")
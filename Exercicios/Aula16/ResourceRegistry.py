@@ -0,0 +1,238 @@
+# ResourceRegistry.py
+# Registro central de recursos da GPU (texturas, malhas) endereçados pelo CONTEÚDO do arquivo
+#
+# O mesmo arquivo pode aparecer em vários caminhos (textures/Cat_diffuse.jpg e
+# meshes/Cat/Cat_diffuse.jpg são idênticos byte a byte) e ser pedido por vários objetos ou
+# scripts. Sem um registro, cada pedido decodifica e envia a imagem de novo: mesma textura,
+# vários IDs OpenGL e várias cópias na memória de vídeo.
+#
+# Aqui cada recurso é identificado por uma chave:
+#   chave = SHA-1( SHA-1 do conteúdo do arquivo + parâmetros da conversão )
+# O primeiro pedido de uma chave cria o objeto OpenGL; os seguintes recebem o MESMO objeto
+# e só incrementam a contagem de referências. libera() decrementa, e quando a última
+# referência é solta o objeto é apagado da GPU (glDeleteTextures / glDeleteBuffers ...).
+#
+# O hash do arquivo é memorizado por (caminho, tamanho, mtime): calcular a chave de novo
+# para um arquivo que não mudou não relê o arquivo. chave() pode ser chamado nas threads do
+# AssetLoader; adquire() e libera() só na thread que tem o contexto OpenGL.
+
+import hashlib
+import json
+import os
+import threading
+
+from OpenGL.GL import glGenTextures, glDeleteTextures, glDeleteBuffers, glDeleteVertexArrays
+
+from MeshCache import MeshCache
+from TextureLoader import decode_texture, upload_texture
+
+
+class Recurso:
+    """Um objeto da GPU compartilhado: valor (ID OpenGL ou tupla de IDs), bytes e referências."""
+
+    __slots__ = ('chave', 'valor', 'bytes', 'refs', 'destroi')
+
+    def __init__(self, chave, valor, bytes, destroi):
+        self.chave = chave
+        self.valor = valor
+        self.bytes = bytes
+        self.refs = 1
+        self.destroi = destroi
+
+
+def bytes_textura(imagem):
+    """Bytes ocupados na GPU por uma imagem de decode_texture (todos os níveis)."""
+    return sum(nivel.nbytes for nivel in imagem[-1])
+
+
+def destroi_textura(textura):
+    glDeleteTextures([textura])
+
+
+def destroi_malha(valor):
+    """
+    valor = (vao, *buffers): o VAO e os buffers que pertencem ao recurso — (vao, vbo, ebo) de
+    uma malha, ou (vao_instancias, vbo_instancias) de um objeto instanciado no envia_objeto()
+    do Ex7 (o VBO/EBO da malha ficam com o recurso da malha).
+    """
+    vao, *buffers = valor
+    glDeleteVertexArrays(1, [vao])
+    glDeleteBuffers(len(buffers), buffers)
+
+
+class ResourceRegistry:
+    """
+    Recursos da GPU com contagem de referências, deduplicados pelo conteúdo de origem.
+
+    Uso:
+        chave = registro.chave_textura("textures/chibi.png")
+        recurso = registro.adquire(chave, cria, destroi_textura, tamanho)
+        glBindTexture(GL_TEXTURE_2D, recurso.valor)
+        ...
+        registro.libera(recurso)
+    """
+
+    def __init__(self):
+        self.recursos = {}           # chave → Recurso
+        self._hashes = {}            # caminho absoluto → (tamanho, mtime_ns, sha1)
+        self._trava = threading.Lock()
+        self.pedidos = 0             # chamadas a adquire()
+        self.acertos = 0             # ... atendidas por um recurso já existente
+        self.bytes_economizados = 0  # bytes que seriam enviados de novo sem o registro
+        self.bytes_liberados = 0
+
+    # ----------------------------------------
+    # Chaves (pode rodar em qualquer thread)
+    # ----------------------------------------
+
+    def hash_arquivo(self, path):
+        """SHA-1 do conteúdo, recalculado só quando o tamanho ou o mtime do arquivo mudam."""
+        caminho = os.path.abspath(path)
+        info = os.stat(caminho)
+        with self._trava:
+            memo = self._hashes.get(caminho)
+        if memo is not None and memo[:2] == (info.st_size, info.st_mtime_ns):
+            return memo[2]
+        sha1 = MeshCache.hash_arquivo(caminho)
+        with self._trava:
+            self._hashes[caminho] = (info.st_size, info.st_mtime_ns, sha1)
+        return sha1
+
+    def chave(self, path, parametros=None):
+        """Chave do recurso: conteúdo do arquivo + parâmetros da conversão (dict serializável em JSON)."""
+        h = hashlib.sha1()
+        h.update(self.hash_arquivo(path).encode('ascii'))
+        h.update(json.dumps(parametros or {}, sort_keys=True).encode('utf-8'))
+        return h.hexdigest()
+
+    def chave_textura(self, path, **parametros):
+        """Chave de uma textura decodificada com decode_texture(path, **parametros)."""
+        return self.chave(path, dict(parametros, tipo='textura'))
+
+    # ----------------------------------------
+    # Referências (só na thread do contexto OpenGL)
+    # ----------------------------------------
+
+    def procura(self, chave):
+        """Recurso já criado com essa chave (sem adquirir referência), ou None."""
+        return self.recursos.get(chave)
+
+    def adquire(self, chave, cria, destroi, tamanho=0):
+        """
+        Retorna o Recurso da chave com uma referência a mais. Se ainda não existir, chama
+        cria() para criar o objeto OpenGL; destroi(valor) será chamado quando a última
+        referência for liberada. 'tamanho' são os bytes do recurso na GPU (estatísticas).
+        """
+        self.pedidos += 1
+        recurso = self.recursos.get(chave)
+        if recurso is not None:
+            recurso.refs += 1
+            self.acertos += 1
+            self.bytes_economizados += recurso.bytes
+            return recurso
+        recurso = Recurso(chave, cria(), tamanho, destroi)
+        self.recursos[chave] = recurso
+        return recurso
+
+    def libera(self, recurso):
+        """Solta uma referência; na última, apaga o objeto da GPU. Retorna True se apagou."""
+        recurso.refs -= 1
+        if recurso.refs > 0:
+            return False
+        del self.recursos[recurso.chave]
+        recurso.destroi(recurso.valor)
+        self.bytes_liberados += recurso.bytes
+        return True
+
+    def libera_tudo(self):
+        """Apaga todos os recursos, independente das referências (ao fechar a janela)."""
+        for recurso in list(self.recursos.values()):
+            recurso.refs = 1
+            self.libera(recurso)
+
+    # ----------------------------------------
+    # Atalho para texturas (síncrono)
+    # ----------------------------------------
+
+    def textura(self, path, **parametros):
+        """
+        Textura de 'path' (decode_texture + upload_texture com os mesmos parâmetros),
+        decodificada e enviada só se nenhum arquivo de mesmo conteúdo já estiver na GPU.
+        Para carregar em outra thread, use chave() + decode_texture no pool e adquire()
+        no envio (ver envia_objeto no Ex7).
+        """
+        chave = self.chave_textura(path, **parametros)
+        recurso = self.procura(chave)
+        if recurso is not None:
+            return self.adquire(chave, None, destroi_textura)
+        imagem = decode_texture(path, **parametros)
+        return self.adquire(chave, lambda: upload_texture(imagem, glGenTextures(1)),
+                            destroi_textura, bytes_textura(imagem))
+
+    def estatisticas(self):
+        """Resumo: recursos vivos, referências, acertos e bytes economizados/residentes."""
+        return {
+            'recursos': len(self.recursos),
+            'referencias': sum(r.refs for r in self.recursos.values()),
+            'pedidos': self.pedidos,
+            'acertos': self.acertos,
+            'bytes_residentes': sum(r.bytes for r in self.recursos.values()),
+            'bytes_economizados': self.bytes_economizados,
+            'bytes_liberados': self.bytes_liberados,
+        }
+
+
+# Registro compartilhado por todos os módulos e scripts do mesmo processo
+registro = ResourceRegistry()
+
+
+# ----------------------------------------
+# Demonstração: texturas repetidas em caminhos diferentes
+# ----------------------------------------
+# Uso: python ResourceRegistry.py (cria uma janela oculta para ter um contexto OpenGL)
+
+if __name__ == "__main__":
+    import glob
+    import glfw
+
+    if not glfw.init():
+        raise RuntimeError("Falha ao inicializar GLFW")
+    glfw.window_hint(glfw.VISIBLE, glfw.FALSE)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MAJOR, 4)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, 0)
+    glfw.window_hint(glfw.OPENGL_PROFILE, glfw.OPENGL_CORE_PROFILE)
+    janela = glfw.create_window(64, 64, "registro", None, None)
+    if not janela:
+        glfw.terminate()
+        raise RuntimeError("Falha ao criar janela GLFW")
+    glfw.make_context_current(janela)
+
+    caminhos = sorted(glob.glob("textures/*.png") + glob.glob("textures/*.jpg") + glob.glob("meshes/*/*.jpg"))
+    # cada caminho pedido por dois "objetos"
+    recursos = [registro.textura(c) for c in caminhos for _ in range(2)]
+    assert all(a is b for a, b in zip(recursos[::2], recursos[1::2]))
+    ids = {c: r.valor for c, r in zip(caminhos, recursos[::2])}
+    for c in caminhos:
+        print(f"{c:32s} → textura {ids[c]}")
+    e = registro.estatisticas()
+    print(f"{len(recursos)} pedidos, {e['recursos']} texturas na GPU ({e['bytes_residentes'] / 1e6:.1f} MB), "
+          f"{e['acertos']} reaproveitadas: {e['bytes_economizados'] / 1e6:.1f} MB não enviados de novo")
+
+    # caminhos com o mesmo conteúdo compartilham o mesmo objeto OpenGL; conteúdos
+    # diferentes têm objetos diferentes (e todos são IDs válidos, diferentes de 0)
+    mesmo = {}
+    for c in caminhos:
+        mesmo.setdefault(registro.hash_arquivo(c), set()).add(ids[c])
+    assert all(ids.values()), "textura sem ID: o contexto OpenGL não está ativo?"
+    assert all(len(v) == 1 for v in mesmo.values())
+    assert len(set(ids.values())) == len(mesmo) == e['recursos']
+    assert len(mesmo) < len(caminhos), "nenhum arquivo repetido entre os caminhos"
+
+    # a textura só é apagada quando a última referência é liberada
+    for r in recursos[:-1]:
+        registro.libera(r)
+    assert registro.estatisticas()['recursos'] == 1
+    registro.libera(recursos[-1])
+    assert registro.estatisticas()['recursos'] == 0
+    print(f"todas liberadas: {registro.bytes_liberados / 1e6:.1f} MB apagados da GPU")
+    glfw.terminate()
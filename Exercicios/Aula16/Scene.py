@@ -0,0 +1,205 @@
+# Scene.py
+# Descrição da cena em arquivo (JSON): malhas, texturas e transformações de cada objeto
+#
+# Em vez de uma função de carregamento, um punhado de variáveis globais e um bloco no
+# render loop para cada objeto, o Ex7 lê a lista de objetos de um arquivo como scene.json:
+#
+#   {
+#     "objetos": [
+#       {"nome": "chibi", "malha": "meshes/chibi.obj", "textura": "textures/chibi.png", "lod": true},
+#       {"nome": "gato",  "malha": "meshes/Cat/Cat.obj", "textura": "textures/Cat_diffuse.jpg",
+#        "posicao": [6, 0, 0], "rotacao": [90, 0, 0], "escala": [0.2, 0.2, 0.2]}
+#     ]
+#   }
+#
+# Campos de cada objeto:
+#   nome    : identificador (único na cena)
+#   malha   : arquivo .obj; os materiais (.mtl) com map_Kd definem a textura de cada submalha
+#   textura : textura das submalhas sem map_Kd (opcional)
+#   lod     : true → cadeia de LODs (MeshLOD), escolhida pelo tamanho na tela; ignora os materiais
+#   posicao, rotacao (graus, em torno de x, y e z), escala : transformação (padrões: 0, 0, 1)
+#   pai     : nome de um objeto declarado ANTES; a transformação passa a ser relativa à dele
+#             (ver TransformHierarchy.py)
+#   instancias : lista de {"posicao", "rotacao", "escala"}: uma cópia da malha em cada uma,
+#                desenhadas num único draw instanciado (ver Instancing.py)
+#   grade      : {"colunas", "linhas", "espacamento"}: cópias numa grade no plano y = 0
+#                (pode ser combinada com 'instancias')
+# A transformação do objeto (com a dos pais) é aplicada primeiro; a de cada instância depois,
+# já no mundo.
+#
+# Caminhos relativos são relativos à pasta do arquivo da cena, como os do .mtl.
+# A matriz de modelo aplica escala, depois rotação (x, depois y, depois z), depois translação.
+
+import json
+import os
+
+import numpy as np
+import pyrr
+
+from TransformHierarchy import TransformHierarchy, matrizes_modelo, grade
+
+CAMPOS = {'nome', 'malha', 'textura', 'lod', 'posicao', 'rotacao', 'escala', 'pai', 'instancias', 'grade'}
+CAMPOS_INSTANCIA = {'posicao', 'rotacao', 'escala'}
+
+
+def matriz_modelo(posicao=(0.0, 0.0, 0.0), rotacao=(0.0, 0.0, 0.0), escala=(1.0, 1.0, 1.0)):
+    """
+    Matriz de modelo (pyrr, vetores-linha): p' = p @ S @ Rx @ Ry @ Rz @ T.
+    'rotacao' em graus.
+    """
+    rx, ry, rz = np.radians(np.asarray(rotacao, dtype=np.float64))
+    model = pyrr.matrix44.create_from_scale(pyrr.Vector3(escala), dtype=np.float32)
+    for rotacao_eixo in (pyrr.matrix44.create_from_x_rotation(rx, dtype=np.float32),
+                         pyrr.matrix44.create_from_y_rotation(ry, dtype=np.float32),
+                         pyrr.matrix44.create_from_z_rotation(rz, dtype=np.float32)):
+        model = pyrr.matrix44.multiply(model, rotacao_eixo)
+    translacao = pyrr.matrix44.create_from_translation(pyrr.Vector3(posicao), dtype=np.float32)
+    return pyrr.matrix44.multiply(model, translacao).astype(np.float32)
+
+
+class ObjetoCena:
+    """
+    Um objeto da cena: a descrição lida do arquivo e, depois do envio para a GPU, o estado
+    usado pelo render loop (preenchido por quem envia; vao fica None até lá).
+    A transformação é o nó 'no' da TransformHierarchy da cena; 'model' é a matriz de mundo dele.
+    """
+
+    __slots__ = ('nome', 'malha', 'textura', 'lod', 'hierarquia', 'no', 'instancias_locais', 'instancias',
+                 'vao', 'tipo_indices', 'dequant', 'model_gpu', 'partes', 'aabb_local', 'esfera_local',
+                 'aabb', 'esfera', 'buffer_instancias', 'versao')
+
+    def __init__(self, nome, malha, textura, lod, hierarquia, no, instancias_locais=None):
+        self.nome = nome
+        self.malha = malha
+        self.textura = textura
+        self.lod = lod
+        self.hierarquia = hierarquia
+        self.no = no
+        self.instancias_locais = instancias_locais  # (N, 4, 4) transformação de cada cópia, ou None
+        self.instancias = None       # (N, 4, 4) model @ instância de cada cópia (no mundo)
+
+        self.vao = None              # VAO da malha (None enquanto não foi enviada)
+        self.tipo_indices = None     # GL_UNSIGNED_SHORT ou GL_UNSIGNED_INT
+        self.dequant = None          # matriz de dequantização das posições (VertexFormat)
+        self.model_gpu = None        # dequantização @ model, enviada ao shader
+        self.partes = []             # [textura, [(offset em bytes no EBO, num_indices) por LOD]] por submalha
+        self.aabb_local = None       # AABB (k, 2, 3) de cada parte, no espaço do objeto
+        self.esfera_local = None     # [cx, cy, cz, raio] no espaço do objeto
+        self.aabb = np.zeros((0, 2, 3), np.float32)  # AABB (k, 2, 3) de cada parte (todas as cópias), no mundo
+        self.esfera = None           # [cx, cy, cz, raio] no espaço do MUNDO
+        self.buffer_instancias = None  # Instancing.InstanceBuffer dos instanciados
+        self.versao = -1             # hierarquia.versao[no] quando aabb/esfera/model_gpu foram calculados
+
+    @property
+    def model(self):
+        """Matriz de mundo (4, 4) do objeto, mantida pela hierarquia (depois de atualiza())."""
+        return self.hierarquia.mundo[self.no]
+
+    def __repr__(self):
+        return f"ObjetoCena({self.nome!r}, {self.malha!r})"
+
+
+def _instancias(path, k, item):
+    """Matrizes (N, 4, 4) das cópias de um objeto com 'instancias' e/ou 'grade', ou None."""
+    if 'instancias' not in item and 'grade' not in item:
+        return None
+    lista = item.get('instancias', [])
+    for instancia in lista:
+        desconhecidos = set(instancia) - CAMPOS_INSTANCIA
+        if desconhecidos:
+            raise ValueError(f"{path}: objeto {k}: campos de instância desconhecidos {sorted(desconhecidos)}")
+    posicoes = [i.get('posicao', (0.0, 0.0, 0.0)) for i in lista]
+    rotacoes = [i.get('rotacao', (0.0, 0.0, 0.0)) for i in lista]
+    escalas = [i.get('escala', (1.0, 1.0, 1.0)) for i in lista]
+    if 'grade' in item:
+        g = item['grade']
+        pontos = grade(int(g['colunas']), int(g['linhas']), float(g['espacamento']))
+        posicoes += pontos.tolist()
+        rotacoes += [(0.0, 0.0, 0.0)] * len(pontos)
+        escalas += [(1.0, 1.0, 1.0)] * len(pontos)
+    if not posicoes:
+        raise ValueError(f"{path}: objeto {k}: nenhuma instância")
+    return matrizes_modelo(posicoes, rotacoes, escalas)
+
+
+def carrega_cena(path, hierarquia=None):
+    """
+    Lê o arquivo da cena e retorna a lista de ObjetoCena (ValueError se for inválido).
+    Cada objeto vira um nó de 'hierarquia' (uma nova TransformHierarchy se não for dada),
+    já atualizada: os 'model' dos objetos estão prontos.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+    pasta = os.path.dirname(path)
+    hierarquia = TransformHierarchy() if hierarquia is None else hierarquia
+    objetos, nos = [], {}
+    for k, item in enumerate(dados.get('objetos', [])):
+        desconhecidos = set(item) - CAMPOS
+        if desconhecidos:
+            raise ValueError(f"{path}: objeto {k}: campos desconhecidos {sorted(desconhecidos)}")
+        if 'nome' not in item or 'malha' not in item:
+            raise ValueError(f"{path}: objeto {k}: 'nome' e 'malha' são obrigatórios")
+        if item['nome'] in nos:
+            raise ValueError(f"{path}: nome repetido {item['nome']!r}")
+        if 'pai' in item and item['pai'] not in nos:
+            raise ValueError(f"{path}: objeto {k}: pai {item['pai']!r} não foi declarado antes")
+        no = hierarquia.adiciona(nos[item['pai']] if 'pai' in item else -1,
+                                 item.get('posicao', (0.0, 0.0, 0.0)),
+                                 item.get('rotacao', (0.0, 0.0, 0.0)),
+                                 item.get('escala', (1.0, 1.0, 1.0)))
+        nos[item['nome']] = no
+        textura = item.get('textura')
+        objetos.append(ObjetoCena(
+            item['nome'],
+            os.path.join(pasta, item['malha']),
+            os.path.join(pasta, textura) if textura else None,
+            bool(item.get('lod', False)),
+            hierarquia, no,
+            _instancias(path, k, item)))
+
+    hierarquia.atualiza()
+    for objeto in objetos:
+        if objeto.instancias_locais is not None:
+            objeto.instancias = np.matmul(objeto.model, objeto.instancias_locais)
+    return objetos
+
+
+# ----------------------------------------
+# Teste: scene.json descreve a mesma cena que o Ex7 montava à mão
+# ----------------------------------------
+# Uso: python Scene.py [arquivo.json]
+
+if __name__ == "__main__":
+    import sys
+
+    cena = carrega_cena(sys.argv[1] if len(sys.argv) > 1 else "scene.json")
+    for objeto in cena:
+        copias = "" if objeto.instancias is None else f" ({len(objeto.instancias)} instâncias)"
+        print(f"{objeto.nome:8s} {objeto.malha:24s} textura={objeto.textura} lod={objeto.lod} "
+              f"origem → {objeto.model[3, :3]}{copias}")
+
+    if len(sys.argv) == 1:
+        # matriz que o Ex7 montava para o gato: multiply(trans(30), multiply(rot_x(90), escala(0.2)))
+        antiga = pyrr.matrix44.multiply(
+            pyrr.matrix44.create_from_translation(pyrr.Vector3([30.0, 0.0, 0.0])),
+            pyrr.matrix44.multiply(pyrr.matrix44.create_from_x_rotation(np.radians(90)),
+                                   pyrr.matrix44.create_from_scale(pyrr.Vector3([0.2, 0.2, 0.2]))))
+        gato = {o.nome: o for o in cena}['gato']
+        assert np.allclose(gato.model, antiga, atol=1e-6)
+        assert np.array_equal({o.nome: o for o in cena}['chibi'].model, np.identity(4))
+
+        # objeto filho: transformação relativa à do pai
+        import tempfile
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump({'objetos': [
+                {'nome': 'base', 'malha': 'a.obj', 'posicao': [10, 0, 0], 'rotacao': [0, 90, 0]},
+                {'nome': 'topo', 'malha': 'a.obj', 'pai': 'base', 'posicao': [0, 0, 5], 'escala': [2, 2, 2]},
+            ]}, f)
+        base, topo = carrega_cena(f.name)
+        os.unlink(f.name)
+        esperado = pyrr.matrix44.multiply(matriz_modelo((0, 0, 5), escala=(2, 2, 2)),
+                                          matriz_modelo((10, 0, 0), (0, 90, 0)))
+        assert np.allclose(topo.model, esperado, atol=1e-5)
+        base.hierarquia.define(base.no, posicao=(0, 0, 0))
+        assert set(base.hierarquia.atualiza().tolist()) == {base.no, topo.no}
+        print("OK")
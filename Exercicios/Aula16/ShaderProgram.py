@@ -0,0 +1,231 @@
+# ShaderProgram.py
+# Programa de shaders com os uniforms em cache + bloco de uniforms da câmera (UBO std140)
+#
+# glGetUniformLocation procura o nome do uniform no programa (comparação de strings no
+# driver); chamá-la a cada quadro, para cada objeto, é trabalho repetido — a localização
+# não muda depois do link. ShaderProgram consulta todos os uniforms ativos UMA vez, logo
+# depois do link, e os guarda num dicionário: programa['model'].
+#
+# view e projection são iguais para todos os objetos (e todos os programas) do quadro.
+# Em vez de enviá-las com glUniformMatrix4fv para cada objeto, ficam num uniform buffer
+# object (UBO) com layout std140, ligado a um ponto fixo (PONTO_CAMERA): CameraUBO escreve
+# o buffer uma vez por quadro (e só se a câmera mudou) e todo programa que declara o bloco
+# BLOCO_CAMERA lê dele. Por objeto sobram só a matriz de modelo e o draw.
+#
+# Layout std140 do bloco (208 bytes): mat4 ocupa 64 bytes (4 colunas vec4), vec4 16 bytes.
+# As matrizes do pyrr (vetores-linha) têm na memória exatamente a ordem por colunas que o
+# GLSL espera, como no glUniformMatrix4fv(..., GL_FALSE, ...) usado nos exemplos.
+
+import numpy as np
+import OpenGL.GL.shaders
+from OpenGL.GL import (
+    glUseProgram, glGetProgramiv, glGetActiveUniform, glGetUniformLocation,
+    glGetUniformBlockIndex, glUniformBlockBinding,
+    glGenBuffers, glBindBuffer, glBufferData, glBufferSubData, glBindBufferBase, glDeleteBuffers,
+    GL_ACTIVE_UNIFORMS, GL_INVALID_INDEX, GL_UNIFORM_BUFFER, GL_DYNAMIC_DRAW,
+    GL_VERTEX_SHADER, GL_FRAGMENT_SHADER
+)
+
+# Ponto de ligação (binding point) do bloco da câmera, comum a todos os programas
+PONTO_CAMERA = 0
+
+# Declaração do bloco, para colar nos shaders logo depois do #version
+BLOCO_CAMERA = """
+layout(std140) uniform Camera {
+    mat4 view;              // matriz de visualização
+    mat4 projection;        // matriz de projeção
+    mat4 view_projection;   // projection * view (já multiplicadas na CPU, uma vez por quadro)
+    vec4 camera_pos;        // posição da câmera no mundo (w = 1)
+};
+"""
+
+
+class ShaderProgram:
+    """
+    Compila e linka o programa e guarda a localização de todos os uniforms ativos.
+
+    Uso:
+        programa = ShaderProgram(vertex_src, fragment_src)
+        programa.usa()
+        glUniformMatrix4fv(programa['model'], 1, GL_FALSE, model)
+    """
+
+    def __init__(self, vertex_src, fragment_src):
+        vs = OpenGL.GL.shaders.compileShader(vertex_src, GL_VERTEX_SHADER)
+        fs = OpenGL.GL.shaders.compileShader(fragment_src, GL_FRAGMENT_SHADER)
+        self.programa = OpenGL.GL.shaders.compileProgram(vs, fs)
+
+        # todos os uniforms ativos (os membros de blocos têm localização -1 e ficam de fora)
+        self.uniforms = {}
+        for i in range(glGetProgramiv(self.programa, GL_ACTIVE_UNIFORMS)):
+            nome = glGetActiveUniform(self.programa, i)[0]
+            nome = nome.decode() if isinstance(nome, bytes) else str(nome)
+            local = glGetUniformLocation(self.programa, nome)
+            if local < 0:
+                continue
+            self.uniforms[nome] = local
+            if nome.endswith('[0]'):
+                self.uniforms[nome[:-3]] = local       # arrays: 'luzes' e 'luzes[0]'
+
+        # bloco da câmera, se o programa o declara
+        bloco = glGetUniformBlockIndex(self.programa, "Camera")
+        if bloco != GL_INVALID_INDEX:
+            glUniformBlockBinding(self.programa, bloco, PONTO_CAMERA)
+
+    def __getitem__(self, nome):
+        """Localização do uniform (KeyError se não existir ou o compilador o removeu)."""
+        return self.uniforms[nome]
+
+    def local(self, nome):
+        """Localização do uniform, ou -1 (ignorado pelos glUniform*) se não estiver ativo."""
+        return self.uniforms.get(nome, -1)
+
+    def usa(self):
+        glUseProgram(self.programa)
+
+
+class CameraUBO:
+    """Buffer std140 do bloco Camera, ligado a PONTO_CAMERA; escrito no máximo uma vez por quadro."""
+
+    TAMANHO = 3 * 64 + 16
+
+    def __init__(self, ponto=PONTO_CAMERA):
+        self.dados = np.zeros(self.TAMANHO // 4, dtype=np.float32)
+        self.view = self.dados[0:16].reshape(4, 4)
+        self.projection = self.dados[16:32].reshape(4, 4)
+        self.view_projection = self.dados[32:48].reshape(4, 4)
+        self.camera_pos = self.dados[48:52]
+        self.versao = None           # Camera.versao do último envio
+
+        self.ubo = glGenBuffers(1)
+        glBindBuffer(GL_UNIFORM_BUFFER, self.ubo)
+        glBufferData(GL_UNIFORM_BUFFER, self.TAMANHO, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+        glBindBufferBase(GL_UNIFORM_BUFFER, ponto, self.ubo)
+
+    def escreve(self, view, projection, posicao, view_projection=None):
+        """Copia as matrizes (pyrr) para o buffer e envia os 208 bytes numa chamada só."""
+        self.view[:] = view
+        self.projection[:] = projection
+        if view_projection is None:
+            np.matmul(self.view, self.projection, out=self.view_projection)
+        else:
+            self.view_projection[:] = view_projection
+        self.camera_pos[:3] = posicao
+        self.camera_pos[3] = 1.0
+        glBindBuffer(GL_UNIFORM_BUFFER, self.ubo)
+        glBufferSubData(GL_UNIFORM_BUFFER, 0, self.dados.nbytes, self.dados)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+
+    def atualiza(self, camera):
+        """Envia os dados da Camera só se ela mudou desde o último envio. Retorna True se enviou."""
+        view = camera.get_view_matrix()          # aplica o mouse pendente (pode mudar a versão)
+        if camera.versao == self.versao:
+            return False
+        self.escreve(view, camera.get_projection_matrix(), camera.camera_pos,
+                     camera.get_view_projection_matrix())
+        self.versao = camera.versao
+        return True
+
+    def apaga(self):
+        glDeleteBuffers(1, [self.ubo])
+
+
+# ----------------------------------------
+# Benchmark: chamadas Python → OpenGL por quadro
+# ----------------------------------------
+# Uso: python ShaderProgram.py
+# Janela oculta (funciona com LIBGL_ALWAYS_SOFTWARE=1 xvfb-run). Quadros com N objetos:
+#   antes : 3 glGetUniformLocation + 3 glUniformMatrix4fv + draw por objeto (como o Ex7 fazia)
+#   depois: UBO escrito uma vez por quadro + glUniformMatrix4fv(model) + draw por objeto
+
+if __name__ == "__main__":
+    import time
+    import glfw
+    from OpenGL.GL import (glGenVertexArrays, glBindVertexArray, glDrawArrays, glUniformMatrix4fv,
+                           glFinish, GL_TRIANGLES, GL_FALSE)
+    from Camera import Camera
+
+    QUADROS, OBJETOS = 200, 50
+
+    if not glfw.init():
+        raise RuntimeError("Falha ao inicializar GLFW")
+    glfw.window_hint(glfw.VISIBLE, glfw.FALSE)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MAJOR, 4)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, 0)
+    glfw.window_hint(glfw.OPENGL_PROFILE, glfw.OPENGL_CORE_PROFILE)
+    janela = glfw.create_window(64, 64, "uniforms", None, None)
+    if not janela:
+        glfw.terminate()
+        raise RuntimeError("Falha ao criar janela GLFW")
+    glfw.make_context_current(janela)
+
+    fragment_src = """#version 400
+        out vec4 FragColor;
+        void main() { FragColor = vec4(1.0); }"""
+    antigo = ShaderProgram("""#version 400
+        layout(location = 0) in vec3 in_pos;
+        uniform mat4 model;
+        uniform mat4 view;
+        uniform mat4 projection;
+        void main() { gl_Position = projection * view * model * vec4(in_pos, 1.0); }""", fragment_src)
+    novo = ShaderProgram("#version 400\n" + BLOCO_CAMERA + """
+        layout(location = 0) in vec3 in_pos;
+        uniform mat4 model;
+        void main() { gl_Position = view_projection * model * vec4(in_pos, 1.0); }""", fragment_src)
+    ubo = CameraUBO()
+    vao = glGenVertexArrays(1)
+    glBindVertexArray(vao)
+
+    cam = Camera()
+    modelos = [np.identity(4, dtype=np.float32) for _ in range(OBJETOS)]
+    for k, m in enumerate(modelos):
+        m[3, 0] = k
+
+    def quadro_antes(k):
+        cam.process_mouse_movement(1.0, 0.0)
+        view, projection = cam.get_view_matrix(), cam.get_projection_matrix()
+        glUseProgram(antigo.programa)
+        for m in modelos:
+            glUniformMatrix4fv(glGetUniformLocation(antigo.programa, "model"), 1, GL_FALSE, m)
+            glUniformMatrix4fv(glGetUniformLocation(antigo.programa, "view"), 1, GL_FALSE, view)
+            glUniformMatrix4fv(glGetUniformLocation(antigo.programa, "projection"), 1, GL_FALSE, projection)
+            glDrawArrays(GL_TRIANGLES, 0, 3)
+
+    def quadro_depois(k):
+        cam.process_mouse_movement(1.0, 0.0)
+        novo.usa()
+        ubo.atualiza(cam)
+        local_model = novo['model']
+        for m in modelos:
+            glUniformMatrix4fv(local_model, 1, GL_FALSE, m)
+            glDrawArrays(GL_TRIANGLES, 0, 3)
+
+    # conta as chamadas trocando as funções GL deste módulo por versões que contam
+    chamadas = {}
+
+    def contando(nome, funcao):
+        def f(*args):
+            chamadas[nome] = chamadas.get(nome, 0) + 1
+            return funcao(*args)
+        return f
+
+    for nome in [n for n in list(globals()) if n.startswith('gl') and n != 'glFinish' and callable(globals()[n])]:
+        globals()[nome] = contando(nome, globals()[nome])
+
+    for rotulo, quadro in (("antes", quadro_antes), ("depois", quadro_depois)):
+        chamadas.clear()
+        glFinish()
+        t0 = time.perf_counter()
+        for k in range(QUADROS):
+            quadro(k)
+        glFinish()
+        t1 = time.perf_counter()
+        total = sum(chamadas.values())
+        detalhe = ", ".join(f"{n} {c / QUADROS:g}" for n, c in sorted(chamadas.items()))
+        print(f"{rotulo:6s}: {total / QUADROS:6.1f} chamadas GL/quadro "
+              f"({total / QUADROS / OBJETOS:.2f} por objeto), {(t1 - t0) / QUADROS * 1e3:.2f} ms/quadro")
+        print(f"        {detalhe}")
+
+    ubo.apaga()
+    glfw.terminate()
@@ -0,0 +1,267 @@
+# TextureAtlas.py
+# Atlas de texturas: várias texturas em uma mesma "página", para desenhar vários objetos
+# com um único glBindTexture e um único glDrawElements
+#
+# Cada objeto com textura própria custa um bind e um draw por quadro. Se as texturas de
+# vários objetos estiverem lado a lado em uma textura maior (a página do atlas) e as UVs de
+# cada malha forem remapeadas para a sua região, os objetos estáticos que usam a mesma
+# página podem ser juntados em um único VBO/EBO (lote) e desenhados de uma vez.
+#
+# Empacotamento: algoritmo "skyline" (linha do horizonte). A página guarda o contorno
+# superior do que já foi colocado, como uma lista de segmentos (x, y, largura); cada
+# retângulo vai para a posição em que o seu topo fica mais baixo. As texturas são inseridas
+# da mais alta para a mais baixa.
+#
+# Mipmaps sem "vazamento" entre texturas vizinhas:
+#   • gutter (margem): cada textura é cercada por 'gutter' texels copiados da borda oposta
+#     (como GL_REPEAT faria), então a filtragem bilinear perto da borda lê a cor certa;
+#   • alinhamento: posições e tamanhos são múltiplos de 'alinhamento' texels. Com gutter e
+#     alinhamento = 2^k, os níveis de mipmap 0..k nunca misturam texels de texturas diferentes.
+# As UVs precisam estar em [0, 1] (o atlas não consegue repetir uma textura dentro da região).
+
+import collections
+
+import numpy as np
+
+# Região de uma textura no atlas (em texels da página, sem o gutter)
+Regiao = collections.namedtuple('Regiao', 'pagina x y largura altura')
+
+
+class _Skyline:
+    """Uma página sendo empacotada: contorno superior como lista de [x, y, largura]."""
+
+    def __init__(self, largura, altura):
+        self.largura, self.altura = largura, altura
+        self.segmentos = [[0, 0, largura]]
+
+    def procura(self, w, h):
+        """Melhor posição (x, y) para um retângulo w x h — menor topo, depois menor x — ou None."""
+        melhor = None
+        for i, (x, _, _) in enumerate(self.segmentos):
+            if x + w > self.largura:
+                break
+            # o retângulo apoia no segmento mais alto dentre os que ele cobre
+            y, restante, j = 0, w, i
+            while restante > 0:
+                y = max(y, self.segmentos[j][1])
+                restante -= self.segmentos[j][2]
+                j += 1
+            if y + h <= self.altura and (melhor is None or (y + h, x) < (melhor[1] + h, melhor[0])):
+                melhor = (x, y)
+        return melhor
+
+    def insere(self, x, y, w, h):
+        """Eleva o contorno em [x, x + w) até y + h."""
+        novos = []
+        for sx, sy, sw in self.segmentos:
+            fim = sx + sw
+            if fim <= x or sx >= x + w:
+                novos.append([sx, sy, sw])
+                continue
+            if sx < x:
+                novos.append([sx, sy, x - sx])
+            if fim > x + w:
+                novos.append([x + w, sy, fim - (x + w)])
+        novos.append([x, y + h, w])
+        novos.sort()
+        # junta segmentos vizinhos da mesma altura
+        self.segmentos = [novos[0]]
+        for s in novos[1:]:
+            if s[1] == self.segmentos[-1][1]:
+                self.segmentos[-1][2] += s[2]
+            else:
+                self.segmentos.append(s)
+
+    def usado(self):
+        """(largura, altura) efetivamente ocupadas."""
+        return (max(x + w for x, y, w in self.segmentos if y > 0),
+                max(y for _, y, _ in self.segmentos))
+
+
+class Atlas:
+    """
+    Resultado do empacotamento.
+        paginas  : lista de arrays RGBA uint8 (altura, largura, 4), na orientação de
+                   TextureLoader.decode_texture (já invertidos para o OpenGL).
+        regioes  : {nome: Regiao} de cada textura.
+    """
+
+    def __init__(self, paginas, regioes):
+        self.paginas = paginas
+        self.regioes = regioes
+
+    def transforma_uv(self, nome, uv):
+        """UVs (n, 2) da textura original → UVs na página do atlas."""
+        r = self.regioes[nome]
+        altura, largura = self.paginas[r.pagina].shape[:2]
+        uv = np.asarray(uv, dtype=np.float32)
+        return np.c_[(r.x + uv[:, 0] * r.largura) / largura,
+                     (r.y + uv[:, 1] * r.altura) / altura].astype(np.float32)
+
+    def remapeia(self, nome, vertex_buffer):
+        """Cópia de um vertex_buffer [x,y,z,u,v] float32 com as UVs na página do atlas."""
+        v = np.array(vertex_buffer, dtype=np.float32).reshape(-1, 5)
+        uv = v[:, 3:5]
+        if uv.size and (uv.min() < 0.0 or uv.max() > 1.0):
+            raise ValueError(f"UVs de '{nome}' fora de [0, 1]: a textura não pode ir para o atlas")
+        v[:, 3:5] = self.transforma_uv(nome, uv)
+        return v.reshape(-1)
+
+    def eficiencia(self):
+        """Fração da área das páginas ocupada pelas texturas (sem gutter e alinhamento)."""
+        util = sum(r.largura * r.altura for r in self.regioes.values())
+        total = sum(p.shape[0] * p.shape[1] for p in self.paginas)
+        return util / max(total, 1)
+
+
+def _arredonda(n, alinhamento):
+    return -(-n // alinhamento) * alinhamento
+
+
+def empacota(texturas, tamanho_pagina=4096, gutter=8, alinhamento=8):
+    """
+    Empacota as texturas em páginas de até tamanho_pagina x tamanho_pagina.
+
+    Parâmetros:
+        texturas (dict): {nome: array RGBA uint8 (altura, largura, 4)}.
+        gutter, alinhamento: ver o cabeçalho do módulo.
+
+    Retorna:
+        Atlas; cada página é recortada à área realmente usada (múltipla de 'alinhamento').
+    """
+    # retângulos com o gutter, arredondados para o alinhamento; do mais alto para o mais baixo
+    pedidos = []
+    for nome, img in texturas.items():
+        h, w = img.shape[:2]
+        pw, ph = _arredonda(w + 2 * gutter, alinhamento), _arredonda(h + 2 * gutter, alinhamento)
+        if pw > tamanho_pagina or ph > tamanho_pagina:
+            raise ValueError(f"Textura '{nome}' ({w}x{h}) não cabe em uma página de {tamanho_pagina}")
+        pedidos.append((ph, pw, nome))
+    pedidos.sort(key=lambda p: (-p[0], -p[1], p[2]))
+
+    paginas, posicoes = [], {}
+    for ph, pw, nome in pedidos:
+        for k, pagina in enumerate(paginas):
+            lugar = pagina.procura(pw, ph)
+            if lugar is not None:
+                break
+        else:
+            paginas.append(_Skyline(tamanho_pagina, tamanho_pagina))
+            k, lugar = len(paginas) - 1, (0, 0)
+        paginas[k].insere(lugar[0], lugar[1], pw, ph)
+        posicoes[nome] = (k, lugar[0], lugar[1])
+
+    # monta as páginas: cada textura com a borda "enrolada" (como GL_REPEAT) no gutter
+    imagens = []
+    for pagina in paginas:
+        largura, altura = (_arredonda(n, alinhamento) for n in pagina.usado())
+        imagens.append(np.zeros((altura, largura, 4), np.uint8))
+    regioes = {}
+    for nome, (k, x, y) in posicoes.items():
+        img = np.asarray(texturas[nome])[..., :4]
+        h, w = img.shape[:2]
+        com_gutter = np.pad(img, ((gutter, gutter), (gutter, gutter), (0, 0)), mode='wrap')
+        imagens[k][y:y + h + 2 * gutter, x:x + w + 2 * gutter] = com_gutter
+        regioes[nome] = Regiao(k, x + gutter, y + gutter, w, h)
+    return Atlas(imagens, regioes)
+
+
+def lote(atlas, malhas):
+    """
+    Junta malhas estáticas que usam a mesma página em um único VBO/EBO (um draw call).
+
+    Parâmetros:
+        malhas: lista de (nome_textura, vertex_buffer, index_buffer, modelo 4x4 (pyrr)).
+                As posições são levadas para o mundo (vetores-linha: p @ modelo) e as UVs
+                remapeadas para o atlas.
+
+    Retorna:
+        {pagina: (vertex_buffer float32, index_buffer uint32)}.
+    """
+    grupos = collections.defaultdict(list)
+    for nome, vb, ib, modelo in malhas:
+        grupos[atlas.regioes[nome].pagina].append((nome, vb, ib, modelo))
+
+    lotes = {}
+    for pagina, grupo in grupos.items():
+        vbs, ibs, base = [], [], 0
+        for nome, vb, ib, modelo in grupo:
+            v = atlas.remapeia(nome, vb).reshape(-1, 5)
+            pos = np.c_[v[:, :3], np.ones(len(v), np.float32)] @ np.asarray(modelo, np.float32)
+            v[:, :3] = pos[:, :3]
+            vbs.append(v)
+            ibs.append(np.asarray(ib, dtype=np.uint32) + base)
+            base += len(v)
+        lotes[pagina] = (np.concatenate(vbs).reshape(-1), np.concatenate(ibs))
+    return lotes
+
+
+# ----------------------------------------
+# Relatório: eficiência do empacotamento e redução de draw calls
+# ----------------------------------------
+# Uso: python TextureAtlas.py
+
+if __name__ == "__main__":
+    import glob
+    import time
+    from PIL import Image
+
+    def carrega(path):
+        return np.asarray(Image.open(path).transpose(Image.FLIP_TOP_BOTTOM).convert("RGBA"))
+
+    # 1) texturas do repositório (cada uma usada por um objeto)
+    caminhos = sorted(glob.glob("textures/*.png") + glob.glob("textures/*.jpg") + glob.glob("meshes/*/*.jpg"))
+    texturas = {c: carrega(c) for c in caminhos}
+    t0 = time.perf_counter()
+    atlas = empacota(texturas)
+    t1 = time.perf_counter()
+    print(f"repositório: {len(texturas)} texturas → {len(atlas.paginas)} página(s) "
+          f"{[p.shape[1::-1] for p in atlas.paginas]}, eficiência {atlas.eficiencia() * 100:.1f}% "
+          f"[{(t1 - t0) * 1e3:.0f} ms]")
+    print(f"    draws/binds por quadro: {len(texturas)} → {len(atlas.paginas)}")
+
+    # os texels de cada região são exatamente os da textura original
+    for nome, r in atlas.regioes.items():
+        pagina = atlas.paginas[r.pagina]
+        assert np.array_equal(pagina[r.y:r.y + r.altura, r.x:r.x + r.largura], texturas[nome])
+
+    # UVs remapeadas amostram o mesmo texel (centro do texel (i, j) da textura)
+    nome = caminhos[0]
+    r = atlas.regioes[nome]
+    i, j = np.array([0, r.altura // 2, r.altura - 1]), np.array([0, r.largura // 3, r.largura - 1])
+    uv = np.c_[(j + 0.5) / r.largura, (i + 0.5) / r.altura]
+    uv_atlas = atlas.transforma_uv(nome, uv)
+    pagina = atlas.paginas[r.pagina]
+    lin = (uv_atlas[:, 1] * pagina.shape[0]).astype(int)
+    col = (uv_atlas[:, 0] * pagina.shape[1]).astype(int)
+    assert np.array_equal(pagina[lin, col], texturas[nome][i, j])
+
+    # lote estático: várias cópias do chibi (com UVs no atlas) viram um único draw call
+    from pyrr import matrix44
+    from ObjLoaderSimple import ObjLoaderSimple
+    if "textures/chibi.png" in texturas:
+        vb, ib, _ = ObjLoaderSimple.load_obj_cached("meshes/chibi.obj")
+        copias = [("textures/chibi.png", vb, ib, matrix44.create_from_translation([3.0 * k, 0.0, 0.0]))
+                  for k in range(10)]
+        lotes = lote(atlas, copias)
+        vb_lote, ib_lote = lotes[atlas.regioes["textures/chibi.png"].pagina]
+        assert vb_lote.size == 10 * vb.size and ib_lote.size == 10 * ib.size
+        assert ib_lote.max() == vb_lote.size // 5 - 1
+        print(f"lote estático: 10 chibis → {len(lotes)} draw call ({ib_lote.size // 3} triângulos)")
+
+    # 2) conjunto sintético: 300 texturas pequenas e médias (32 a 512 texels de lado)
+    rng = np.random.default_rng(7)
+    lados = 2 ** rng.integers(5, 10, (300, 2))
+    sinteticas = {f"t{k}": np.zeros((h, w, 4), np.uint8) for k, (h, w) in enumerate(lados)}
+    for gutter, alinhamento in ((0, 1), (4, 4), (8, 8)):
+        t0 = time.perf_counter()
+        a = empacota(sinteticas, tamanho_pagina=4096, gutter=gutter, alinhamento=alinhamento)
+        t1 = time.perf_counter()
+        print(f"sintético (gutter {gutter}, alinhamento {alinhamento}): 300 texturas → "
+              f"{len(a.paginas)} página(s), eficiência {a.eficiencia() * 100:.1f}% [{(t1 - t0) * 1e3:.0f} ms]")
+        # nenhuma sobreposição entre regiões (com gutter) na mesma página
+        ocupado = [np.zeros(p.shape[:2], np.int32) for p in a.paginas]
+        for r in a.regioes.values():
+            ocupado[r.pagina][r.y - gutter:r.y + r.altura + gutter, r.x - gutter:r.x + r.largura + gutter] += 1
+        assert max(o.max() for o in ocupado) == 1
+    print(f"    draws/binds por quadro (um objeto por textura): 300 → {len(a.paginas)}")
@@ -0,0 +1,161 @@
+# TextureCache.py
+# Cache em disco das texturas já decodificadas (RGBA invertido, pronto para glTexImage2D)
+#
+# Decodificar um JPEG/PNG com o PIL, inverter e converter para RGBA custa muito mais do que
+# enviar os bytes para a GPU. Na primeira vez guardamos o resultado final em um arquivo
+# binário (mesmo formato do MeshCache: cabeçalho JSON + arrays alinhados); nas próximas
+# execuções ele é aberto com np.memmap e vai direto para glTexImage2D — sem PIL e sem cópia.
+#
+# Diferente do MeshCache (um "sidecar" ao lado de cada .obj), as texturas ficam todas em
+# uma pasta única (PASTA), com o nome do arquivo dado pela chave:
+#   chave = SHA-1( SHA-1 do conteúdo da imagem + parâmetros da conversão + versão )
+# Assim a mesma imagem copiada em dois lugares ocupa o cache uma vez só, e mudar a conversão
+# (ex.: gerar mipmaps) cria outra entrada em vez de reaproveitar uma incompatível.
+#
+# A pasta tem um limite de tamanho (LIMITE_BYTES): ao gravar uma entrada nova, as usadas há
+# mais tempo são apagadas (LRU). O "último uso" é o mtime do arquivo, atualizado a cada acerto.
+
+import hashlib
+import json
+import os
+
+from MeshCache import MeshCache
+
+PASTA = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".texcache")
+EXTENSAO = ".texcache"
+LIMITE_BYTES = 512 * 1024 * 1024
+VERSAO = 1
+
+
+class TextureCache:
+    """
+    Funções utilitárias para guardar e reabrir imagens já convertidas,
+    com remoção das entradas menos usadas quando a pasta passa do limite.
+    """
+
+    @staticmethod
+    def chave(path, parametros):
+        """Chave da entrada: conteúdo da imagem + parâmetros da conversão (dict serializável em JSON)."""
+        h = hashlib.sha1()
+        h.update(MeshCache.hash_arquivo(path).encode('ascii'))
+        h.update(json.dumps(parametros, sort_keys=True).encode('utf-8'))
+        h.update(str(VERSAO).encode('ascii'))
+        return h.hexdigest()
+
+    @staticmethod
+    def caminho(chave, pasta=PASTA):
+        return os.path.join(pasta, chave + EXTENSAO)
+
+    @staticmethod
+    def carrega_ou_gera(path, parametros, gerador, pasta=PASTA, limite=LIMITE_BYTES):
+        """
+        Retorna os arrays da entrada de (path, parametros) se existir; senão chama gerador(),
+        grava o resultado (removendo entradas antigas se passar de 'limite' bytes) e o retorna.
+
+        Parâmetros:
+            path       (str): caminho da imagem de origem.
+            parametros (dict): parâmetros da conversão, que fazem parte da chave.
+            gerador    (callable): função sem argumentos que retorna {nome: np.ndarray}.
+
+        Retorna:
+            dict {nome: np.ndarray} — memory-mapped (somente leitura) quando veio do cache.
+        """
+        chave = TextureCache.chave(path, parametros)
+        arquivo = TextureCache.caminho(chave, pasta)
+        cabecalho = MeshCache.le_cabecalho(arquivo)
+        if cabecalho is not None and cabecalho['chave'] == chave:
+            TextureCache.toca(arquivo)
+            return MeshCache.mapeia(arquivo, cabecalho)
+
+        arrays = gerador()
+        try:
+            os.makedirs(pasta, exist_ok=True)
+            MeshCache.grava(arquivo, chave, arrays)
+            TextureCache.limpa(pasta, limite, manter=arquivo)
+        except OSError:
+            # cache é só otimização: pasta sem permissão de escrita, disco cheio etc.
+            pass
+        return arrays
+
+    @staticmethod
+    def toca(arquivo):
+        """Marca a entrada como usada agora (mtime), para a política LRU."""
+        try:
+            os.utime(arquivo)
+        except OSError:
+            pass
+
+    @staticmethod
+    def limpa(pasta=PASTA, limite=LIMITE_BYTES, manter=None):
+        """
+        Apaga as entradas usadas há mais tempo até o total da pasta ficar <= limite.
+        'manter' (a entrada recém-gravada) nunca é apagada. Retorna os bytes liberados.
+        """
+        entradas = []
+        for nome in os.listdir(pasta):
+            if nome.endswith(EXTENSAO):
+                arquivo = os.path.join(pasta, nome)
+                try:
+                    info = os.stat(arquivo)
+                except OSError:
+                    continue
+                entradas.append((info.st_mtime_ns, info.st_size, arquivo))
+
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        liberado = 0
+        for _, tamanho, arquivo in sorted(entradas):
+            if total <= limite:
+                break
+            if manter is not None and os.path.samefile(arquivo, manter):
+                continue
+            try:
+                os.remove(arquivo)
+            except OSError:
+                # no Windows, um arquivo ainda mapeado (np.memmap) não pode ser apagado
+                continue
+            total -= tamanho
+            liberado += tamanho
+        return liberado
+
+
+# ----------------------------------------
+# Benchmark: decodificação com PIL x cache quente
+# ----------------------------------------
+# Uso: python TextureCache.py [imagem ...]
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    import time
+    import numpy as np
+    from PIL import Image
+
+    imagens = sys.argv[1:] or ["textures/chibi.png", "textures/Cat_diffuse.jpg", "meshes/Cat/Cat_bump.jpg"]
+    parametros = {'flip': True, 'formato': 'RGBA'}
+
+    def decodifica(path):
+        image = Image.open(path).transpose(Image.FLIP_TOP_BOTTOM)
+        return {'rgba': np.asarray(image.convert("RGBA"))}
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for path in imagens:
+            t0 = time.perf_counter()
+            frio = TextureCache.carrega_ou_gera(path, parametros, lambda: decodifica(path), pasta)
+            t1 = time.perf_counter()
+            quente = TextureCache.carrega_ou_gera(path, parametros, lambda: decodifica(path), pasta)
+            t2 = time.perf_counter()
+            assert isinstance(quente['rgba'], np.memmap) and np.array_equal(frio['rgba'], quente['rgba'])
+            print(f"{path:28s} {quente['rgba'].shape[1]}x{quente['rgba'].shape[0]}: "
+                  f"PIL {(t1 - t0) * 1e3:7.1f} ms | cache {(t2 - t1) * 1e3:6.2f} ms "
+                  f"({(t1 - t0) / (t2 - t1):.0f}x)")
+
+        # LRU: usa de novo a primeira imagem e limita a pasta ao tamanho da maior entrada:
+        # só a usada mais recentemente (a primeira) deve sobreviver
+        # (a pausa evita empate de mtime em sistemas de arquivos com relógio grosso)
+        time.sleep(0.05)
+        TextureCache.carrega_ou_gera(imagens[0], parametros, lambda: decodifica(imagens[0]), pasta)
+        maior = max(os.path.getsize(os.path.join(pasta, n)) for n in os.listdir(pasta))
+        TextureCache.limpa(pasta, limite=maior)
+        restantes = os.listdir(pasta)
+        assert restantes == [os.path.basename(TextureCache.caminho(TextureCache.chave(imagens[0], parametros)))]
+        print(f"LRU com limite de {maior / 1e6:.1f} MB: manteve só {imagens[0]}")
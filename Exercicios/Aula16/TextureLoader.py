@@ -1,13 +1,91 @@
 from OpenGL.GL import (
-    glBindTexture, glTexParameteri, glTexImage2D,
+    glBindTexture, glTexParameteri, glTexParameterf, glTexImage2D, glCompressedTexImage2D, glGetFloatv,
     GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_TEXTURE_WRAP_T,
     GL_REPEAT, GL_TEXTURE_MIN_FILTER, GL_TEXTURE_MAG_FILTER,
-    GL_LINEAR, GL_RGBA, GL_UNSIGNED_BYTE
+    GL_LINEAR, GL_LINEAR_MIPMAP_LINEAR, GL_TEXTURE_MAX_LEVEL, GL_RGBA, GL_UNSIGNED_BYTE
+)
+from OpenGL.GL.EXT.texture_filter_anisotropic import (
+    glInitTextureFilterAnisotropicEXT,
+    GL_TEXTURE_MAX_ANISOTROPY_EXT, GL_MAX_TEXTURE_MAX_ANISOTROPY_EXT
 )
 from PIL import Image
+import numpy as np
+import os
+from TextureCache import TextureCache
+import Mipmap
+import BlockCompression
+
+# O carregamento é dividido em duas etapas:
+#   decode_texture(path)             → só CPU (PIL): pode rodar em outra thread (ver AssetLoader.py)
+#                                      o resultado fica em cache no disco (TextureCache.py): nas
+#                                      próximas execuções a imagem é mapeada (np.memmap), sem PIL
+#   upload_texture(imagem, texture)  → só OpenGL: precisa rodar na thread que tem o contexto
+# load_texture(path, texture) faz as duas em sequência.
+#
+# Por padrão a pirâmide de mipmaps é gerada na CPU (Mipmap.py), guardada no cache junto com
+# a imagem, e todos os níveis são enviados; a textura usa filtragem trilinear
+# (GL_LINEAR_MIPMAP_LINEAR) e anisotrópica, quando o driver oferece a extensão.
+#
+# Se existir uma versão comprimida da imagem ao lado dela (mesmo nome com extensão .dds,
+# gerada offline por "python BlockCompression.py imagem.jpg"), ela é usada no lugar da
+# imagem: os níveis BC1/BC3/BC5 vão direto para glCompressedTexImage2D, sem PIL.
+
+# Anisotropia máxima do driver (0 = sem suporte); consultada uma única vez
+_anisotropia = None
+
+# Função para decodificar a imagem (sem OpenGL)
+def decode_texture(path, usa_cache=True, mipmaps=True, filtro='box', srgb=True, comprimida=True):
+    """
+    Abre a imagem, inverte verticalmente, converte para RGBA e gera os mipmaps.
+    Retorna (largura, altura, [nível 0, nível 1, ...]) com arrays uint8 (altura_k, largura_k, 4),
+    pronto para upload_texture(). Sem mipmaps, a lista tem só o nível 0.
+    Com comprimida=True e um .dds atualizado ao lado da imagem, retorna em vez disso a
+    BlockCompression.TexturaComprimida lida dele (upload_texture aceita as duas formas).
+    - filtro: 'box' ou 'kaiser' (ver Mipmap.py).
+    - srgb  : True para texturas de cor; False para dados lineares (relevo, normais).
+    Com usa_cache=True, a conversão é feita só na primeira vez; depois os arrays vêm do
+    cache em disco mapeado na memória, e vão para glTexImage2D sem cópia.
+    """
+    # versão comprimida offline, se não for mais antiga que a imagem
+    dds = os.path.splitext(path)[0] + ".dds"
+    if comprimida and os.path.exists(dds) and os.path.getmtime(dds) >= os.path.getmtime(path):
+        return BlockCompression.le_dds(dds)
+
+    # parâmetros da conversão (fazem parte da chave do cache)
+    parametros = {'flip': True, 'formato': 'RGBA', 'mipmaps': mipmaps, 'filtro': filtro, 'srgb': srgb}
+
+    def decodifica():
+        # Abre a imagem do caminho especificado
+        image = Image.open(path)
+        # Inverte a imagem verticalmente para corresponder ao sistema de coordenadas do OpenGL - 
+        #Por padrão, as imagens em Pillow (Image.open) têm origem no canto superior-esquerdo, enquanto o OpenGL espera a textura com origem no canto inferior-esquerdo.
+        image = image.transpose(Image.FLIP_TOP_BOTTOM)
+        # Converte a imagem para RGBA e obtém os dados brutos (array altura x largura x 4)
+        img_data = np.asarray(image.convert("RGBA"))
+        niveis = Mipmap.gera_piramide(img_data, filtro, srgb) if mipmaps else [img_data]
+        return {f'nivel{k}': nivel for k, nivel in enumerate(niveis)}
+
+    if usa_cache:
+        arrays = TextureCache.carrega_ou_gera(path, parametros, decodifica)
+    else:
+        arrays = decodifica()
+    niveis = [arrays[f'nivel{k}'] for k in range(len(arrays))]
+    return niveis[0].shape[1], niveis[0].shape[0], niveis
+
+# Função para consultar a anisotropia máxima suportada (precisa de um contexto OpenGL)
+def max_anisotropy():
+    global _anisotropia
+    if _anisotropia is None:
+        _anisotropia = 0.0
+        if glInitTextureFilterAnisotropicEXT():
+            _anisotropia = float(glGetFloatv(GL_MAX_TEXTURE_MAX_ANISOTROPY_EXT))
+    return _anisotropia
+
+# Função para enviar uma imagem já decodificada para uma textura OpenGL
+def upload_texture(imagem, texture):
+    comprimida = isinstance(imagem, BlockCompression.TexturaComprimida)
+    niveis = imagem[-1]
 
-# Função para carregar uma textura PNG e configurá-la no OpenGL
-def load_texture(path, texture):
     # Vincula o ID da textura ao alvo GL_TEXTURE_2D
     glBindTexture(GL_TEXTURE_2D, texture)
     
@@ -16,33 +94,45 @@ def load_texture(path, texture):
     # Configura o modo de repetição da textura no eixo T (vertical)
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
     
-    # Define o filtro de minificação (quando a textura fica menor na tela)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+    # Define o filtro de minificação (quando a textura fica menor na tela):
+    # com mipmaps, trilinear — interpola dentro do nível e entre os dois níveis mais próximos
+    if len(niveis) > 1:
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
+    else:
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+    # Último nível existente (sem isso a textura fica "incompleta" se faltar algum nível)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAX_LEVEL, len(niveis) - 1)
+    # Filtragem anisotrópica: superfícies vistas de lado (chão) continuam nítidas
+    if len(niveis) > 1 and max_anisotropy() > 1.0:
+        glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_MAX_ANISOTROPY_EXT, max_anisotropy())
     # Define o filtro de magnificação (quando a textura fica maior na tela)
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
     
-    # Abre a imagem do caminho especificado
-    image = Image.open(path)
-    # Inverte a imagem verticalmente para corresponder ao sistema de coordenadas do OpenGL - 
-    #Por padrão, as imagens em Pillow (Image.open) têm origem no canto superior-esquerdo, enquanto o OpenGL espera a textura com origem no canto inferior-esquerdo.
-    image = image.transpose(Image.FLIP_TOP_BOTTOM)
-    # Converte a imagem para RGBA e obtém os dados brutos em bytes
-    img_data = image.convert("RGBA").tobytes()
-    
-    # Envia os dados da imagem para a GPU, criando a textura 2D
+    # Envia os dados de cada nível para a GPU, criando a textura 2D
     # Parâmetros:
     #   GL_TEXTURE_2D: alvo
-    #   0             : nível de mipmap
+    #   nivel         : nível de mipmap (0 = imagem original)
     #   GL_RGBA       : formato interno da textura
-    #   width, height : dimensões da imagem
+    #   width, height : dimensões do nível
     #   0             : borda (sempre 0)
     #   GL_RGBA       : formato dos dados enviados
     #   GL_UNSIGNED_BYTE : tipo dos dados enviados
-    #   img_data      : ponteiro para os bytes da imagem
-    glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA,
-                 image.width, image.height,
-                 0, GL_RGBA, GL_UNSIGNED_BYTE,
-                 img_data)
+    #   img_data      : ponteiro para os bytes do nível
+    for nivel, img_data in enumerate(niveis):
+        if comprimida:
+            # blocos BCn: formato interno comprimido e tamanho do nível em bytes
+            glCompressedTexImage2D(GL_TEXTURE_2D, nivel, BlockCompression.FORMATOS[imagem.formato][2],
+                                   max(1, imagem.largura >> nivel), max(1, imagem.altura >> nivel),
+                                   0, img_data.nbytes, img_data)
+            continue
+        glTexImage2D(GL_TEXTURE_2D, nivel, GL_RGBA,
+                     img_data.shape[1], img_data.shape[0],
+                     0, GL_RGBA, GL_UNSIGNED_BYTE,
+                     img_data)
     
     # Retorna o ID da textura para uso em glBindTexture() posteriormente
     return texture
+
+# Função para carregar uma textura PNG e configurá-la no OpenGL
+def load_texture(path, texture):
+    return upload_texture(decode_texture(path), texture)
@@ -0,0 +1,360 @@
+# TextureStreaming.py
+# Envio assíncrono de texturas por PBOs (pixel buffer objects), com residência progressiva
+# dos níveis de mipmap
+#
+# upload_texture() chama glTexImage2D com os dados na memória do Python: o driver copia
+# todos os níveis (uma textura 2048x2048 com mipmaps tem 21 MB) antes de a chamada voltar,
+# e o quadro em que isso acontece demora muito mais que os outros (um "soluço").
+#
+# Aqui o envio é espalhado por vários quadros:
+#   • alocação: a textura é criada com todos os níveis, sem dados (glTexImage2D(..., None));
+#   • níveis pequenos primeiro: os níveis são enviados do menor (1x1) para o maior, e
+#     GL_TEXTURE_BASE_LEVEL aponta para o maior nível já completo. A GPU só amostra níveis
+#     residentes: o objeto aparece logo, borrado, e fica nítido à medida que os níveis chegam;
+#   • orçamento por quadro: processa() envia no máximo 'orcamento' bytes; um nível maior que
+#     o orçamento é enviado em faixas de linhas (glTexSubImage2D com yoffset) em vários quadros;
+#   • PBOs: os bytes são copiados para um buffer mapeado (memmove, sem o driver no meio) e
+#     glTexSubImage2D lê do PBO — a chamada volta na hora e a cópia para a textura acontece na
+#     GPU. Um anel de N PBOs com cercas (glFenceSync) evita escrever num PBO que a GPU ainda lê;
+#   • residência: pede(textura, pixels) informa o tamanho do objeto na tela; níveis mais
+#     detalhados do que o necessário (mais texels que pixels) não são enviados enquanto
+#     ninguém precisar deles.
+#
+# A decodificação (decode_texture) continua nas threads do AssetLoader. Texturas comprimidas
+# (.dds, ver BlockCompression.py) já são pequenas e vão inteiras por upload_texture.
+
+import ctypes
+import math
+
+import numpy as np
+from OpenGL.GL import (
+    glGenBuffers, glBindBuffer, glBufferData, glMapBufferRange, glUnmapBuffer, glDeleteBuffers,
+    glFenceSync, glClientWaitSync, glDeleteSync,
+    glGenTextures, glBindTexture, glTexImage2D, glTexSubImage2D, glTexParameteri, glTexParameterf,
+    GL_PIXEL_UNPACK_BUFFER, GL_STREAM_DRAW, GL_MAP_WRITE_BIT, GL_MAP_INVALIDATE_BUFFER_BIT,
+    GL_SYNC_GPU_COMMANDS_COMPLETE, GL_TIMEOUT_EXPIRED,
+    GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_TEXTURE_WRAP_T, GL_REPEAT,
+    GL_TEXTURE_MIN_FILTER, GL_TEXTURE_MAG_FILTER, GL_LINEAR, GL_LINEAR_MIPMAP_LINEAR,
+    GL_TEXTURE_BASE_LEVEL, GL_TEXTURE_MAX_LEVEL, GL_RGBA, GL_UNSIGNED_BYTE
+)
+from OpenGL.GL.EXT.texture_filter_anisotropic import GL_TEXTURE_MAX_ANISOTROPY_EXT
+
+import BlockCompression
+from TextureLoader import upload_texture, max_anisotropy
+
+ORCAMENTO_BYTES = 1 << 20      # bytes enviados por quadro
+NUM_PBOS = 3                   # tamanho do anel
+NIVEIS_IMEDIATOS = 64 * 64 * 4 * 4 // 3   # níveis pequenos (até 64x64) enviados já na alocação
+
+
+def nivel_necessario(largura, altura, pixels, num_niveis):
+    """Nível de mipmap mais detalhado de que um objeto com 'pixels' de altura na tela precisa."""
+    if pixels <= 0:
+        return num_niveis - 1
+    texels_por_pixel = max(largura, altura) / pixels
+    if texels_por_pixel <= 1.0:
+        return 0
+    return min(num_niveis - 1, int(math.log2(texels_por_pixel)))
+
+
+class AnelPBO:
+    """N pixel buffer objects usados em rodízio, um por quadro, protegidos por cercas."""
+
+    def __init__(self, tamanho, n=NUM_PBOS):
+        self.tamanho = tamanho
+        self.pbos = [glGenBuffers(1) for _ in range(n)]
+        self.cercas = [None] * n
+        self.atual = 0
+        for pbo in self.pbos:
+            glBindBuffer(GL_PIXEL_UNPACK_BUFFER, pbo)
+            glBufferData(GL_PIXEL_UNPACK_BUFFER, tamanho, None, GL_STREAM_DRAW)
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+
+    def livre(self):
+        """True se a GPU já terminou de ler o próximo PBO do anel (não bloqueia)."""
+        cerca = self.cercas[self.atual]
+        if cerca is None:
+            return True
+        if glClientWaitSync(cerca, 0, 0) == GL_TIMEOUT_EXPIRED:
+            return False
+        glDeleteSync(cerca)
+        self.cercas[self.atual] = None
+        return True
+
+    def escreve(self, pedacos):
+        """
+        Copia os arrays 'pedacos' (contíguos, total <= tamanho) para o próximo PBO e o deixa
+        vinculado em GL_PIXEL_UNPACK_BUFFER. Retorna o deslocamento de cada pedaço no PBO.
+        """
+        total = sum(p.nbytes for p in pedacos)
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, self.pbos[self.atual])
+        # INVALIDATE: o conteúdo anterior não importa, o driver não precisa preservá-lo
+        destino = glMapBufferRange(GL_PIXEL_UNPACK_BUFFER, 0, total,
+                                   GL_MAP_WRITE_BIT | GL_MAP_INVALIDATE_BUFFER_BIT)
+        deslocamentos, d = [], 0
+        for p in pedacos:
+            ctypes.memmove(destino + d, p.ctypes.data, p.nbytes)
+            deslocamentos.append(d)
+            d += p.nbytes
+        glUnmapBuffer(GL_PIXEL_UNPACK_BUFFER)
+        return deslocamentos
+
+    def fecha(self):
+        """Marca o fim dos envios deste PBO (cerca) e avança o anel."""
+        self.cercas[self.atual] = glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+        self.atual = (self.atual + 1) % len(self.pbos)
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+
+    def apaga(self):
+        for cerca in self.cercas:
+            if cerca is not None:
+                glDeleteSync(cerca)
+        glDeleteBuffers(len(self.pbos), self.pbos)
+
+
+class TexturaStreaming:
+    """
+    Estado de uma textura sendo enviada aos poucos.
+        textura   : ID OpenGL (já pode ser vinculado; amostra só os níveis residentes)
+        residente : nível mais detalhado já completo (num_niveis = nada residente)
+        desejado  : nível mais detalhado pedido pela residência (0 = resolução total)
+    """
+
+    def __init__(self, textura, niveis):
+        self.textura = textura
+        self.niveis = niveis
+        self.residente = len(niveis)
+        self.desejado = 0
+        self.linha = 0               # linhas já enviadas do nível residente - 1
+
+    def proximo(self):
+        """Nível que está sendo enviado agora, ou None se não há nada a enviar."""
+        nivel = self.residente - 1
+        return nivel if nivel >= self.desejado else None
+
+    def pendente(self):
+        """Bytes que faltam para o nível atual ficar completo."""
+        nivel = self.proximo()
+        if nivel is None:
+            return 0
+        dados = self.niveis[nivel]
+        return (dados.shape[0] - self.linha) * dados.shape[1] * 4
+
+
+class Streaming:
+    """
+    Fila de envios de texturas por PBO, com orçamento de bytes por quadro.
+
+    Uso (na thread do contexto OpenGL):
+        streaming = Streaming()
+        t = streaming.adiciona(decode_texture(path))   # imagem decodificada em outra thread
+        ...
+        streaming.pede(t.textura, pixels)   # opcional: tamanho do objeto na tela
+        streaming.processa()         # uma vez por quadro
+        glBindTexture(GL_TEXTURE_2D, t.textura)
+    """
+
+    def __init__(self, orcamento=ORCAMENTO_BYTES, num_pbos=NUM_PBOS):
+        self.orcamento = orcamento
+        self.num_pbos = num_pbos
+        self.anel = None             # criado no primeiro processa(), já com contexto
+        self.texturas = {}           # ID OpenGL → TexturaStreaming
+        self.bytes_enviados = 0
+
+    def adiciona(self, imagem, textura=None):
+        """
+        Aloca a textura com todos os níveis (sem dados), envia já os níveis pequenos e
+        coloca o resto na fila. 'imagem' é o retorno de decode_texture().
+        Retorna a TexturaStreaming.
+        """
+        if textura is None:
+            textura = glGenTextures(1)
+        niveis = imagem[-1]
+        if isinstance(imagem, BlockCompression.TexturaComprimida):
+            # já comprimida: pequena o bastante para ir de uma vez
+            upload_texture(imagem, textura)
+            t = TexturaStreaming(textura, niveis)
+            t.residente = 0
+            return t
+
+        glBindTexture(GL_TEXTURE_2D, textura)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER,
+                        GL_LINEAR_MIPMAP_LINEAR if len(niveis) > 1 else GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAX_LEVEL, len(niveis) - 1)
+        if len(niveis) > 1 and max_anisotropy() > 1.0:
+            glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_MAX_ANISOTROPY_EXT, max_anisotropy())
+        # reserva a memória de todos os níveis; os dados chegam depois
+        for nivel, dados in enumerate(niveis):
+            glTexImage2D(GL_TEXTURE_2D, nivel, GL_RGBA, dados.shape[1], dados.shape[0],
+                         0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+
+        # os níveis pequenos (poucos KB) vão direto: o objeto já pode ser desenhado
+        t = TexturaStreaming(textura, niveis)
+        acumulado = 0
+        while t.residente > 0 and acumulado + niveis[t.residente - 1].nbytes <= NIVEIS_IMEDIATOS:
+            nivel = t.residente - 1
+            dados = np.ascontiguousarray(niveis[nivel])
+            glTexSubImage2D(GL_TEXTURE_2D, nivel, 0, 0, dados.shape[1], dados.shape[0],
+                            GL_RGBA, GL_UNSIGNED_BYTE, dados)
+            acumulado += dados.nbytes
+            t.residente = nivel
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_BASE_LEVEL, min(t.residente, len(niveis) - 1))
+        self.texturas[textura] = t
+        return t
+
+    def remove(self, textura):
+        """Tira da fila (antes de glDeleteTextures)."""
+        self.texturas.pop(textura, None)
+
+    def pede(self, textura, pixels):
+        """Residência: o objeto que usa a textura ocupa 'pixels' de altura na tela."""
+        t = self.texturas.get(textura)
+        if t is None:
+            return
+        altura, largura = t.niveis[0].shape[:2]
+        t.desejado = nivel_necessario(largura, altura, pixels, len(t.niveis))
+
+    def processa(self):
+        """
+        Envia até 'orcamento' bytes da fila por um PBO do anel. Prioridade: a textura com
+        menos bytes faltando para completar o próximo nível (mais melhora visível por byte).
+        Retorna os bytes enviados neste quadro.
+        """
+        fila = [t for t in self.texturas.values() if t.proximo() is not None]
+        if not fila:
+            return 0
+        if self.anel is None:
+            self.anel = AnelPBO(self.orcamento, self.num_pbos)
+        if not self.anel.livre():
+            return 0                  # GPU ainda lendo o PBO: tenta no próximo quadro
+
+        # escolhe as faixas de linhas deste quadro
+        faixas, restante = [], self.orcamento
+        fila.sort(key=TexturaStreaming.pendente)
+        for t in fila:
+            nivel = t.proximo()
+            while nivel is not None and restante > 0:
+                dados = t.niveis[nivel]
+                bytes_linha = dados.shape[1] * 4
+                linhas = min(dados.shape[0] - t.linha, restante // bytes_linha)
+                if linhas == 0:
+                    break             # linha maior que o que sobrou: fica para o próximo quadro
+                faixa = np.ascontiguousarray(dados[t.linha:t.linha + linhas])
+                completo = t.linha + linhas == dados.shape[0]
+                faixas.append((t, nivel, t.linha, faixa, completo))
+                restante -= linhas * bytes_linha
+                t.linha += linhas
+                if completo:
+                    t.residente, t.linha = nivel, 0
+                    nivel = t.proximo()
+        if not faixas:
+            return 0
+
+        # cópia para o PBO e glTexSubImage2D a partir dele (ponteiro = deslocamento no PBO)
+        deslocamentos = self.anel.escreve([f[3] for f in faixas])
+        vinculada = None
+        for (t, nivel, linha, dados, completo), deslocamento in zip(faixas, deslocamentos):
+            if t.textura != vinculada:
+                glBindTexture(GL_TEXTURE_2D, t.textura)
+                vinculada = t.textura
+            glTexSubImage2D(GL_TEXTURE_2D, nivel, 0, linha, dados.shape[1], dados.shape[0],
+                            GL_RGBA, GL_UNSIGNED_BYTE, ctypes.c_void_p(deslocamento))
+            if completo:
+                # nível completo: a GPU já pode amostrá-lo
+                glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_BASE_LEVEL, nivel)
+        self.anel.fecha()
+
+        enviados = self.orcamento - restante
+        self.bytes_enviados += enviados
+        return enviados
+
+    def concluido(self):
+        return all(t.proximo() is None for t in self.texturas.values())
+
+    def apaga(self):
+        if self.anel is not None:
+            self.anel.apaga()
+            self.anel = None
+
+
+# ----------------------------------------
+# Benchmark: tempo de quadro durante o carregamento de uma fase
+# ----------------------------------------
+# Uso: python TextureStreaming.py
+# Funciona sem monitor com o Mesa em software:
+#   LIBGL_ALWAYS_SOFTWARE=1 xvfb-run -a python TextureStreaming.py
+# 300 quadros; no quadro 30 a "fase" pede 6 texturas 2048x2048. Síncrono: decodificação e
+# upload_texture dentro do quadro. Streaming: decodificação no AssetLoader e envio por PBO.
+
+if __name__ == "__main__":
+    import time
+    import glfw
+    from OpenGL.GL import glClear, glClearColor, glFinish, glDeleteTextures, GL_COLOR_BUFFER_BIT
+    from AssetLoader import AssetLoader
+    import Mipmap
+
+    QUADROS, CARGA, TEXTURAS, LADO = 300, 30, 6, 2048
+
+    if not glfw.init():
+        raise RuntimeError("Falha ao inicializar GLFW")
+    glfw.window_hint(glfw.VISIBLE, glfw.FALSE)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MAJOR, 4)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, 0)
+    glfw.window_hint(glfw.OPENGL_PROFILE, glfw.OPENGL_CORE_PROFILE)
+    janela = glfw.create_window(64, 64, "streaming", None, None)
+    if not janela:
+        glfw.terminate()
+        raise RuntimeError("Falha ao criar janela GLFW")
+    glfw.make_context_current(janela)
+
+    rng = np.random.default_rng(1)
+    bases = [rng.integers(0, 256, (LADO, LADO, 4), dtype=np.uint8) for _ in range(TEXTURAS)]
+
+    def decodifica(k):
+        # no lugar de decode_texture: mesma pirâmide, sem depender de arquivos grandes no repo
+        return LADO, LADO, Mipmap.gera_piramide(bases[k])
+
+    def histograma(tempos):
+        faixas = [0, 4, 8, 16, 33, 66, 133, float('inf')]
+        for a, b in zip(faixas[:-1], faixas[1:]):
+            n = sum(a <= t < b for t in tempos)
+            rotulo = f"{a:3.0f}-{b:3.0f} ms" if b != float('inf') else f"   >{a:3.0f} ms"
+            print(f"    {rotulo} {n:4d} {'#' * min(n, 60)}")
+
+    def executa(modo):
+        streaming = Streaming() if modo == 'streaming' else None
+        loader = AssetLoader() if modo == 'streaming' else None
+        texturas, tempos = [], []
+        for quadro in range(QUADROS):
+            t0 = time.perf_counter()
+            if quadro == CARGA:
+                for k in range(TEXTURAS):
+                    if modo == 'sincrono':
+                        texturas.append(upload_texture(decodifica(k), glGenTextures(1)))
+                    else:
+                        loader.agenda(k, decodifica, lambda imagem: texturas.append(streaming.adiciona(imagem).textura), k)
+            if loader is not None:
+                loader.processa()
+                streaming.processa()
+            glClearColor(0.1, 0.1, 0.1, 1.0)
+            glClear(GL_COLOR_BUFFER_BIT)
+            glfw.swap_buffers(janela)
+            glFinish()               # inclui no quadro o trabalho que a GPU/driver ainda devia
+            tempos.append((time.perf_counter() - t0) * 1e3)
+        if loader is not None:
+            loader.espera()
+            loader.encerra()
+            streaming.apaga()
+        glDeleteTextures(texturas)
+        return np.array(tempos)
+
+    glfw.swap_interval(0)
+    for modo in ('sincrono', 'streaming'):
+        tempos = executa(modo)
+        print(f"{modo}: p50 {np.percentile(tempos, 50):.1f} ms | p99 {np.percentile(tempos, 99):.1f} ms "
+              f"| máximo {tempos.max():.1f} ms")
+        histograma(tempos)
+    glfw.terminate()
@@ -0,0 +1,299 @@
+# TransformHierarchy.py
+# Hierarquia de transformações: TRS local de todos os nós em arrays contíguos, com índice do pai
+#
+# Cada nó tem uma transformação LOCAL (posição, rotação em graus, escala — a mesma convenção
+# de Scene.matriz_modelo) relativa ao pai, e a matriz de MUNDO é local @ mundo_do_pai
+# (vetores-linha do pyrr: a transformação do filho é aplicada primeiro).
+#
+# Em vez de um objeto Python por nó e uma multiplicação pyrr por nó a cada quadro:
+#   • posição, rotação, escala, matrizes locais e de mundo ficam em arrays NumPy (N, ...);
+#   • define() só marca o nó como "sujo"; atualiza() recalcula, de uma vez, as matrizes
+#     locais dos nós sujos (matrizes_modelo) e as de mundo só da subárvore suja;
+#   • a propagação é feita NÍVEL a NÍVEL (raízes, filhos das raízes, netos, ...): todos os
+#     nós de um nível são independentes entre si, então cada nível é um único np.matmul
+#     em lote (k, 4, 4) @ (k, 4, 4);
+#   • sem nenhum nó sujo, atualiza() retorna na hora: objetos estáticos não custam nada.
+#
+# Os nós são guardados em ordem topológica: o pai é sempre adicionado antes do filho.
+#
+# matrizes_modelo() e grade() também montam as matrizes das cópias dos objetos instanciados
+# (Scene.py, Instancing.py). Só NumPy: este módulo não depende de OpenGL.
+
+import numpy as np
+
+
+def matrizes_modelo(posicoes, rotacoes=None, escalas=None):
+    """
+    Matrizes de modelo (N, 4, 4) float32 de todas as instâncias, na mesma convenção de
+    Scene.matriz_modelo: p' = p @ S @ Rx @ Ry @ Rz @ T.
+
+    Parâmetros:
+        posicoes (np.ndarray): (N, 3).
+        rotacoes (np.ndarray): (N, 3) em graus em torno de x, y e z (padrão: sem rotação).
+        escalas  (np.ndarray): (N, 3); (N,) = escala uniforme por instância; (1, 3) ou
+                               escalar = a mesma para todas (padrão: 1).
+    """
+    posicoes = np.asarray(posicoes, dtype=np.float64).reshape(-1, 3)
+    n = len(posicoes)
+    if rotacoes is None:
+        rot = np.broadcast_to(np.identity(3), (n, 3, 3))
+    else:
+        rx, ry, rz = np.radians(np.asarray(rotacoes, dtype=np.float64).reshape(-1, 3)).T
+        cx, sx, cy, sy, cz, sz = np.cos(rx), np.sin(rx), np.cos(ry), np.sin(ry), np.cos(rz), np.sin(rz)
+        # produto Rx @ Ry @ Rz já expandido (matrizes do pyrr, ver create_from_*_rotation)
+        rot = np.empty((n, 3, 3))
+        rot[:, 0, 0] = cy * cz
+        rot[:, 0, 1] = -cy * sz
+        rot[:, 0, 2] = sy
+        rot[:, 1, 0] = cx * sz + sx * sy * cz
+        rot[:, 1, 1] = cx * cz - sx * sy * sz
+        rot[:, 1, 2] = -sx * cy
+        rot[:, 2, 0] = sx * sz - cx * sy * cz
+        rot[:, 2, 1] = sx * cz + cx * sy * sz
+        rot[:, 2, 2] = cx * cy
+    escalas = np.ones((1, 3)) if escalas is None else np.asarray(escalas, dtype=np.float64)
+    if escalas.ndim == 1:
+        escalas = escalas[:, None]
+    escalas = np.broadcast_to(escalas, (n, 3))
+
+    matrizes = np.zeros((n, 4, 4), dtype=np.float32)
+    matrizes[:, :3, :3] = escalas[:, :, None] * rot       # S @ R: linha i de R vezes s_i
+    matrizes[:, 3, :3] = posicoes
+    matrizes[:, 3, 3] = 1.0
+    return matrizes
+
+
+def grade(colunas, linhas, espacamento):
+    """Posições (colunas × linhas, 3) numa grade no plano y = 0, centrada na origem."""
+    x = (np.arange(colunas) - (colunas - 1) / 2.0) * espacamento
+    z = (np.arange(linhas) - (linhas - 1) / 2.0) * espacamento
+    xx, zz = np.meshgrid(x, z)
+    return np.stack([xx.ravel(), np.zeros(xx.size), zz.ravel()], axis=-1).astype(np.float32)
+
+
+class TransformHierarchy:
+    """
+    Uso:
+        hierarquia = TransformHierarchy()
+        corpo = hierarquia.adiciona(posicao=(0, 1, 0))
+        braco = hierarquia.adiciona(corpo, rotacao=(0, 0, 45))
+        ...
+        hierarquia.define(corpo, posicao=(2, 1, 0))     # a cada quadro, só o que mudou
+        alterados = hierarquia.atualiza()                # índices dos nós recalculados
+        hierarquia.mundo[braco]                          # matriz de mundo (4, 4) float32
+    """
+
+    def __init__(self, capacidade=64):
+        self.n = 0
+        self.capacidade = 0
+        self.pai = np.zeros(0, np.int32)
+        self.nivel = np.zeros(0, np.int32)
+        self.posicao = np.zeros((0, 3), np.float32)
+        self.rotacao = np.zeros((0, 3), np.float32)
+        self.escala = np.zeros((0, 3), np.float32)
+        self.local = np.zeros((0, 4, 4), np.float32)
+        self._mundo = np.zeros((0, 4, 4), np.float32)
+        self.versao = np.zeros(0, np.int64)        # incrementada a cada recálculo da matriz de mundo
+        self.sujo = np.zeros(0, bool)              # TRS local alterado desde o último atualiza()
+        self.algum_sujo = False
+        self._niveis = None                        # (nós ordenados por nível, início de cada nível)
+        self._aloca(capacidade)
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def mundo(self):
+        """Matrizes de mundo (n, 4, 4) — válidas depois de atualiza()."""
+        return self._mundo[:self.n]
+
+    def _aloca(self, capacidade):
+        """Cresce todos os arrays para 'capacidade' nós, preservando o conteúdo."""
+        if capacidade <= self.capacidade:
+            return
+        capacidade = max(capacidade, 2 * self.capacidade)
+
+        def cresce(array, preenchimento=0):
+            novo = np.full((capacidade,) + array.shape[1:], preenchimento, dtype=array.dtype)
+            novo[:self.n] = array[:self.n]
+            return novo
+
+        self.pai = cresce(self.pai, -1)
+        self.nivel = cresce(self.nivel)
+        self.posicao = cresce(self.posicao)
+        self.rotacao = cresce(self.rotacao)
+        self.escala = cresce(self.escala, 1.0)
+        self.local = cresce(self.local)
+        self._mundo = cresce(self._mundo)
+        self.versao = cresce(self.versao)
+        self.sujo = cresce(self.sujo, False)
+        self.capacidade = capacidade
+
+    def adiciona(self, pai=-1, posicao=(0.0, 0.0, 0.0), rotacao=(0.0, 0.0, 0.0), escala=(1.0, 1.0, 1.0)):
+        """Adiciona um nó (pai = -1 para uma raiz) e retorna o seu índice."""
+        return int(self.adiciona_lote([pai], [posicao], [rotacao], [escala])[0])
+
+    def adiciona_lote(self, pais, posicoes=None, rotacoes=None, escalas=None):
+        """
+        Adiciona vários nós de uma vez. Cada pai deve ser -1, um nó já existente ou um nó
+        ANTERIOR do mesmo lote. Retorna os índices dos novos nós.
+        """
+        pais = np.asarray(pais, dtype=np.int32).reshape(-1)
+        k = len(pais)
+        indices = np.arange(self.n, self.n + k)
+        if np.any(pais >= indices) or np.any(pais < -1):
+            raise ValueError("o pai de um nó precisa ser adicionado antes dele")
+        self._aloca(self.n + k)
+
+        self.pai[indices] = pais
+        self.posicao[indices] = 0.0 if posicoes is None else posicoes
+        self.rotacao[indices] = 0.0 if rotacoes is None else rotacoes
+        self.escala[indices] = 1.0 if escalas is None else escalas
+        # nível = nível do pai + 1; pais dentro do lote são resolvidos em passos sucessivos
+        # (cada passo acerta mais um nível de profundidade do lote)
+        self.nivel[indices] = 0
+        tem_pai = pais >= 0
+        while True:
+            nivel = np.where(tem_pai, self.nivel[np.maximum(pais, 0)] + 1, 0)
+            if np.array_equal(nivel, self.nivel[indices]):
+                break
+            self.nivel[indices] = nivel
+        self.sujo[indices] = True
+        self.algum_sujo = True
+        self.n += k
+        self._niveis = None
+        return indices
+
+    def define(self, indices, posicao=None, rotacao=None, escala=None):
+        """Altera a transformação local de um nó (ou de vários: indices como array)."""
+        if posicao is not None:
+            self.posicao[indices] = posicao
+        if rotacao is not None:
+            self.rotacao[indices] = rotacao
+        if escala is not None:
+            self.escala[indices] = escala
+        self.sujo[indices] = True
+        self.algum_sujo = True
+
+    def _ordem_niveis(self):
+        if self._niveis is None:
+            nivel = self.nivel[:self.n]
+            ordem = np.argsort(nivel, kind='stable')
+            inicios = np.searchsorted(nivel[ordem], np.arange(int(nivel.max(initial=0)) + 2))
+            self._niveis = (ordem, inicios)
+        return self._niveis
+
+    def atualiza(self):
+        """
+        Recalcula as matrizes locais dos nós sujos e as de mundo desses nós e de todos os
+        seus descendentes, nível a nível. Retorna os índices dos nós cuja matriz de mundo
+        mudou (vazio, e sem custo, se nada mudou).
+        """
+        if not self.algum_sujo:
+            return np.zeros(0, np.int64)
+        n = self.n
+        locais = np.flatnonzero(self.sujo[:n])
+        self.local[locais] = matrizes_modelo(self.posicao[locais], self.rotacao[locais], self.escala[locais])
+
+        # sujo[i]: a matriz de mundo de i precisa ser recalculada (o próprio nó ou um ancestral mudou)
+        sujo = self.sujo[:n].copy()
+        ordem, inicios = self._ordem_niveis()
+        atualizados = []
+        # os níveis acima do nó sujo mais raso não têm nada a recalcular
+        for nivel in range(int(self.nivel[locais].min()), len(inicios) - 1):
+            nos = ordem[inicios[nivel]:inicios[nivel + 1]]
+            if nivel > 0:
+                sujo[nos] |= sujo[self.pai[nos]]
+            nos = nos[sujo[nos]]
+            if len(nos) == 0:
+                continue
+            if nivel == 0:
+                self._mundo[nos] = self.local[nos]
+            else:
+                self._mundo[nos] = np.matmul(self.local[nos], self._mundo[self.pai[nos]])
+            atualizados.append(nos)
+
+        self.sujo[:n] = False
+        self.algum_sujo = False
+        atualizados = np.concatenate(atualizados) if atualizados else np.zeros(0, np.int64)
+        self.versao[atualizados] += 1
+        return atualizados
+
+
+# ----------------------------------------
+# Teste e benchmark: árvores de 1 mil a 100 mil nós
+# ----------------------------------------
+# Uso: python TransformHierarchy.py
+#   estático : atualiza() sem nenhum nó alterado
+#   subárvore: um nó de nível 1 alterado (ele e os descendentes recalculados)
+#   tudo     : todas as raízes alteradas (toda a árvore recalculada)
+#   pyrr     : a árvore inteira com Scene.matriz_modelo + matrix44.multiply nó a nó
+
+if __name__ == "__main__":
+    import time
+    import pyrr
+    import Scene
+
+    def arvore(n, filhos=8, rng=None):
+        """Árvore com ~'filhos' filhos por nó (pais em ordem topológica) e TRS aleatórios."""
+        pais = np.maximum(np.arange(n) // filhos - 1, -1) if filhos > 1 else np.arange(n) - 1
+        pais[:filhos] = -1
+        return (pais, rng.normal(0.0, 2.0, (n, 3)), rng.uniform(-180.0, 180.0, (n, 3)),
+                rng.uniform(0.5, 1.5, (n, 3)))
+
+    def referencia(pais, posicoes, rotacoes, escalas):
+        mundo = []
+        for i, p in enumerate(pais):
+            local = Scene.matriz_modelo(posicoes[i], rotacoes[i], escalas[i])
+            mundo.append(local if p < 0 else pyrr.matrix44.multiply(local, mundo[p]))
+        return np.array(mundo)
+
+    rng = np.random.default_rng(11)
+
+    # mesmo resultado que a composição nó a nó, inclusive depois de mover um nó interno
+    pais, pos, rot, esc = arvore(500, 3, rng)
+    h = TransformHierarchy(capacidade=16)
+    for k in range(0, 500, 100):                        # em vários lotes: testa o crescimento
+        h.adiciona_lote(pais[k:k + 100], pos[k:k + 100], rot[k:k + 100], esc[k:k + 100])
+    assert len(h.atualiza()) == 500 and len(h.atualiza()) == 0
+    assert np.allclose(h.mundo, referencia(pais, pos, rot, esc), atol=1e-3)
+    pos[7] += 1.0
+    h.define(7, posicao=pos[7])
+    alterados = h.atualiza()
+    esperado = {7}
+    for i, p in enumerate(pais):
+        if p in esperado:
+            esperado.add(i)
+    assert set(alterados.tolist()) == esperado
+    assert np.allclose(h.mundo, referencia(pais, pos, rot, esc), atol=1e-3)
+    print(f"ok: {len(esperado)} nós recalculados ao mover o nó 7")
+
+    def mede(funcao, repeticoes=5):
+        t0 = time.perf_counter()
+        for _ in range(repeticoes):
+            funcao()
+        return (time.perf_counter() - t0) / repeticoes * 1e3
+
+    print(f"{'nós':>7s} {'níveis':>6s} | estático   subárvore      tudo (ms) | pyrr (ms)")
+    for n in (1000, 10000, 100000):
+        pais, pos, rot, esc = arvore(n, 8, rng)
+        h = TransformHierarchy()
+        h.adiciona_lote(pais, pos, rot, esc)
+        h.atualiza()
+        raizes = np.flatnonzero(pais < 0)
+        filho = int(np.flatnonzero(pais == raizes[0])[0])
+
+        t_estatico = mede(h.atualiza, 100)
+
+        def subarvore():
+            h.define(filho, posicao=pos[filho])
+            h.atualiza()
+
+        def tudo():
+            h.define(raizes, rotacao=rot[raizes])
+            h.atualiza()
+
+        t_sub, t_tudo = mede(subarvore), mede(tudo)
+        t_pyrr = f"{mede(lambda: referencia(pais, pos, rot, esc), 1):9.1f}" if n <= 10000 else f"{'—':>9s}"
+        print(f"{n:7d} {int(h.nivel[:n].max()) + 1:6d} | {t_estatico * 1e3:6.1f} µs {t_sub:9.3f} "
+              f"{t_tudo:9.2f}     | {t_pyrr}")
@@ -0,0 +1,277 @@
+# VertexFormat.py
+# Formatos compactos de vértice para envio à GPU
+#
+# O buffer de ObjLoaderSimple usa sempre 5 float32 por vértice: [x, y, z, u, v] = 20 bytes.
+# Aqui convertemos esse buffer para layouts menores, descritos por um "descritor de layout"
+# que diz, para cada atributo, o location do shader, o número de componentes, o tipo GL,
+# se é normalizado e o offset dentro do vértice. O Ex7 monta os glVertexAttribPointer
+# automaticamente a partir desse descritor.
+#
+# Layouts disponíveis:
+#   'float32' : posição 3×float32, UV 2×float32                              → 20 bytes
+#   'float16' : posição 3×float16 (+2 de preenchimento), UV 2×uint16 norm.   → 12 bytes
+#   'int16'   : posição 3×int16 normalizado em relação à caixa envolvente
+#               (AABB) da malha (+2 de preenchimento), UV 2×uint16 norm.      → 12 bytes
+#               A dequantização (escala + translação da AABB) vai para a matriz
+#               de modelo: model = matrix44.multiply(descritor.dequantizacao, model).
+#
+# UVs como uint16 normalizado só representam [0, 1]; se a malha tiver UVs fora disso
+# (textura repetida), a UV fica em 2×float16.
+#
+# Normais (opcionais, quando houver um array de normais por vértice):
+#   'oct16'      : codificação octaédrica em 2×int16 normalizado → 4 bytes
+#   '10_10_10_2' : GL_INT_2_10_10_10_REV (x, y, z com 10 bits)  → 4 bytes
+#
+# Os atributos ficam sempre alinhados em 4 bytes, como recomendado para o vertex fetch.
+
+from collections import namedtuple
+
+import numpy as np
+
+# Constantes GL (os mesmos valores de OpenGL.GL; repetidas aqui para que este
+# módulo funcione sem contexto OpenGL, por exemplo nos testes de erro)
+GL_SHORT              = 0x1402
+GL_UNSIGNED_SHORT     = 0x1403
+GL_INT                = 0x1404
+GL_FLOAT              = 0x1406
+GL_HALF_FLOAT         = 0x140B
+GL_INT_2_10_10_10_REV = 0x8D9F
+
+# Um atributo de vértice: argumentos de glVertexAttribPointer
+Atributo = namedtuple('Atributo', 'location nome componentes tipo normalizado offset')
+
+
+class Descritor:
+    """
+    Descreve um layout de vértice intercalado.
+        nome         : nome do layout ('float32', 'float16', 'int16')
+        atributos    : lista de Atributo
+        stride       : bytes por vértice
+        dequantizacao: matriz 4x4 (convenção do pyrr) a multiplicar antes da matriz de modelo
+    """
+
+    def __init__(self, nome, atributos, stride, dequantizacao):
+        self.nome = nome
+        self.atributos = atributos
+        self.stride = stride
+        self.dequantizacao = dequantizacao
+
+    def __repr__(self):
+        return f"Descritor({self.nome!r}, stride={self.stride}, atributos={[a.nome for a in self.atributos]})"
+
+
+# ----------------------------------------
+# Codificação
+# ----------------------------------------
+
+def codifica(vertex_buffer, layout='float32', normais=None, formato_normal='oct16'):
+    """
+    Converte o buffer [x,y,z,u,v,...] (float32) de ObjLoaderSimple para um layout compacto.
+
+    Parâmetros:
+        vertex_buffer  (np.ndarray): float32, 5 valores por vértice.
+        layout         (str): 'float32', 'float16' ou 'int16'.
+        normais        (np.ndarray|None): (n, 3) normais por vértice; location=2 se presentes.
+        formato_normal (str): 'oct16' ou '10_10_10_2'.
+
+    Retorna:
+        dados     (np.ndarray): uint8 com n * stride bytes, pronto para glBufferData.
+        descritor (Descritor): layout para configurar os atributos e a matriz de dequantização.
+    """
+    vertices = np.asarray(vertex_buffer, dtype=np.float32).reshape(-1, 5)
+    pos, uv = vertices[:, :3], vertices[:, 3:]
+    campos, atributos = [], []
+    dequantizacao = np.identity(4, dtype=np.float32)
+
+    # --- posição (location = 0) ---
+    if layout == 'float32':
+        campos.append(('pos', '<f4', (3,)))
+        atributos.append(Atributo(0, 'pos', 3, GL_FLOAT, False, 0))
+        pos_codificada = pos
+    elif layout == 'float16':
+        campos += [('pos', '<f2', (3,)), ('_pad', '<u2')]
+        atributos.append(Atributo(0, 'pos', 3, GL_HALF_FLOAT, False, 0))
+        pos_codificada = pos.astype(np.float16)
+    elif layout == 'int16':
+        centro, meia = _aabb(pos)
+        campos += [('pos', '<i2', (3,)), ('_pad', '<u2')]
+        atributos.append(Atributo(0, 'pos', 3, GL_SHORT, True, 0))
+        pos_codificada = _snorm((pos - centro) / meia, 16)
+        # pos_real = centro + q * meia  →  escala por 'meia' e depois translada por 'centro'
+        dequantizacao = np.diag([meia[0], meia[1], meia[2], 1.0]).astype(np.float32)
+        dequantizacao[3, :3] = centro
+    else:
+        raise ValueError(f"layout desconhecido: {layout!r}")
+
+    # --- UV (location = 1) ---
+    offset_uv = 12 if layout == 'float32' else 8
+    if layout == 'float32':
+        campos.append(('uv', '<f4', (2,)))
+        atributos.append(Atributo(1, 'uv', 2, GL_FLOAT, False, offset_uv))
+        uv_codificada = uv
+    elif uv.size == 0 or (uv.min() >= 0.0 and uv.max() <= 1.0):
+        campos.append(('uv', '<u2', (2,)))
+        atributos.append(Atributo(1, 'uv', 2, GL_UNSIGNED_SHORT, True, offset_uv))
+        uv_codificada = np.round(uv * 65535.0).astype(np.uint16)
+    else:
+        campos.append(('uv', '<f2', (2,)))
+        atributos.append(Atributo(1, 'uv', 2, GL_HALF_FLOAT, False, offset_uv))
+        uv_codificada = uv.astype(np.float16)
+
+    # --- normal (location = 2, opcional) ---
+    if normais is not None:
+        offset_n = offset_uv + (8 if layout == 'float32' else 4)
+        if formato_normal == 'oct16':
+            campos.append(('normal', '<i2', (2,)))
+            atributos.append(Atributo(2, 'normal', 2, GL_SHORT, True, offset_n))
+            normal_codificada = codifica_octaedrica(normais)
+        elif formato_normal == '10_10_10_2':
+            campos.append(('normal', '<i4'))
+            atributos.append(Atributo(2, 'normal', 4, GL_INT_2_10_10_10_REV, True, offset_n))
+            normal_codificada = codifica_10_10_10_2(normais)
+        else:
+            raise ValueError(f"formato de normal desconhecido: {formato_normal!r}")
+
+    saida = np.zeros(len(vertices), dtype=np.dtype(campos))
+    saida['pos'] = pos_codificada
+    saida['uv'] = uv_codificada
+    if normais is not None:
+        saida['normal'] = normal_codificada
+    descritor = Descritor(layout, atributos, saida.dtype.itemsize, dequantizacao)
+    return saida.view(np.uint8).reshape(-1), descritor
+
+
+def _aabb(pos):
+    """Centro e meia-extensão da caixa envolvente (meia-extensão nunca zero)."""
+    if len(pos) == 0:
+        return np.zeros(3, np.float32), np.ones(3, np.float32)
+    minimo, maximo = pos.min(axis=0), pos.max(axis=0)
+    centro = ((minimo.astype(np.float64) + maximo) / 2.0).astype(np.float32)
+    meia = ((maximo.astype(np.float64) - minimo) / 2.0).astype(np.float32)
+    return centro, np.where(meia > 0, meia, np.float32(1.0))
+
+
+def _snorm(valores, bits):
+    """[-1, 1] → inteiro com sinal normalizado (regra do OpenGL 4.2+: c = round(f * (2^(b-1) - 1)))."""
+    maximo = (1 << (bits - 1)) - 1
+    return np.round(np.clip(valores, -1.0, 1.0) * maximo).astype(np.int16 if bits == 16 else np.int32)
+
+
+def codifica_octaedrica(normais):
+    """
+    Projeta a normal unitária sobre o octaedro |x|+|y|+|z| = 1 e desdobra o
+    hemisfério de baixo (z < 0) sobre o quadrado [-1,1]²; guarda (x, y) em 2×int16.
+    """
+    n = np.asarray(normais, dtype=np.float64)
+    n = n / np.maximum(np.abs(n).sum(axis=1, keepdims=True), 1e-30)
+    xy = n[:, :2].copy()
+    baixo = n[:, 2] < 0
+    sinal = np.where(xy[baixo] >= 0, 1.0, -1.0)
+    xy[baixo] = (1.0 - np.abs(xy[baixo][:, ::-1])) * sinal
+    return _snorm(xy, 16)
+
+
+def codifica_10_10_10_2(normais):
+    """Empacota (x, y, z, 0) no formato GL_INT_2_10_10_10_REV: x nos bits 0-9, y 10-19, z 20-29."""
+    n = np.asarray(normais, dtype=np.float64)
+    n = n / np.maximum(np.linalg.norm(n, axis=1, keepdims=True), 1e-30)
+    q = _snorm(n, 10).astype(np.int64) & 0x3FF
+    return (q[:, 0] | (q[:, 1] << 10) | (q[:, 2] << 20)).astype(np.uint32).view(np.int32)
+
+
+# ----------------------------------------
+# Decodificação (referência do que a GPU faz; usada nos testes de erro)
+# ----------------------------------------
+
+def decodifica(dados, descritor):
+    """
+    Faz na CPU o que o vertex fetch faz na GPU e devolve um dicionário
+    {'pos': (n,3), 'uv': (n,2), 'normal': (n,3)} em float32, com a dequantização já aplicada.
+    """
+    tipos = {GL_FLOAT: '<f4', GL_HALF_FLOAT: '<f2', GL_SHORT: '<i2', GL_UNSIGNED_SHORT: '<u2'}
+    n = dados.size // descritor.stride
+    bruto = dados.reshape(n, descritor.stride)
+    saida = {}
+    for a in descritor.atributos:
+        if a.tipo == GL_INT_2_10_10_10_REV:
+            palavra = bruto[:, a.offset:a.offset + 4].copy().view('<u4').reshape(-1).astype(np.int64)
+            comp = np.stack([(palavra >> s) & 0x3FF for s in (0, 10, 20)], axis=1)
+            comp = np.where(comp >= 512, comp - 1024, comp)
+            saida[a.nome] = np.maximum(comp / 511.0, -1.0).astype(np.float32)
+            continue
+        dt = np.dtype(tipos[a.tipo])
+        valores = bruto[:, a.offset:a.offset + a.componentes * dt.itemsize].copy().view(dt).astype(np.float64)
+        if a.normalizado:
+            maximo = 65535.0 if a.tipo == GL_UNSIGNED_SHORT else 32767.0
+            valores = np.maximum(valores / maximo, -1.0)
+        saida[a.nome] = valores.astype(np.float32)
+
+    # dequantização da posição (convenção pyrr: vetor linha × matriz)
+    pos = np.c_[saida['pos'].astype(np.float64), np.ones(n)]
+    saida['pos'] = (pos @ descritor.dequantizacao.astype(np.float64))[:, :3].astype(np.float32)
+
+    if saida.get('normal') is not None and saida['normal'].shape[1] == 2:
+        saida['normal'] = decodifica_octaedrica(saida['normal'])
+    return saida
+
+
+def decodifica_octaedrica(xy):
+    """Inverso de codifica_octaedrica: (x, y) em [-1,1]² → normal unitária (n, 3)."""
+    xy = np.asarray(xy, dtype=np.float64)
+    z = 1.0 - np.abs(xy).sum(axis=1)
+    n = np.c_[xy, z]
+    baixo = z < 0
+    sinal = np.where(xy[baixo] >= 0, 1.0, -1.0)
+    n[baixo, :2] = (1.0 - np.abs(xy[baixo][:, ::-1])) * sinal
+    return (n / np.linalg.norm(n, axis=1, keepdims=True)).astype(np.float32)
+
+
+# ----------------------------------------
+# Testes de erro contra a referência float32
+# ----------------------------------------
+# Uso: python VertexFormat.py [arquivo.obj]
+# Para cada layout, confere os limites teóricos de erro de quantização
+# e mostra o tamanho do VBO.
+
+if __name__ == "__main__":
+    import sys
+    from ObjLoaderSimple import ObjLoaderSimple
+
+    origem = sys.argv[1] if len(sys.argv) > 1 else "meshes/chibi.obj"
+    vertices, _, _ = ObjLoaderSimple.load_obj_indexed(origem)
+    ref = vertices.reshape(-1, 5).astype(np.float64)
+    pos, uv = ref[:, :3], ref[:, 3:]
+
+    # normais aleatórias para testar as codificações (o loader simples não lê normais)
+    rng = np.random.default_rng(0)
+    normais = rng.normal(size=(len(ref), 3))
+    normais /= np.linalg.norm(normais, axis=1, keepdims=True)
+
+    for layout in ('float32', 'float16', 'int16'):
+        for formato in ('oct16', '10_10_10_2'):
+            dados, desc = codifica(vertices, layout, normais, formato)
+            dec = decodifica(dados, desc)
+            erro_pos = np.abs(dec['pos'] - pos)
+            erro_uv = np.abs(dec['uv'] - uv).max()
+            # ângulo por atan2(|a×b|, a·b): arccos perde precisão perto de 0°
+            dec_n = dec['normal'].astype(np.float64)
+            angulo = np.degrees(np.arctan2(np.linalg.norm(np.cross(dec_n, normais), axis=1),
+                                           (dec_n * normais).sum(axis=1))).max()
+
+            # limites: float16 → meia unidade no último bit (2^-11 relativo);
+            #          int16   → meio passo de quantização da AABB;
+            #          uint16  → meio passo de 1/65535
+            if layout == 'float32':
+                limite_pos = np.zeros_like(pos) + 1e-7
+            elif layout == 'float16':
+                limite_pos = np.abs(pos) * 2.0 ** -11 + 2.0 ** -25
+            else:
+                _, meia = _aabb(vertices.reshape(-1, 5)[:, :3])
+                limite_pos = np.broadcast_to(meia / 32767.0 * 0.5 + np.abs(pos) * 2.0 ** -23 * 4, pos.shape)
+            assert np.all(erro_pos <= limite_pos), f"{layout}: erro de posição acima do limite"
+            if desc.atributos[1].tipo == GL_UNSIGNED_SHORT:
+                assert erro_uv <= 0.5 / 65535.0 + 1e-7, f"{layout}: erro de UV acima do limite"
+            assert angulo < (0.01 if formato == 'oct16' else 0.2), f"{formato}: erro angular acima do limite"
+
+            print(f"{layout:>8} + {formato:<10} stride {desc.stride:>2} B  VBO {dados.nbytes / 1e3:6.1f} KB  "
+                  f"erro pos {erro_pos.max():.2e}  uv {erro_uv:.2e}  normal {angulo:.4f}°")
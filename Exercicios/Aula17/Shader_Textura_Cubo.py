@@ -7,19 +7,28 @@ Inclui movimentação de câmera com WSAD.
 """
 import glfw
 from OpenGL.GL import *
-import OpenGL.GL.shaders
 import numpy as np
-from PIL import Image
 import time
 import pyrr
 import ctypes
+import os
+import sys
+
+# TextureLoader.py e ResourceRegistry.py ficam na pasta da Aula16: a textura é carregada pelo
+# mesmo código dos outros exemplos (cache em disco, mipmaps, anisotropia) e compartilhada
+# pelo registro com qualquer outro uso do mesmo arquivo
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Aula16"))
+from ResourceRegistry import registro
+from ShaderProgram import ShaderProgram, CameraUBO, BLOCO_CAMERA
 
 # --- Parâmetros da janela e variáveis globais ---
 WIDTH, HEIGHT = 800, 600           # resolução da janela
 window = None                      # handle da janela GLFW
-program = None                     # ID do programa de shaders
+program = None                     # ShaderProgram (programa de shaders + localização dos uniforms)
+camera_ubo = None                  # CameraUBO: view/projection num uniform buffer (std140)
 vao = None                         # ID do VAO do cubo
 texture_id = None                  # ID da textura carregada
+textura = None                     # recurso da textura no registro (para liberar no fim)
 start_time = None                  # hora de início para animação
 # vetores de câmera
 cam_pos = pyrr.Vector3([0.0,0.0,3.0])
@@ -45,19 +54,18 @@ def inicializa_opengl():
 # ---------- Compilação e linkagem de shaders ----------
 def inicializa_shaders():
     """Compila fontes GLSL e configura o programa de shaders."""
-    global program
-    # vertex shader
+    global program, camera_ubo
+    # vertex shader (view e projection vêm do bloco Camera, ver ShaderProgram.py)
     vertex_src = """
         #version 400 core
+        """ + BLOCO_CAMERA + """
         layout(location=0) in vec3 in_pos;
         layout(location=1) in vec2 in_uv;
         uniform mat4 model;
-        uniform mat4 view;
-        uniform mat4 projection;
         out vec2 frag_uv;
         void main() {
             frag_uv = in_uv;
-            gl_Position = projection * view * model * vec4(in_pos,1.0);
+            gl_Position = view_projection * model * vec4(in_pos,1.0);
         }
         """
    
@@ -80,14 +88,14 @@ def inicializa_shaders():
             FragColor = vec4(tex.rgb * color, tex.a);
         }
         """
-    vs = OpenGL.GL.shaders.compileShader(vertex_src, GL_VERTEX_SHADER)
-    fs = OpenGL.GL.shaders.compileShader(fragment_src, GL_FRAGMENT_SHADER)
-    program = OpenGL.GL.shaders.compileProgram(vs, fs)
+    # compila, linka e guarda a localização de todos os uniforms
+    program = ShaderProgram(vertex_src, fragment_src)
+    camera_ubo = CameraUBO()
 
 # ---------- Carregamento do VAO e textura ----------
 def inicializa_resources():
     """Cria VAO do cubo e carrega textura."""
-    global vao, texture_id
+    global vao, texture_id, textura
     # configura VAO do cubo
     stride = 5 * ctypes.sizeof(ctypes.c_float)
     vertices = np.array([
@@ -159,30 +167,19 @@ def inicializa_resources():
     
     
     
-    # carrega a imagem "textura.jpg" do disco e prepara os dados
-    img = Image.open("textura.jpg").transpose(Image.FLIP_TOP_BOTTOM)  # inverte verticalmente para coordenadas UV
-    data = img.convert("RGBA").tobytes()                             # converte para bytes RGBA
-    w, h = img.size                                                  # obtém largura e altura
-
-    # gera um ID de textura no OpenGL e vincula como GL_TEXTURE_2D
-    texture_id = glGenTextures(1)
+    # carrega "textura.jpg" via registro: decode_texture (inverte, RGBA, pirâmide de mipmaps
+    # filtrada em espaço linear) + upload_texture (trilinear + anisotrópica), feitos só se
+    # nenhum arquivo com o mesmo conteúdo já estiver na GPU
     glActiveTexture(GL_TEXTURE0)            # seleciona a texture unit 0
-    glBindTexture(GL_TEXTURE_2D, texture_id)
-
-    # Define como a textura será filtrada quando ampliada/reduzida
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)  # filtragem linear para minification
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)  # filtragem linear para magnification
-
-    # Envia os dados da imagem para a GPU (nível 0, formato RGBA)
-    glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, w, h, 0, GL_RGBA, GL_UNSIGNED_BYTE, data)
+    textura = registro.textura("textura.jpg")
+    texture_id = textura.valor
 
     # Desvincula a textura da unidade para evitar efeitos colaterais
     glBindTexture(GL_TEXTURE_2D, 0)
 
     # Vincula o sampler 'texture1' do fragment shader à texture unit 0
-    glUseProgram(program)
-    loc = glGetUniformLocation(program, "texture1")  # obtém localização do uniform sampler2D
-    glUniform1i(loc, 0)                               # configura para usar GL_TEXTURE0
+    program.usa()
+    glUniform1i(program['texture1'], 0)               # configura para usar GL_TEXTURE0
 
 
 # ---------- Loop principal ----------
@@ -212,7 +209,7 @@ def render_loop():
         glClear(GL_COLOR_BUFFER_BIT|GL_DEPTH_BUFFER_BIT)
         
         #Usa o programa de shaders
-        glUseProgram(program)
+        program.usa()
         
         # view/proj
         # Cria a matriz 'view' (câmera):
@@ -230,12 +227,11 @@ def render_loop():
         # - Tipo de dado: np.float32 (compatível com OpenGL)
         proj = pyrr.matrix44.create_perspective_projection_matrix(45.0,WIDTH/HEIGHT,0.1,100.0,dtype=np.float32)
         
-        # envia uniforms
-        loc = glGetUniformLocation
-        glUniformMatrix4fv(loc(program,"model"),1,GL_FALSE,model)
-        glUniformMatrix4fv(loc(program,"view"),1,GL_FALSE,view)
-        glUniformMatrix4fv(loc(program,"projection"),1,GL_FALSE,proj)
-        glUniform1f(loc(program,"u_time"),current_time)
+        # envia uniforms: view/proj numa escrita só do UBO; model e u_time pelas
+        # localizações guardadas no link (sem glGetUniformLocation no loop)
+        camera_ubo.escreve(view, proj, cam_pos)
+        glUniformMatrix4fv(program['model'],1,GL_FALSE,model)
+        glUniform1f(program['u_time'],current_time)
         
         # desenha cubo
         # 1) Seleciona a texture unit 0 (corresponde ao sampler2D 'texture1')
@@ -250,6 +246,9 @@ def render_loop():
         
         # swap_buffers(windows) serve para exibir o frame renderizado
         glfw.swap_buffers(window)
+    # última referência: apaga a textura da GPU antes de destruir o contexto
+    registro.libera(textura)
+    camera_ubo.apaga()
     glfw.terminate()
 
 # ---------- main ----------